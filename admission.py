@@ -0,0 +1,238 @@
+"""Admission control for the conversion endpoints.
+
+Every conversion request is charged an estimated cost, in config lines,
+and admitted against the limits of the caller's access level: how many of
+its requests may run at once, how many may wait, the largest single
+request and a deadline. Streamed uploads, whose size may be unknown or
+compressed, are also metered line by line as they are read. A request that would wait longer than its
+deadline is turned away at once with a Retry-After estimate instead of
+timing out later, and an admitted request carries its deadline so the
+conversion loop can abandon it between interface blocks. The time a unit
+of cost takes is learned from requests that finished a conversion.
+Limits are per process.
+"""
+
+from collections import deque
+import math
+import threading
+import time
+
+# Passcodes handed out on the login page -> access level
+ACCESS_CODES = {
+    'PWHE2024': 'admin',
+    'TEAM001': 'team',
+    'TEAM002': 'team',
+    'GUEST01': 'guest',
+    'DEV001': 'dev',
+}
+# Requests without an access code, such as scripts calling the API directly
+ANONYMOUS = 'anonymous'
+
+# A JSON-escaped config line averages roughly this many bytes
+BYTES_PER_LINE = 40
+
+class AccessClass:
+    """Limits for one access level; ``max_cost`` is in config lines and ``deadline`` in seconds"""
+    __slots__ = ('name', 'max_concurrent', 'max_queue', 'max_cost', 'deadline')
+
+    def __init__(self, name, max_concurrent, max_queue, max_cost, deadline):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_cost = max_cost
+        self.deadline = deadline
+
+ACCESS_CLASSES = (
+    AccessClass('admin', max_concurrent=4, max_queue=16, max_cost=20_000_000, deadline=120),
+    AccessClass('team', max_concurrent=2, max_queue=8, max_cost=5_000_000, deadline=60),
+    AccessClass('dev', max_concurrent=2, max_queue=4, max_cost=5_000_000, deadline=60),
+    AccessClass(ANONYMOUS, max_concurrent=2, max_queue=8, max_cost=2_000_000, deadline=60),
+    AccessClass('guest', max_concurrent=1, max_queue=2, max_cost=500_000, deadline=20),
+)
+
+class UnknownAccessCode(Exception):
+    """Raised for an access code that is not in ACCESS_CODES"""
+
+class TooExpensive(Exception):
+    """Raised when one request costs more than its access level may ever spend"""
+
+class Overloaded(Exception):
+    """Raised when a request is shed; ``retry_after`` is in whole seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class DeadlineExceeded(Exception):
+    """Raised inside an admitted request once its deadline has passed"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def estimate_cost(body_bytes, line_count=None):
+    """Cost of a conversion in config lines, from its line count when known and its size otherwise"""
+    estimate = (body_bytes or 0) // BYTES_PER_LINE
+    if line_count is not None:
+        estimate = max(estimate // 4, line_count)
+    return max(1, estimate)
+
+class Ticket:
+    """An admitted request: its level, cost and absolute deadline
+
+    ``max_cost`` is the level's limit, which ``meter`` enforces on bodies
+    whose size was not known at admission. The view sets ``converted`` once
+    a conversion actually ran; only those requests teach the cost estimate.
+    """
+    __slots__ = ('level', 'cost', 'started', 'deadline', 'clock', 'max_cost', 'converted')
+
+    def __init__(self, level, cost, started, deadline, clock, max_cost=None):
+        self.level = level
+        self.cost = cost
+        self.started = started
+        self.deadline = deadline
+        self.clock = clock
+        self.max_cost = max_cost
+        self.converted = False
+
+    def remaining(self):
+        return max(0.0, self.deadline - self.clock())
+
+    def check(self):
+        if self.clock() >= self.deadline:
+            raise DeadlineExceeded(f'Request exceeded its deadline for {self.level} access')
+
+    def guard(self, items):
+        """Yield from ``items``, checking the deadline before each one"""
+        for item in items:
+            self.check()
+            yield item
+
+    def meter(self, lines):
+        """Like guard, also counting ``lines`` and raising TooExpensive once they pass max_cost"""
+        for count, line in enumerate(lines, 1):
+            self.check()
+            if self.max_cost is not None and count > self.max_cost:
+                raise TooExpensive(f'Request exceeds the {self.max_cost} line limit for {self.level} access')
+            yield line
+
+class _Level:
+    __slots__ = ('access', 'condition', 'running', 'running_cost', 'waiting', 'queued_cost',
+                 'admitted', 'shed', 'expired')
+
+    def __init__(self, access, lock):
+        self.access = access
+        self.condition = threading.Condition(lock)
+        self.running = 0
+        self.running_cost = 0
+        self.waiting = deque()
+        self.queued_cost = 0
+        self.admitted = 0
+        self.shed = 0
+        self.expired = 0
+
+class AdmissionController:
+    def __init__(self, classes=ACCESS_CLASSES, seconds_per_line=5e-6, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._levels = {access.name: _Level(access, self._lock) for access in classes}
+        self.seconds_per_line = seconds_per_line
+        self.clock = clock
+
+    def level_for(self, access_code):
+        """Access level for a passcode header value; no code is ANONYMOUS"""
+        access_code = (access_code or '').strip()
+        if not access_code:
+            return ANONYMOUS
+        try:
+            return ACCESS_CODES[access_code]
+        except KeyError:
+            raise UnknownAccessCode('Unknown access code') from None
+
+    def access_class(self, level):
+        return self._levels[level].access
+
+    def max_body_bytes(self, level):
+        """Size past which a body is refused at ``level`` whatever its line count"""
+        # estimate_cost charges at least a quarter of the size-based estimate
+        return (self.access_class(level).max_cost + 1) * BYTES_PER_LINE * 4
+
+    def admit(self, level, cost):
+        """Wait for a slot at ``level`` and return a Ticket, or raise TooExpensive or Overloaded
+
+        Waiting requests are served in arrival order. The wait counts
+        against the request's deadline, and a request whose estimated
+        wait already exceeds it is shed without waiting at all.
+        """
+        state = self._levels[level]
+        access = state.access
+        if cost > access.max_cost:
+            raise TooExpensive(f'Request of about {cost} config lines exceeds the {access.max_cost} line limit '
+                               f'for {level} access')
+        arrived = self.clock()
+        deadline = arrived + access.deadline
+        with self._lock:
+            if state.running >= access.max_concurrent or state.waiting:
+                if len(state.waiting) >= access.max_queue:
+                    state.shed += 1
+                    raise Overloaded(f'Too many {level} requests are queued', self._retry_after(state))
+                wait = self._estimated_wait(state)
+                if wait >= access.deadline:
+                    state.shed += 1
+                    raise Overloaded(f'Estimated wait of {wait:.1f}s exceeds the {access.deadline}s deadline '
+                                     f'for {level} access', self._retry_after(state))
+
+                entry = object()
+                state.waiting.append(entry)
+                state.queued_cost += cost
+                try:
+                    ready = state.condition.wait_for(
+                        lambda: state.waiting[0] is entry and state.running < access.max_concurrent,
+                        timeout=access.deadline)
+                finally:
+                    state.waiting.remove(entry)
+                    state.queued_cost -= cost
+                    # The next in line may be able to start now, or move up
+                    state.condition.notify_all()
+                if not ready:
+                    state.shed += 1
+                    raise Overloaded(f'Timed out waiting for a {level} slot', self._retry_after(state))
+
+            state.running += 1
+            state.running_cost += cost
+            state.admitted += 1
+        return Ticket(level, cost, self.clock(), deadline, self.clock, access.max_cost)
+
+    def release(self, ticket, expired=False):
+        """Free a ticket's slot and fold its run time into the cost estimate"""
+        elapsed = self.clock() - ticket.started
+        state = self._levels[ticket.level]
+        with self._lock:
+            state.running -= 1
+            state.running_cost -= ticket.cost
+            if expired:
+                state.expired += 1
+            elif ticket.converted:
+                # Cancelled requests stopped early, and 304s, cache hits and rejected requests
+                # never converted, so any of them would understate the rate
+                self.seconds_per_line = 0.8 * self.seconds_per_line + 0.2 * elapsed / ticket.cost
+            state.condition.notify_all()
+
+    def _estimated_wait(self, state):
+        outstanding = state.running_cost + state.queued_cost
+        return outstanding * self.seconds_per_line / max(1, state.access.max_concurrent)
+
+    def _retry_after(self, state):
+        return max(1, math.ceil(self._estimated_wait(state)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'seconds_per_line': self.seconds_per_line,
+                'levels': {name: {
+                    'running': state.running,
+                    'queued': len(state.waiting),
+                    'admitted': state.admitted,
+                    'shed': state.shed,
+                    'expired': state.expired,
+                } for name, state in self._levels.items()},
+            }
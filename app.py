@@ -1,264 +1,379 @@
-from flask import Flask, render_template, request, jsonify
-import re
+from flask import (Flask, Response, abort, g, render_template, request, jsonify, send_file, send_from_directory,
+                   stream_with_context)
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.utils import secure_filename
+import functools
+import json
 import os
+import threading
+import time
+
+from admission import (AdmissionController, DeadlineExceeded, Overloaded, TooExpensive, UnknownAccessCode,
+                       estimate_cost)
+from compression import (REQUEST_DECODERS, BodyTooLarge, CorruptBody, compress, negotiate_encoding,
+                         open_decompressed)
+from config_diff import ConfigDiff, section_line_numbers
+from conversion_cache import ConversionCache, conversion_key
+from history import ConversionHistory
+from profiling import (PROFILE_HEADER, REQUEST_ID_HEADER, Profile, ProfileStore, ProfilerBusy, profile_mode,
+                       profiled_call, request_id, stats_text)
+from static_assets import AssetBundle
+from metrics import Counter, Gauge, Histogram, Registry, SECONDS_BUCKETS, SIZE_BUCKETS
+from validation import ConfigValidator
+from running_config import RunningConfig, parse_selection
+from live import InvalidDelta, LiveSessions, RevisionConflict
+from jobs import JobQueue, OwnerLimitReached, QueueFull, iter_job_events
+from final_config import PWHE_BACKENDS, HUAWEI_MODELS, generate_final_config
+from verification import (PING_HOST_LIMIT, PING_PAGE_LIMIT, SubnetTarget, generate_verification_commands, host_count,
+                          ip_to_int, is_netmask, iter_ping_commands)
+from converter import (
+    InterfaceBlock,
+    iter_interface_blocks,
+    parse_interface_config,
+    convert_interface_config,
+    convert_configuration,
+    iter_converted_configuration,
+    generate_migration_section,
+    generate_bridge_config,
+    iter_conversion_records,
+    join_converted,
+)
 
 app = Flask(__name__)
 
-def parse_interface_config(config_text):
-    """Parse the old Cisco interface configuration and extract interface blocks"""
-    interfaces = []
-    current_interface = None
-    current_lines = []
-    
-    for line in config_text.strip().split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check if this is a new interface definition
-        if line.startswith('interface '):
-            # Save previous interface if exists
-            if current_interface:
-                interfaces.append({
-                    'name': current_interface,
-                    'config': '\n'.join(current_lines)
-                })
-            
-            # Start new interface
-            current_interface = line
-            current_lines = [line]
-        elif current_interface:
-            current_lines.append(line)
-    
-    # Add the last interface
-    if current_interface:
-        interfaces.append({
-            'name': current_interface,
-            'config': '\n'.join(current_lines)
-        })
-    
-    return interfaces
-
-def convert_interface_config(interface_config, pw_ether_id):
-    """Convert a single interface configuration from old to new format"""
-    lines = interface_config['config'].split('\n')
-    new_lines = []
-    
-    # Extract ctag from encapsulation command, not from interface name
-    ctag = None
-    for line in lines:
-        if 'encapsulation dot1q' in line and 'second-dot1q' in line:
-            # Extract the ctag (second dot1q value)
-            match = re.search(r'encapsulation dot1q \d+ second-dot1q (\d+)', line.strip())
-            if match:
-                ctag = match.group(1)
-                break
-    
-    for line in lines:
-        original_line = line
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Handle interface name conversion
-        if line.startswith('interface '):
-            # Extract the original interface name and subinterface number
-            # Also check for l2transport keyword
-            match = re.match(r'interface\s+(GigabitEthernet|TenGigE|Tengig)\d+/\d+/\d+/\d+\.(\d+)(\s+l2transport)?', line)
-            if match:
-                interface_type, subinterface_num, l2transport = match.groups()
-                # Use the ctag from encapsulation command for the new interface name
-                # If no ctag found, fall back to subinterface number
-                interface_suffix = ctag if ctag else subinterface_num
-                # Create new PW-Ether interface name
-                new_interface_name = f"interface PW-Ether {pw_ether_id}.{interface_suffix}"
-                # Add l2transport if it was present in the original
-                if l2transport:
-                    new_interface_name += l2transport
-                new_lines.append(new_interface_name)
-            else:
-                # If pattern doesn't match, keep original
-                new_lines.append(original_line)
-        
-        # Handle encapsulation conversion
-        elif 'encapsulation dot1q' in line and 'second-dot1q' in line:
-            # Extract the ctag (second dot1q value)
-            match = re.search(r'encapsulation dot1q \d+ second-dot1q (\d+)', line)
-            if match:
-                ctag = match.group(1)
-                # Preserve original indentation
-                indent = original_line[:len(original_line) - len(original_line.lstrip())]
-                new_line = f"{indent}encapsulation dot1q {ctag}"
-                new_lines.append(new_line)
-            else:
-                new_lines.append(original_line)
-        
-        # Handle service-policy output conversion
-        elif line.startswith('service-policy output '):
-            # Keep service-policy output commands as is (don't add 'no' prefix)
-            new_lines.append(original_line)
-        
-        # Handle rewrite ingress tag pop conversion
-        elif 'rewrite ingress tag pop 2 symmetric' in line:
-            # If ctag is 502 or 504, remove the rewrite command entirely
-            if ctag in ['502', '504']:
-                continue  # Skip this line
-            else:
-                # Change pop 2 to pop 1 for other ctags
-                # Preserve original indentation
-                indent = original_line[:len(original_line) - len(original_line.lstrip())]
-                new_line = original_line.replace('pop 2', 'pop 1')
-                new_lines.append(new_line)
-        
-        # Handle shutdown command
-        elif line == 'shutdown':
-            # Already has shutdown, keep as is
-            new_lines.append(original_line)
-        
-        # All other lines remain unchanged
-        else:
-            new_lines.append(original_line)
-    
-    # Add shutdown command if not already present (before the closing '!')
-    if 'shutdown' not in [line.strip() for line in new_lines]:
-        # Find the position of the closing '!' and insert shutdown before it
-        for i, line in enumerate(new_lines):
-            if line.strip() == '!':
-                # Use the same indentation as other commands
-                indent = ''  # No indentation for shutdown command
-                new_lines.insert(i, f"{indent}shutdown")
-                break
-        else:
-            # If no '!' found, add shutdown at the end
-            new_lines.append('shutdown')
-    
-    # Ensure there's a closing '!' at the end
-    if new_lines and new_lines[-1].strip() != '!':
-        new_lines.append('!')
-    
-    return '\n'.join(new_lines)
-
-def convert_configuration(old_config, pw_ether_id):
-    """Convert the entire configuration from old to new format"""
-    interfaces = parse_interface_config(old_config)
-    converted_interfaces = []
-    
-    for interface in interfaces:
-        converted_config = convert_interface_config(interface, pw_ether_id)
-        converted_interfaces.append(converted_config)
-    
-    # Add migration section
-    migration_section = generate_migration_section(interfaces, pw_ether_id)
-    
-    # Combine converted interfaces with migration section
-    result = '\n\n'.join(converted_interfaces)
-    if migration_section:
-        result += '\n\n' + migration_section
-    
-    return result
-
-def generate_migration_section(interfaces, pw_ether_id):
-    """Generate migration section with shutdown commands for old interfaces and no shutdown for new ones"""
-    migration_lines = []
-    
-    # Section 1: New PW-Ether interfaces with no shutdown
-    migration_lines.append('### no shutdown (from config) ###')
-    for interface in interfaces:
-        # Extract the original interface name and subinterface number
-        match = re.match(r'interface\s+(GigabitEthernet|TenGigE|Tengig)\d+/\d+/\d+/\d+\.(\d+)(\s+l2transport)?', interface['name'].strip())
-        if match:
-            interface_type, subinterface_num, l2transport = match.groups()
-            
-            # Extract ctag from encapsulation command in the interface config
-            ctag = None
-            config_lines = interface['config'].split('\n')
-            for config_line in config_lines:
-                if 'encapsulation dot1q' in config_line and 'second-dot1q' in config_line:
-                    ctag_match = re.search(r'encapsulation dot1q \d+ second-dot1q (\d+)', config_line.strip())
-                    if ctag_match:
-                        ctag = ctag_match.group(1)
-                        break
-            
-            # Use ctag if found, otherwise fall back to subinterface number
-            interface_suffix = ctag if ctag else subinterface_num
-            
-            # Add no shutdown command for new PW-Ether interface
-            new_interface_name = f"interface PW-Ether {pw_ether_id}.{interface_suffix}"
-            if l2transport:
-                new_interface_name += l2transport
-            migration_lines.append(new_interface_name)
-            migration_lines.append(' no shutdown')
-    
-    migration_lines.append('')
-    
-    # Section 2: Old interfaces with shutdown
-    migration_lines.append('### shutdown (from list) ###')
-    for interface in interfaces:
-        # Use the complete original interface name for shutdown commands
-        original_interface_name = interface['name'].strip()
-        migration_lines.append(original_interface_name)
-        migration_lines.append(' shutdown')
-    
-    return '\n'.join(migration_lines)
-
-def generate_bridge_config(interfaces, pw_ether_id):
-    """Generate L2VPN bridge configuration for ctags 502/504"""
-    special_ctags = []
-    
-    # Check for interfaces with ctags 502 or 504
-    for interface in interfaces:
-        match = re.match(r'interface\s+(GigabitEthernet|TenGigE|Tengig)\d+/\d+/\d+/\d+\.(\d+)(\s+l2transport)?', interface['name'].strip())
-        if match:
-            subinterface_num = match.group(2)
-            
-            # Extract ctag from encapsulation command in the interface config
-            ctag = None
-            config_lines = interface['config'].split('\n')
-            for config_line in config_lines:
-                if 'encapsulation dot1q' in config_line and 'second-dot1q' in config_line:
-                    ctag_match = re.search(r'encapsulation dot1q \d+ second-dot1q (\d+)', config_line.strip())
-                    if ctag_match:
-                        ctag = ctag_match.group(1)
-                        break
-            
-            # Use ctag if found, otherwise fall back to subinterface number
-            interface_suffix = ctag if ctag else subinterface_num
-            
-            # Check if the ctag ends with 502 or 504 (for 4+ digit ctags)
-            if interface_suffix.endswith('502') or interface_suffix.endswith('504'):
-                # Extract the last 3 digits for the bridge domain name
-                ctag_suffix = interface_suffix[-3:]
-                special_ctags.append({
-                    'ctag': ctag_suffix,
-                    'original_interface': interface['name'].strip(),
-                    'new_interface': f"PW-Ether {pw_ether_id}.{interface_suffix}"
-                })
-    
-    if not special_ctags:
+# Batch conversions fan out across a bounded process pool
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))
+BATCH_MAX_JOBS = int(os.environ.get('BATCH_MAX_JOBS', 500))
+
+# Asynchronous jobs run on in-process worker threads behind a bounded queue
+job_queue = JobQueue(
+    workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_queue=int(os.environ.get('JOB_MAX_QUEUE', 100)),
+    result_ttl=float(os.environ.get('JOB_RESULT_TTL', 900))
+)
+
+# Conversion requests are admitted against per-access-level limits (see admission.py)
+admission = AdmissionController()
+ACCESS_CODE_HEADER = 'X-Access-Code'
+ADMITTED_ENDPOINTS = ('convert', 'convert_stream', 'convert_batch', 'start_live_session', 'update_live_session',
+                      'verify_ping')
+# Endpoints answering from the conversion cache, which only take a slot on a miss
+CACHED_ENDPOINTS = ('convert',)
+# Jobs run unattended, so they get this many times the interactive deadline
+JOB_DEADLINE_FACTOR = int(os.environ.get('JOB_DEADLINE_FACTOR', 10))
+
+# Repeat conversions of the same config are served from a per-worker cache
+conversion_cache = ConversionCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 256)),
+    max_chars=int(os.environ.get('CACHE_MAX_CHARS', 64 * 1024 * 1024)),
+    ttl=float(os.environ.get('CACHE_TTL', 600))
+)
+
+# Admins can profile a single /convert, /convert/batch or /final request with X-Profile (see profiling.py);
+# PROFILING=0 removes the hook altogether
+PROFILING = os.environ.get('PROFILING', '1') != '0'
+PROFILE_ENVIRON_KEY = 'HTTP_' + PROFILE_HEADER.upper().replace('-', '_')
+profile_store = ProfileStore(
+    os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles')),
+    max_profiles=int(os.environ.get('PROFILE_MAX_STORED', 100))
+)
+
+# Finished conversions can be kept in a local SQLite database for later lookup by an admin.
+# Off unless HISTORY_DB names the database file; entries are kept until that file is deleted.
+HISTORY_DB = os.environ.get('HISTORY_DB', '')
+HISTORY_MAX_RESULTS = int(os.environ.get('HISTORY_MAX_RESULTS', 200))
+conversion_history = None
+if HISTORY_DB:
+    os.makedirs(os.path.dirname(os.path.abspath(HISTORY_DB)), exist_ok=True)
+    conversion_history = ConversionHistory(
+        HISTORY_DB,
+        pool_size=int(os.environ.get('HISTORY_POOL_SIZE', 4)),
+        batch_size=int(os.environ.get('HISTORY_BATCH_SIZE', 64))
+    )
+
+# Live editing sessions re-convert only the blocks a delta touches; block
+# conversions are memoised across sessions by content hash and PW-Ether ID
+live_sessions = LiveSessions(
+    ConversionCache(
+        max_entries=int(os.environ.get('BLOCK_CACHE_MAX_ENTRIES', 200_000)),
+        max_chars=int(os.environ.get('BLOCK_CACHE_MAX_CHARS', 64 * 1024 * 1024)),
+        ttl=float(os.environ.get('BLOCK_CACHE_TTL', 1800))
+    ),
+    max_sessions=int(os.environ.get('LIVE_MAX_SESSIONS', 256)),
+    ttl=float(os.environ.get('LIVE_SESSION_TTL', 1800))
+)
+
+# Compressed request bodies may inflate to at most this many bytes
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 512 * 1024 * 1024))
+# Smaller responses are not worth compressing
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/x-diff', 'text/plain', 'text/html')
+# Endpoints that read the request body incrementally themselves
+STREAMING_ENDPOINTS = ('convert_stream',)
+
+# format=ndjson returns one JSON record per line instead of a single config string
+NDJSON_MIMETYPE = 'application/x-ndjson'
+DIFF_MIMETYPE = 'text/x-diff'
+
+TEMPLATE_PATHS = [os.path.join(app.root_path, app.template_folder, name) for name in ('index.html', 'login.html')]
+
+# The index shell is rendered once per worker and split into content-hashed assets
+PUBLIC_FOLDER = os.path.join(app.root_path, 'public')
+ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE', 365 * 24 * 3600))
+PUBLIC_MAX_AGE = int(os.environ.get('PUBLIC_MAX_AGE', 24 * 3600))
+
+def build_asset_bundle():
+    with app.app_context():
+        html = render_template('index.html')
+    with open(os.path.join(PUBLIC_FOLDER, 'sw.js'), encoding='utf-8') as f:
+        return AssetBundle(html, f.read())
+
+asset_bundle = build_asset_bundle()
+
+# Per-worker metrics, rendered on demand by /metrics
+STARTED_AT = time.time()
+metrics_registry = Registry()
+in_flight_requests = 0
+served_requests = 0
+_request_count_lock = threading.Lock()
+
+HTTP_REQUESTS = metrics_registry.register(Counter(
+    'pwhe_http_requests_total', 'HTTP requests by endpoint and status code', ('endpoint', 'status')))
+HTTP_REQUEST_SECONDS = metrics_registry.register(Histogram(
+    'pwhe_http_request_seconds', 'HTTP request latency by endpoint', SECONDS_BUCKETS, ('endpoint',)))
+CONVERT_STAGE_SECONDS = metrics_registry.register(Histogram(
+    'pwhe_convert_stage_seconds', 'Time spent in each /convert stage', SECONDS_BUCKETS, ('stage',)))
+CONVERT_INPUT_BYTES = metrics_registry.register(Histogram(
+    'pwhe_convert_input_bytes', 'Size of /convert request bodies in bytes', SIZE_BUCKETS))
+CONVERT_INPUT_LINES = metrics_registry.register(Histogram(
+    'pwhe_convert_input_lines', 'Lines in each submitted configuration', SIZE_BUCKETS))
+CONVERT_INPUT_INTERFACES = metrics_registry.register(Histogram(
+    'pwhe_convert_input_interfaces', 'Interface blocks in each converted configuration', SIZE_BUCKETS))
+CONVERT_OUTPUT_CHARS = metrics_registry.register(Histogram(
+    'pwhe_convert_output_chars', 'Characters of converted configuration returned', SIZE_BUCKETS))
+CONVERT_RESULTS = metrics_registry.register(Counter(
+    'pwhe_convert_results_total', 'Conversions by how they were served', ('result',)))
+metrics_registry.register(Gauge(
+    'pwhe_in_flight_requests', 'Requests currently being handled by this worker', lambda: in_flight_requests))
+metrics_registry.register(Gauge(
+    'pwhe_cache_entries', 'Entries in the conversion result cache', lambda: conversion_cache.stats()['entries']))
+metrics_registry.register(Gauge(
+    'pwhe_cache_chars', 'Characters held by the conversion result cache', lambda: conversion_cache.stats()['chars']))
+for _counter in ('hits', 'misses', 'evictions', 'expirations', 'not_modified'):
+    metrics_registry.register(Gauge(
+        f'pwhe_cache_{_counter}_total', f'Conversion cache {_counter.replace("_", " ")}',
+        lambda counter=_counter: conversion_cache.stats()[counter], metric_type='counter'))
+
+@app.before_request
+def start_request_timer():
+    global in_flight_requests
+    g.request_started = time.perf_counter()
+    with _request_count_lock:
+        in_flight_requests += 1
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, endpoint=endpoint)
+    return response
+
+@app.before_request
+def decode_request_body():
+    """Inflate gzip, deflate, br or zstd request bodies as they are read"""
+    encoding = request.headers.get('Content-Encoding', '').strip().lower()
+    if not encoding or encoding == 'identity':
         return None
-    
-    # Generate bridge configuration
-    bridge_lines = []
-    bridge_lines.append('l2vpn')
-    bridge_lines.append(' bridge group D_NET')
-    
-    for ctag_info in special_ctags:
-        bridge_lines.append(f'  bridge-domain ME_DNET_{ctag_info["ctag"]}')
-        bridge_lines.append(f'   interface {ctag_info["new_interface"]}')
-        bridge_lines.append('    storm-control multicast kbps 50000')
-        bridge_lines.append('    storm-control broadcast kbps 50000')
-        bridge_lines.append('    split-horizon group')
-        bridge_lines.append('   !')
-        bridge_lines.append('  !')
-    
-    bridge_lines.append(' !')
-    bridge_lines.append('!')
-    
-    return '\n'.join(bridge_lines)
+    if encoding not in REQUEST_DECODERS:
+        return jsonify({'error': f'Unsupported Content-Encoding: {encoding}'}), 415
+
+    if request.endpoint in STREAMING_ENDPOINTS:
+        # Inflated as the view reads it, with the lines metered against the level's limit
+        request.stream = open_decompressed(request.stream, encoding, MAX_BODY_BYTES)
+        return None
+    limit = MAX_BODY_BYTES
+    if request.endpoint in ADMITTED_ENDPOINTS:
+        # Stop inflating once the body is too big to be admitted at the caller's level
+        try:
+            level = admission.level_for(request.headers.get(ACCESS_CODE_HEADER))
+        except UnknownAccessCode as e:
+            return jsonify({'error': str(e)}), 403
+        limit = min(limit, admission.max_body_bytes(level))
+    request.stream = open_decompressed(request.stream, encoding, limit)
+    # Inflate up front so an oversized or corrupt body is answered here, not inside the view
+    try:
+        request.get_data()
+    except BodyTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except CorruptBody as e:
+        return jsonify({'error': str(e)}), 400
+    return None
+
+def retry_response(message, status, retry_after):
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def deadline_response(e):
+    g.deadline_exceeded = True
+    return retry_response(str(e), 503, e.retry_after)
+
+def admin_required(feature='Profiling'):
+    """Error response unless the request carries an admin access code, else None"""
+    try:
+        level = admission.level_for(request.headers.get(ACCESS_CODE_HEADER))
+    except UnknownAccessCode as e:
+        return jsonify({'error': str(e)}), 403
+    if level != 'admin':
+        return jsonify({'error': f'{feature} requires admin access'}), 403
+    return None
+
+def profiled(view):
+    """Run a view under the profiler an admin asks for with X-Profile, and save the profile
+
+    Requests without the header go straight to the view.
+    """
+    if not PROFILING:
+        return view
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # Straight from the WSGI environ: the cheapest check there is on the unprofiled path
+        header = request.environ.get(PROFILE_ENVIRON_KEY)
+        if header is None:
+            return view(*args, **kwargs)
+        try:
+            mode = profile_mode(header)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if mode is None:
+            return view(*args, **kwargs)
+        denied = admin_required()
+        if denied is not None:
+            return denied
+
+        profile = Profile(mode)
+        try:
+            profile.start()
+        except ProfilerBusy:
+            return retry_response('Another request is being profiled, please retry shortly', 409, 1)
+        g.profile = profile
+        try:
+            response = app.make_response(view(*args, **kwargs))
+        finally:
+            profile.stop()
+        profile_id = request_id(request.headers.get(REQUEST_ID_HEADER))
+        profile_store.save(profile_id, profile)
+        response.headers['X-Profile-Id'] = profile_id
+        response.headers['X-Profile-Url'] = f'/profiles/{profile_id}'
+        return response
+    return wrapper
+
+@app.before_request
+def admit_request():
+    """Charge a conversion request's estimated cost against its access level, or shed it"""
+    if request.endpoint not in ADMITTED_ENDPOINTS:
+        return None
+    try:
+        g.access_level = admission.level_for(request.headers.get(ACCESS_CODE_HEADER))
+    except UnknownAccessCode as e:
+        return jsonify({'error': str(e)}), 403
+    if request.endpoint in CACHED_ENDPOINTS:
+        # Revalidations and cache hits cost nothing, so the view takes its slot on a miss
+        return None
+    return take_admission_slot()
+
+def take_admission_slot():
+    """Admit the request at its estimated cost; return the error response if it is shed"""
+    if request.endpoint == 'verify_ping':
+        # No body: the page of ping commands is the work, one line per host
+        cost = estimate_cost(0, min(request.args.get('limit', PING_HOST_LIMIT, type=int), PING_PAGE_LIMIT))
+    elif request.endpoint in STREAMING_ENDPOINTS:
+        cost = estimate_cost(request.content_length)
+    else:
+        # Already inflated by decode_request_body; config newlines are JSON-escaped
+        body = request.get_data()
+        cost = estimate_cost(len(body), body.count(b'\\n') + body.count(b'\n') + 1)
+    try:
+        g.admission_ticket = admission.admit(g.access_level, cost)
+    except TooExpensive as e:
+        return jsonify({'error': str(e)}), 413
+    except Overloaded as e:
+        return retry_response(str(e), 429, e.retry_after)
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        admission.release(ticket, expired=isinstance(exc, DeadlineExceeded) or g.get('deadline_exceeded', False))
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON and text responses with the best encoding the client accepts"""
+    if (response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.status_code in (204, 304) or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings)
+    data = response.get_data()
+    if encoding is None or len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes differ from the identity ones, so the validator becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    global in_flight_requests, served_requests
+    with _request_count_lock:
+        in_flight_requests -= 1
+        served_requests += 1
+
+def asset_response(asset, cache_control):
+    """Serve a prebuilt asset in the best precompressed encoding the client accepts"""
+    encoding = negotiate_encoding(request.accept_encodings, asset.encoded)
+    if request.if_none_match.contains_weak(asset.etag):
+        response = Response(status=304)
+    else:
+        response = Response(asset.encoded[encoding] if encoding else asset.body, content_type=asset.content_type)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(asset.etag, weak=encoding is not None)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    # Always revalidated, so a new deploy's asset names are picked up on the next load
+    return asset_response(asset_bundle.shell, 'no-cache')
+
+@app.route('/assets/<name>')
+def static_asset(name):
+    asset = asset_bundle.assets.get(name)
+    if asset is None:
+        abort(404)
+    return asset_response(asset, f'public, max-age={ASSET_MAX_AGE}, immutable')
+
+@app.route('/sw.js')
+def service_worker():
+    return asset_response(asset_bundle.service_worker, 'no-cache')
+
+@app.route('/manifest.json')
+def web_manifest():
+    return send_from_directory(PUBLIC_FOLDER, 'manifest.json', mimetype='application/manifest+json',
+                               max_age=PUBLIC_MAX_AGE)
+
+@app.route('/icons/<path:name>')
+def icon(name):
+    return send_from_directory(os.path.join(PUBLIC_FOLDER, 'icons'), name, max_age=PUBLIC_MAX_AGE)
 
 @app.route('/login')
 def login():
@@ -266,12 +381,41 @@ def login():
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy', 'service': 'PW-HE Config Generator'})
+    # Ready once the page templates this worker serves are readable
+    ready = all(os.access(path, os.R_OK) for path in TEMPLATE_PATHS)
+    response = jsonify({
+        'status': 'healthy',
+        'ready': ready,
+        'service': 'PW-HE Config Generator',
+        'worker': {
+            'pid': os.getpid(),
+            'uptime_s': round(time.time() - STARTED_AT, 3),
+            'requests_served': served_requests,
+            'in_flight': in_flight_requests,
+            'batch_pool_started': _batch_executor is not None
+        },
+        'assets': asset_bundle.version,
+        'admission': admission.stats(),
+        'jobs': job_queue.stats(),
+        'live': live_sessions.stats(),
+        'cache': conversion_cache.stats(),
+        'history': conversion_history.stats() if conversion_history is not None else None
+    })
+    if not ready:
+        response.status_code = 503
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(metrics_registry.render((('pid', os.getpid()),)),
+                    mimetype='text/plain; version=0.0.4')
 
 @app.route('/convert', methods=['POST'])
+@profiled
 def convert():
     try:
-        data = request.get_json()
+        with CONVERT_STAGE_SECONDS.time(stage='decode'):
+            data = request.get_json()
         old_config = data.get('old_config', '')
         pw_ether_id = data.get('pw_ether_id', '')
         
@@ -280,18 +424,525 @@ def convert():
         
         if not pw_ether_id.strip():
             return jsonify({'error': 'Please provide the PW-Ether ID'}), 400
+
+        # An optional selection such as "Gi0/0/0/14 outer 3513" picks subinterfaces out of a full running config
+        selection = str(data.get('select') or '').strip()
+        try:
+            criteria = parse_selection(selection)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        output_format = data.get('format') or request.args.get('format') or 'json'
+        if output_format not in ('json', 'ndjson', 'diff'):
+            return jsonify({'error': f'Unknown format {output_format!r}, expected json, ndjson or diff'}), 400
+        ndjson = output_format == 'ndjson'
+        # format=diff downloads the block-aligned diff; diff=true adds it to the JSON response
+        with_diff = output_format == 'diff' or (output_format == 'json' and bool(data.get('diff')))
+
+        CONVERT_INPUT_BYTES.observe(request.content_length or len(old_config))
+        CONVERT_INPUT_LINES.observe(old_config.count('\n') + 1)
         
-        # Convert the configuration
-        new_config = convert_configuration(old_config, pw_ether_id)
-        
+        # Identical config and PW-Ether ID pairs share an ETag, so clients can revalidate
+        with CONVERT_STAGE_SECONDS.time(stage='hash'):
+            representation = {'json': 'json+diff' if with_diff else '', 'ndjson': 'ndjson', 'diff': 'diff'}[output_format]
+            key = conversion_key(old_config, pw_ether_id, selection, representation)
+        if request.if_none_match.contains_weak(key):
+            conversion_cache.record_not_modified()
+            CONVERT_RESULTS.inc(result='not_modified')
+            response = Response(status=304)
+            response.set_etag(key)
+            return response
+
+        cached = conversion_cache.get(key)
+        if cached is None:
+            shed = take_admission_slot()
+            if shed is not None:
+                return shed
+            ticket = g.admission_ticket
+            with CONVERT_STAGE_SECONDS.time(stage='parse'):
+                if criteria:
+                    sections = list(RunningConfig(old_config).select(**criteria))
+                    interfaces = [section.to_block() for section in sections]
+                    line_numbers = [section_line_numbers(section) for section in sections]
+                elif with_diff:
+                    numbered = list(ticket.guard(iter_interface_blocks(old_config.split('\n'), line_numbers=True)))
+                    interfaces = [interface for interface, _ in numbered]
+                    line_numbers = [numbers for _, numbers in numbered]
+                else:
+                    interfaces = list(ticket.guard(iter_interface_blocks(old_config.strip().split('\n'))))
+            if criteria and not interfaces:
+                return jsonify({'error': f'No subinterfaces match "{selection}"'}), 400
+            validator = ConfigValidator(pw_ether_id)
+            CONVERT_INPUT_INTERFACES.observe(len(interfaces))
+            if ndjson:
+                with CONVERT_STAGE_SECONDS.time(stage='convert'):
+                    new_config = ''.join(ndjson_lines(
+                        iter_conversion_records(ticket.guard(interfaces), pw_ether_id, validator)))
+                diagnostics = validator.diagnostics()
+                new_config += ''.join(ndjson_lines({'type': 'diagnostic', **diagnostic} for diagnostic in diagnostics))
+            else:
+                config_diff = ConfigDiff(pw_ether_id) if with_diff else None
+                with CONVERT_STAGE_SECONDS.time(stage='convert'):
+                    converted_interfaces = []
+                    if config_diff is None:
+                        for interface in ticket.guard(interfaces):
+                            converted_interfaces.append(convert_interface_config(interface, pw_ether_id))
+                            validator.observe(interface)
+                    else:
+                        for interface, numbers in ticket.guard(zip(interfaces, line_numbers)):
+                            converted_interfaces.append(config_diff.add(interface, numbers))
+                            validator.observe(interface)
+                with CONVERT_STAGE_SECONDS.time(stage='migration'):
+                    migration_section = generate_migration_section(interfaces, pw_ether_id)
+                    if config_diff is not None:
+                        config_diff.add_migration(interfaces, migration_section)
+                new_config = join_converted(converted_interfaces, migration_section)
+                diagnostics = validator.diagnostics()
+                if conversion_history is not None:
+                    # A selection is stored as just the subinterfaces it picked
+                    history_config = '\n'.join(interface.config for interface in interfaces) if criteria else old_config
+                    conversion_history.record(history_config, new_config, pw_ether_id, access_level=ticket.level)
+            if with_diff:
+                # Each diff line repeats its text with two line numbers, about three times the config
+                conversion_cache.put(key, (new_config, diagnostics, config_diff), size=3 * len(new_config))
+            else:
+                conversion_cache.put(key, (new_config, diagnostics), size=len(new_config))
+            ticket.converted = True
+            CONVERT_RESULTS.inc(result='converted')
+        elif with_diff:
+            new_config, diagnostics, config_diff = cached
+            CONVERT_RESULTS.inc(result='cache_hit')
+        else:
+            new_config, diagnostics = cached
+            CONVERT_RESULTS.inc(result='cache_hit')
+        CONVERT_OUTPUT_CHARS.observe(len(new_config))
+
+        if ndjson:
+            # Diagnostics are already records in the body
+            response = Response(new_config, mimetype=NDJSON_MIMETYPE)
+            response.set_etag(key)
+            return response
+        if output_format == 'diff':
+            with CONVERT_STAGE_SECONDS.time(stage='serialise'):
+                response = Response(config_diff.unified(new_label=f'new configuration (PW-Ether {pw_ether_id})'),
+                                    mimetype=DIFF_MIMETYPE)
+            filename = secure_filename(f'pw-ether-{pw_ether_id}.diff') or 'conversion.diff'
+            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+            response.set_etag(key)
+            return response
+        with CONVERT_STAGE_SECONDS.time(stage='serialise'):
+            result = {
+                'success': True,
+                'new_config': new_config,
+                'diagnostics': diagnostics
+            }
+            if with_diff:
+                result['diff'] = config_diff.to_dict()
+            response = jsonify(result)
+        response.set_etag(key)
+        return response
+
+    except DeadlineExceeded as e:
+        return deadline_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
+
+@app.route('/profiles/<profile_id>')
+def get_profile(profile_id):
+    """A saved request profile: pstats (?format=text for a summary) or collapsed stacks"""
+    denied = admin_required()
+    if denied is not None:
+        return denied
+    found = profile_store.find(profile_id)
+    if found is None:
+        return jsonify({'error': 'Unknown or expired profile'}), 404
+    path, mode = found
+    if mode == 'cprofile':
+        if request.args.get('format') == 'text':
+            return Response(stats_text(path), mimetype='text/plain')
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f'{profile_id}.prof')
+    return send_file(path, mimetype='text/plain', as_attachment=True, download_name=f'{profile_id}.collapsed')
+
+@app.route('/history')
+def search_history():
+    """Past conversions by circuit ID, customer, interface name or PW-Ether ID"""
+    denied = admin_required('Conversion history')
+    if denied is not None:
+        return denied
+    if conversion_history is None:
+        return jsonify({'error': 'Conversion history is disabled'}), 404
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Please provide a search term'}), 400
+    limit = min(max(request.args.get('limit', 50, type=int), 1), HISTORY_MAX_RESULTS)
+    start = time.perf_counter()
+    matches = conversion_history.search(query, limit)
+    return jsonify({
+        'query': query,
+        'matches': matches,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 3)
+    })
+
+@app.route('/history/<int:conversion_id>')
+def history_entry(conversion_id):
+    denied = admin_required('Conversion history')
+    if denied is not None:
+        return denied
+    if conversion_history is None:
+        return jsonify({'error': 'Conversion history is disabled'}), 404
+    entry = conversion_history.get(conversion_id)
+    if entry is None:
+        return jsonify({'error': 'Unknown conversion'}), 404
+    return jsonify(entry)
+
+@app.route('/final', methods=['POST'])
+@profiled
+def final():
+    """Generate the full CSR plus PW-HE BE configuration document"""
+    try:
+        data = request.get_json()
+        fields = {name: str(data.get(name, '')).strip() for name in (
+            'old_config', 'pw_ether_id', 'csr_ip', 'pwhe_option', 'huawei_model',
+            'existing_csr_config', 'cx_name', 'cx_location'
+        )}
+
+        if fields['pwhe_option'] not in PWHE_BACKENDS:
+            return jsonify({'error': 'Please select a PW-HE BE option'}), 400
+
+        if fields['huawei_model'] not in HUAWEI_MODELS:
+            return jsonify({'error': 'Please select a Huawei CSR Model'}), 400
+
+        if not fields['pw_ether_id']:
+            return jsonify({'error': 'Please provide the PW-Ether ID'}), 400
+
+        if not fields['csr_ip']:
+            return jsonify({'error': 'Please provide the CSR IP address'}), 400
+
+        if not fields['old_config']:
+            return jsonify({'error': 'Please provide the old configuration'}), 400
+
+        if not fields['existing_csr_config']:
+            return jsonify({'error': 'Please provide the existing CSR interface configuration'}), 400
+
+        return jsonify({
+            'success': True,
+            'final_config': generate_final_config(**fields)
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Final configuration failed: {str(e)}'}), 500
+
+@app.route('/verify', methods=['POST'])
+def verify():
+    """Generate show/ping verification commands, capping the pings listed per subnet"""
+    try:
+        data = request.get_json()
+        old_config = data.get('old_config', '')
+        pw_ether_id = str(data.get('pw_ether_id', '')).strip()
+        ping_limit = data.get('ping_limit', PING_HOST_LIMIT)
+
+        if not old_config.strip():
+            return jsonify({'error': 'Please provide the old configuration'}), 400
+
+        if ping_limit is not None and (not isinstance(ping_limit, int) or ping_limit < 0):
+            return jsonify({'error': 'ping_limit must be a non-negative integer or null'}), 400
+
+        interfaces = parse_interface_config(old_config)
         return jsonify({
             'success': True,
-            'new_config': new_config
+            'verification_commands': generate_verification_commands(interfaces, pw_ether_id, ping_limit)
         })
-    
+
+    except Exception as e:
+        return jsonify({'error': f'Verification failed: {str(e)}'}), 500
+
+@app.route('/verify/ping', methods=['GET'])
+def verify_ping():
+    """Stream one page of the ping commands for a single subnet, PING_HOST_LIMIT hosts by default"""
+    address = ip_to_int(request.args.get('ip', ''))
+    netmask = ip_to_int(request.args.get('mask', ''))
+    vrf = request.args.get('vrf', '').strip()
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', PING_HOST_LIMIT, type=int)
+
+    if address is None or netmask is None or not is_netmask(netmask):
+        return jsonify({'error': 'Please provide a valid ip and mask'}), 400
+
+    if not vrf:
+        return jsonify({'error': 'Please provide the VRF'}), 400
+
+    if offset < 0 or limit < 0:
+        return jsonify({'error': 'offset and limit must be non-negative'}), 400
+
+    if limit > PING_PAGE_LIMIT:
+        return jsonify({'error': f'limit must be at most {PING_PAGE_LIMIT}'}), 400
+
+    target = SubnetTarget('', vrf, request.args['ip'], address, netmask)
+    response = Response(iter_ping_commands(target, offset, limit), mimetype='text/plain')
+    response.headers['X-Total-Hosts'] = str(host_count(address, netmask))
+    return response
+
+def ndjson_lines(records):
+    """Serialise records one per line"""
+    for record in records:
+        yield json.dumps(record, separators=(',', ':')) + '\n'
+
+def until_deadline(chunks, cancelled):
+    """Pass ``chunks`` through, ending with ``cancelled(error)`` if the request runs out of time or lines"""
+    try:
+        yield from chunks
+    except DeadlineExceeded as e:
+        g.deadline_exceeded = True
+        yield cancelled(e)
+    except TooExpensive as e:
+        yield cancelled(e)
+
+def iter_request_lines(stream, encoding='utf-8'):
+    """Decode an uploaded byte stream line by line"""
+    for raw_line in stream:
+        yield raw_line.decode(encoding, errors='replace')
+
+@app.route('/convert/stream', methods=['POST'])
+def convert_stream():
+    """Convert a text/plain config upload, streaming each interface back as it closes"""
+    pw_ether_id = request.args.get('pw_ether_id', '')
+    output_format = request.args.get('format', 'text')
+    if output_format not in ('text', 'ndjson'):
+        return jsonify({'error': f'Unknown format {output_format!r}, expected text or ndjson'}), 400
+
+    if request.content_length == 0:
+        return jsonify({'error': 'Please provide the old configuration'}), 400
+
+    if not pw_ether_id.strip():
+        return jsonify({'error': 'Please provide the PW-Ether ID'}), 400
+
+    # The body is read as it converts, so the deadline and the level's line limit are checked per
+    # line; a chunked or compressed upload was admitted without knowing its size, so its
+    # cost is only a guess and the ticket is left out of the learned rate
+    lines = g.admission_ticket.meter(iter_request_lines(request.stream))
+    if output_format == 'ndjson':
+        # Records still stream per block, but the closing migration record needs every interface
+        # name, so unlike the text output this holds a header per interface until the end
+        blocks = iter_interface_blocks(lines, close_on_bang=True)
+        records = ndjson_lines(iter_conversion_records(blocks, pw_ether_id))
+        chunks = until_deadline(records, lambda e: next(ndjson_lines([{'type': 'error', 'error': str(e)}])))
+        return Response(stream_with_context(chunks), mimetype=NDJSON_MIMETYPE)
+    chunks = until_deadline(iter_converted_configuration(lines, pw_ether_id),
+                            lambda e: f'\n\n! Conversion cancelled: {e}\n')
+    return Response(stream_with_context(chunks), mimetype='text/plain')
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+def get_batch_executor():
+    """Return the shared batch process pool, creating it on first use"""
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+        return _batch_executor
+
+def run_batch_job(old_config, pw_ether_id):
+    """Convert one batch job in a worker process, returning the config, its timing and its validator"""
+    start = time.perf_counter()
+    validator = ConfigValidator(pw_ether_id)
+    new_config = convert_configuration(old_config, pw_ether_id, validator=validator)
+    return new_config, (time.perf_counter() - start) * 1000, validator
+
+def validate_job(job):
+    """Return an error message for an invalid batch job, or None"""
+    if not isinstance(job, dict):
+        return 'Each job must be an object'
+    if not str(job.get('old_config', '')).strip():
+        return 'Please provide the old configuration'
+    if not str(job.get('pw_ether_id', '')).strip():
+        return 'Please provide the PW-Ether ID'
+    return None
+
+@app.route('/convert/live', methods=['POST'])
+def start_live_session():
+    """Convert a configuration block by block and keep it for incremental updates"""
+    try:
+        data = request.get_json()
+        old_config = str(data.get('old_config', ''))
+        pw_ether_id = str(data.get('pw_ether_id', '')).strip()
+
+        if not pw_ether_id:
+            return jsonify({'error': 'Please provide the PW-Ether ID'}), 400
+
+        session = live_sessions.create(old_config, pw_ether_id)
+        g.admission_ticket.converted = True
+        return jsonify(session.snapshot()), 201
+
     except Exception as e:
         return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
 
+@app.route('/convert/live/<session_id>', methods=['POST'])
+def update_live_session(session_id):
+    """Apply block-level deltas and return only the re-converted blocks"""
+    session = live_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired live session'}), 404
+
+    data = request.get_json(silent=True)
+    changes = data.get('changes') if isinstance(data, dict) else None
+    if not isinstance(changes, list) or not all(isinstance(change, dict) for change in changes):
+        return jsonify({'error': 'Please provide a list of changes'}), 400
+
+    try:
+        result = live_sessions.apply(session, changes, data.get('revision'))
+        g.admission_ticket.converted = True
+        return jsonify(result)
+    except InvalidDelta as e:
+        return jsonify({'error': str(e)}), 400
+    except RevisionConflict as e:
+        return jsonify({'error': str(e), 'revision': session.revision}), 409
+    except Exception as e:
+        return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
+
+@app.route('/convert/batch', methods=['POST'])
+@profiled
+def convert_batch():
+    """Convert a list of {old_config, pw_ether_id, label} jobs across the process pool"""
+    data = request.get_json(silent=True) or {}
+    jobs = data.get('jobs') if isinstance(data, dict) else None
+
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({'error': 'Please provide a non-empty list of jobs'}), 400
+
+    if len(jobs) > BATCH_MAX_JOBS:
+        return jsonify({'error': f'A batch may contain at most {BATCH_MAX_JOBS} jobs'}), 400
+
+    start = time.perf_counter()
+    executor = get_batch_executor()
+    profile = g.get('profile')
+    pending = []
+    for job in jobs:
+        error = validate_job(job)
+        if error:
+            pending.append(error)
+        elif profile is None:
+            pending.append(executor.submit(run_batch_job, str(job['old_config']), str(job['pw_ether_id'])))
+        else:
+            # Each job is profiled in its worker process and merged into this request's profile
+            pending.append(executor.submit(profiled_call, profile.mode, run_batch_job,
+                                           str(job['old_config']), str(job['pw_ether_id'])))
+
+    # Collect in input order; each job succeeds or fails on its own
+    ticket = g.admission_ticket
+    results = []
+    # Devices converging on the same PW-Ether are also checked against each other
+    shared_validators = {}
+    for index, (job, item) in enumerate(zip(jobs, pending)):
+        result = {'label': job.get('label') if isinstance(job, dict) else None}
+        if isinstance(item, str):
+            result.update({'success': False, 'error': item})
+        else:
+            try:
+                value = item.result(timeout=ticket.remaining())
+                if profile is not None:
+                    value, profile_data = value
+                    profile.merge(profile_data)
+                new_config, elapsed_ms, validator = value
+                result.update({'success': True, 'new_config': new_config, 'elapsed_ms': round(elapsed_ms, 3),
+                               'diagnostics': validator.diagnostics()})
+                ticket.converted = True
+                if conversion_history is not None:
+                    conversion_history.record(str(job['old_config']), new_config, str(job['pw_ether_id']),
+                                              source='batch', access_level=ticket.level)
+                shared = shared_validators.setdefault(validator.pw_ether_id, ConfigValidator(validator.pw_ether_id))
+                shared.merge(validator, device=result['label'] or f'job {index}')
+            except FutureTimeout:
+                # Jobs that have not started are dropped; running ones finish unobserved
+                item.cancel()
+                g.deadline_exceeded = True
+                result.update({'success': False, 'error': f'Request exceeded its deadline for {ticket.level} access'})
+            except Exception as e:
+                result.update({'success': False, 'error': f'Conversion failed: {str(e)}'})
+        results.append(result)
+
+    return jsonify({
+        'success': all(result['success'] for result in results),
+        'results': results,
+        'diagnostics': [diagnostic for shared in shared_validators.values()
+                        for diagnostic in shared.diagnostics(across_devices=True)],
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 3)
+    })
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a conversion, or a batch under 'jobs', and return its ID immediately"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Please provide a JSON object'}), 400
+
+    batch = 'jobs' in data
+    tasks = data['jobs'] if batch else [data]
+    if not isinstance(tasks, list) or not tasks:
+        return jsonify({'error': 'Please provide a non-empty list of jobs'}), 400
+
+    if len(tasks) > BATCH_MAX_JOBS:
+        return jsonify({'error': f'A batch may contain at most {BATCH_MAX_JOBS} jobs'}), 400
+
+    for index, task in enumerate(tasks):
+        error = validate_job(task)
+        if error:
+            return jsonify({'error': f'Job {index}: {error}' if batch else error}), 400
+
+    # Jobs are not run against a slot, but each level may only have so many outstanding
+    try:
+        level = admission.level_for(request.headers.get(ACCESS_CODE_HEADER))
+    except UnknownAccessCode as e:
+        return jsonify({'error': str(e)}), 403
+    access = admission.access_class(level)
+    cost = sum(estimate_cost(len(str(task['old_config'])), str(task['old_config']).count('\n') + 1)
+               for task in tasks)
+    if cost > access.max_cost * JOB_DEADLINE_FACTOR:
+        return jsonify({'error': f'Job of about {cost} config lines is too large for {level} access'}), 413
+
+    tasks = [{'old_config': str(task['old_config']), 'pw_ether_id': str(task['pw_ether_id']),
+              'label': task.get('label')} for task in tasks]
+    try:
+        job = job_queue.submit(tasks, batch=batch, owner=level,
+                               owner_limit=access.max_concurrent + access.max_queue,
+                               deadline=access.deadline * JOB_DEADLINE_FACTOR)
+    except OwnerLimitReached:
+        return retry_response(f'Too many {level} jobs are outstanding', 429, 5)
+    except QueueFull:
+        response = jsonify({'error': 'The job queue is full, please retry shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+
+    response = jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/jobs/{job.id}',
+        'events_url': f'/jobs/{job.id}/events'
+    })
+    response.status_code = 202
+    response.headers['Location'] = f'/jobs/{job.id}'
+    return response
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream per-interface progress for a job as Server-Sent Events"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    response = Response(iter_job_events(job), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 if __name__ == '__main__':
     # Get port from environment variable (for production) or use 5000 for local development
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Cloud Functions entry point in functions/main.py.
+
+Each run starts a fresh interpreter that imports functions_framework, loads
+the function source the way the framework does on a new instance, and then
+times the first GET (the page), a second GET and the first POST conversion.
+The median and worst of every phase across runs are reported.
+
+functions_framework must be importable by the interpreter given with
+--python (see functions/requirements.txt).
+
+Usage:
+    python -m benchmarks.bench_cold_start --runs 20
+    python -m benchmarks.bench_cold_start --python venv/bin/python --source /tmp/old_main.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOURCE = os.path.join(ROOT, 'functions', 'main.py')
+PHASES = ('framework_import_ms', 'function_load_ms', 'first_get_ms', 'second_get_ms', 'first_post_ms')
+
+# Runs in the child interpreter; prints one JSON object of phase timings
+CHILD = r'''
+import json, sys, time
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+timings = {}
+start = time.perf_counter()
+import functions_framework
+timings['framework_import_ms'] = elapsed_ms(start)
+
+start = time.perf_counter()
+app = functions_framework.create_app(target='app', source=sys.argv[1])
+timings['function_load_ms'] = elapsed_ms(start)
+
+client = app.test_client()
+headers = {'Accept-Encoding': 'gzip'}
+for phase in ('first_get_ms', 'second_get_ms'):
+    start = time.perf_counter()
+    response = client.get('/', headers=headers)
+    response.get_data()
+    timings[phase] = elapsed_ms(start)
+timings['page_bytes'] = len(response.get_data())
+
+config = """interface GigabitEthernet0/0/0/14.3513 l2transport
+ encapsulation dot1q 3513 second-dot1q 101
+ rewrite ingress tag pop 2 symmetric
+!"""
+start = time.perf_counter()
+response = client.post('/', json={'old_config': config, 'pw_ether_id': '10239'})
+response.get_data()
+timings['first_post_ms'] = elapsed_ms(start)
+assert response.status_code == 200, response.status_code
+
+print(json.dumps(timings))
+'''
+
+def run_once(python, source):
+    output = subprocess.run([python, '-c', CHILD, source], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure Cloud Functions cold-start phases.')
+    parser.add_argument('--python', default=sys.executable, help='interpreter with functions_framework installed')
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help='function source file (default functions/main.py)')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    try:
+        runs = [run_once(args.python, args.source) for _ in range(args.runs)]
+    except subprocess.CalledProcessError as e:
+        print(e.stderr, file=sys.stderr)
+        return 1
+
+    report = {'source': args.source, 'runs': args.runs, 'page_bytes': runs[-1]['page_bytes']}
+    print(f"{args.runs} cold starts of {args.source} (first page {report['page_bytes']} bytes)")
+    print(f"{'phase':>20} {'median ms':>10} {'max ms':>10}")
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        report[phase] = {'median': statistics.median(values), 'max': max(values)}
+        print(f"{phase:>20} {report[phase]['median']:>10.2f} {report[phase]['max']:>10.2f}")
+    cold = [run['function_load_ms'] + run['first_get_ms'] for run in runs]
+    report['load_plus_first_get_ms'] = statistics.median(cold)
+    print(f"{'load + first GET':>20} {report['load_plus_first_get_ms']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
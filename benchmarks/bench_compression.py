@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Measure what compressed /convert bodies save on realistic configs.
+
+For each config size and encoding, a request is posted through the Flask
+test client with a compressed body and a matching Accept-Encoding. The
+report shows the bytes on the wire each way and the server time. It also
+shows end-to-end latency over a few slow links: client encode time, plus
+both transfers at the link rate, plus server time.
+
+Usage: python -m benchmarks.bench_compression [interface counts...]
+"""
+
+import gzip
+import json
+import statistics
+import sys
+import time
+
+from app import app
+from benchmarks.synthetic import generate_config_for_interfaces
+from compression import RESPONSE_ENCODERS, compress
+
+DEFAULT_SIZES = [50, 300, 3000]
+# Link rates in bits per second
+LINKS = {'256k': 256_000, '2M': 2_000_000, '20M': 20_000_000}
+REPEAT = 5
+
+def encode(data, encoding):
+    if encoding == 'identity':
+        return data
+    if encoding == 'gzip':
+        # What the browser's CompressionStream('gzip') sends
+        return gzip.compress(data, compresslevel=6)
+    return compress(data, encoding)
+
+def measure(client, payload, encoding):
+    start = time.perf_counter()
+    body = encode(payload, encoding)
+    encode_seconds = time.perf_counter() - start
+
+    headers = {'Content-Type': 'application/json', 'Accept-Encoding': encoding}
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        response = client.post('/convert', data=body, headers=headers)
+        response_body = response.get_data()
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return len(body), len(response_body), encode_seconds, statistics.median(timings)
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    encodings = ['identity'] + [encoding for encoding in ('gzip', 'br', 'zstd') if encoding in RESPONSE_ENCODERS]
+    client = app.test_client()
+    link_headers = ''.join(f" {'@' + name + ' ms':>11}" for name in LINKS)
+    print(f"{'interfaces':>10} {'encoding':>9} {'request B':>10} {'response B':>11} {'server ms':>10}{link_headers}")
+    for size in sizes:
+        config = generate_config_for_interfaces(size, seed=size, max_extra_lines=12)
+        for encoding in encodings:
+            # A fresh PW-Ether ID per run keeps the result cache out of the measurement
+            payload = json.dumps({'old_config': config, 'pw_ether_id': f'{size}{encodings.index(encoding)}'}).encode()
+            request_bytes, response_bytes, encode_seconds, server_seconds = measure(client, payload, encoding)
+            links = ''
+            for rate in LINKS.values():
+                total = encode_seconds + server_seconds + (request_bytes + response_bytes) * 8 / rate
+                links += f" {total * 1000:>11.0f}"
+            print(f"{size:>10} {encoding:>9} {request_bytes:>10} {response_bytes:>11} {server_seconds * 1000:>10.1f}{links}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Time the block-aligned conversion diff against a whole-text difflib diff.
+
+For each interface count, the config is converted with a ConfigDiff and
+rendered as unified text; difflib.unified_diff over the whole old and new
+texts is timed alongside up to --difflib-max interfaces. The per-interface
+column shows whether the cost stays flat as configs grow.
+
+Usage: python -m benchmarks.bench_diff [interface counts...] [--difflib-max 2000]
+"""
+
+import argparse
+import difflib
+import time
+
+from benchmarks.synthetic import generate_config_for_interfaces
+from config_diff import ConfigDiff
+from converter import convert_configuration, generate_migration_section, iter_interface_blocks, join_converted
+
+DEFAULT_SIZES = [1000, 5000, 20_000, 50_000]
+
+def block_diff(config, pw_ether_id):
+    config_diff = ConfigDiff(pw_ether_id)
+    interfaces = []
+    converted = []
+    for interface, numbers in iter_interface_blocks(config.split('\n'), line_numbers=True):
+        interfaces.append(interface)
+        converted.append(config_diff.add(interface, numbers))
+    migration_section = generate_migration_section(interfaces, pw_ether_id)
+    config_diff.add_migration(interfaces, migration_section)
+    join_converted(converted, migration_section)
+    return config_diff.unified()
+
+def whole_text_diff(config, pw_ether_id):
+    new_config = convert_configuration(config, pw_ether_id)
+    return '\n'.join(difflib.unified_diff(config.split('\n'), new_config.split('\n'), lineterm=''))
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('sizes', type=int, nargs='*', default=DEFAULT_SIZES)
+    parser.add_argument('--difflib-max', type=int, default=2000, help='largest config also diffed with difflib')
+    args = parser.parse_args(argv)
+
+    print(f"{'interfaces':>10} {'block s':>8} {'us/intf':>8} {'difflib s':>10} {'us/intf':>8}")
+    for size in args.sizes:
+        config = generate_config_for_interfaces(size, seed=size, max_extra_lines=6)
+        seconds = timed(block_diff, config, '10239')
+        row = f"{size:>10} {seconds:>8.3f} {seconds / size * 1e6:>8.1f}"
+        if size <= args.difflib_max:
+            seconds = timed(whole_text_diff, config, '10239')
+            row += f" {seconds:>10.3f} {seconds / size * 1e6:>8.1f}"
+        print(row)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark server-side final configuration rendering in customers per second.
+
+Each customer is a CSR migration with a few subinterfaces, as pasted in the UI.
+
+Usage: python -m benchmarks.bench_final [customers] [lines per customer]
+"""
+
+import sys
+import time
+
+from benchmarks.synthetic import generate_config
+from final_config import HUAWEI_MODELS, PWHE_BACKENDS, generate_final_config
+
+EXISTING_CSR_CONFIG = """interface GigabitEthernet0/2/6
+ description CX:SANASA_DEVELOPMENT_BANK_LIMITED
+ mtu 1600
+ mpls l2vc 10.24.3.24 102390 raw
+ mpls l2vc 10.24.3.27 102390 raw secondary"""
+
+def main(argv):
+    customers = int(argv[0]) if argv else 2000
+    lines = int(argv[1]) if len(argv) > 1 else 40
+    options = list(PWHE_BACKENDS)
+    models = list(HUAWEI_MODELS)
+    jobs = [
+        dict(
+            old_config=generate_config(lines, seed=seed),
+            pw_ether_id=str(10000 + seed),
+            csr_ip=f"10.24.{seed % 256}.{seed // 256 % 256}",
+            pwhe_option=options[seed % len(options)],
+            huawei_model=models[seed % len(models)],
+            existing_csr_config=EXISTING_CSR_CONFIG,
+            cx_name=f"CUSTOMER_{seed}",
+            cx_location='COLOMBO_01',
+        )
+        for seed in range(customers)
+    ]
+
+    start = time.perf_counter()
+    size = 0
+    for job in jobs:
+        size += len(generate_final_config(**job))
+    elapsed = time.perf_counter() - start
+
+    print(f"Rendered {customers} customers (~{lines} config lines each) in {elapsed:.3f}s: "
+          f"{customers / elapsed:.0f} customers/s, {size / elapsed / 1e6:.1f} MB/s of output")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measure conversion history writes and lookups at scale.
+
+Synthetic conversions are recorded into a fresh database until it holds
+the requested number of interface records, then lookups by circuit ID,
+customer name, old interface name and PW-Ether ID are timed. Each query
+term is taken from a record actually stored, so every lookup has a hit.
+
+Usage: python -m benchmarks.bench_history [--records 300000] [--interfaces-per-conversion 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_config_for_interfaces
+from history import ConversionHistory, interface_rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--records', type=int, default=300_000, help='interface records to store')
+    parser.add_argument('--interfaces-per-conversion', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=200, help='timed lookups per kind')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    conversions = max(1, args.records // args.interfaces_per_conversion)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.sqlite3')
+        history = ConversionHistory(path, batch_size=64, max_pending=conversions + 1)
+        samples = []
+        start = time.perf_counter()
+        for index in range(conversions):
+            # The generator reuses customer names across configs; real devices do not
+            config = generate_config_for_interfaces(args.interfaces_per_conversion, seed=args.seed + index)
+            config = config.replace('::CUSTOMER_', f'::CUSTOMER_{index}_')
+            pw_ether_id = str(10000 + index)
+            history.record(config, '', pw_ether_id)
+            if rng.random() < 0.05:
+                samples.extend((pw_ether_id, row) for row in interface_rows(config, pw_ether_id))
+        history.flush(timeout=3600)
+        elapsed = time.perf_counter() - start
+        stored = conversions * args.interfaces_per_conversion
+        size = os.path.getsize(path) + os.path.getsize(path + '-wal')
+        print(f"Stored {conversions} conversions, {stored} interfaces in {elapsed:.1f}s "
+              f"({stored / elapsed:.0f} interfaces/s, {history.stats()['batches']} batches, {size / 2**20:.0f} MiB)")
+        print()
+
+        kinds = {
+            'circuit id': lambda pw_ether_id, row: row[3].split(':')[0],
+            'customer': lambda pw_ether_id, row: row[3].rsplit(':', 2)[1],
+            'common': lambda pw_ether_id, row: 'COLOMBO',
+            'old name': lambda pw_ether_id, row: row[0].split()[0],
+            'pw-ether': lambda pw_ether_id, row: row[1],
+        }
+        print(f"{'lookup':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'hits':>6}")
+        for kind, term in kinds.items():
+            timings = []
+            hits = 0
+            for pw_ether_id, row in rng.sample(samples, min(args.queries, len(samples))):
+                query = term(pw_ether_id, row)
+                started = time.perf_counter()
+                hits += bool(history.search(query, limit=50))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            print(f"{kind:>10} {statistics.median(timings):>8.2f} {timings[int(len(timings) * 0.95)]:>8.2f} "
+                  f"{timings[-1]:>8.2f} {hits:>6}")
+        history.pool.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass InterfaceBlock pipeline against the original engine.
+
+Usage: python -m benchmarks.bench_interface_ir [line counts...]
+"""
+
+import sys
+import time
+
+import converter
+from benchmarks import legacy_engine
+from benchmarks.synthetic import generate_config
+
+PW_ETHER_ID = '10239'
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+def run_pipeline(module, config_text):
+    """Run parse, conversion, migration and bridge generation; return the outputs"""
+    interfaces = module.parse_interface_config(config_text)
+    converted = [module.convert_interface_config(interface, PW_ETHER_ID) for interface in interfaces]
+    migration = module.generate_migration_section(interfaces, PW_ETHER_ID)
+    bridge = module.generate_bridge_config(interfaces, PW_ETHER_ID)
+    return converted, migration, bridge
+
+def best_of(module, config_text, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run_pipeline(module, config_text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    print(f"{'lines':>10} {'interfaces':>11} {'legacy s':>10} {'single-pass s':>14} {'speedup':>8}")
+    for size in sizes:
+        config_text = generate_config(size)
+        repeat = 3 if size <= 100_000 else 1
+        legacy_time, legacy_result = best_of(legacy_engine, config_text, repeat)
+        new_time, new_result = best_of(converter, config_text, repeat)
+        if legacy_result != new_result:
+            print(f"Output mismatch at {size} lines", file=sys.stderr)
+            return 1
+        print(f"{size:>10} {len(new_result[0]):>11} {legacy_time:>10.3f} {new_time:>14.3f} {legacy_time / new_time:>7.2f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
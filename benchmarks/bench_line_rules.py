@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark convert_interface_config, with its inlined built-in conversions
+and line-rule table fast path, against the if/elif chain it replaced.
+
+Both run over the same parsed InterfaceBlocks, so only the per-line
+transformation is timed, and their outputs are compared before reporting.
+
+Usage: python -m benchmarks.bench_line_rules [interface counts...]
+"""
+
+from itertools import islice
+import sys
+import time
+
+import converter
+from benchmarks.synthetic import generate_config_for_interfaces
+
+PW_ETHER_ID = '10239'
+DEFAULT_SIZES = [10_000, 100_000, 500_000]
+
+def convert_with_if_chain(interface, pw_ether_id):
+    """convert_interface_config as it was before the rule table"""
+    new_lines = []
+    ctag = interface.ctag
+    has_shutdown = False
+
+    if interface.parent is not None:
+        new_lines.append(f"interface {interface.pw_ether_name(pw_ether_id)}{interface.l2transport}")
+    else:
+        new_lines.append(interface.name)
+
+    for line in islice(interface.lines, 1, None):
+        if 'second-dot1q' in line and 'encapsulation dot1q' in line:
+            match = converter.CTAG_RE.search(line)
+            if match:
+                ctag = match.group(1)
+                new_lines.append(f"encapsulation dot1q {ctag}")
+            else:
+                new_lines.append(line)
+        elif 'rewrite ingress tag pop 2 symmetric' in line:
+            if ctag in ('502', '504'):
+                continue
+            new_lines.append(line.replace('pop 2', 'pop 1'))
+        else:
+            if line == 'shutdown':
+                has_shutdown = True
+            new_lines.append(line)
+
+    if not has_shutdown:
+        try:
+            new_lines.insert(new_lines.index('!'), 'shutdown')
+        except ValueError:
+            new_lines.append('shutdown')
+
+    if new_lines and new_lines[-1] != '!':
+        new_lines.append('!')
+
+    return '\n'.join(new_lines)
+
+def best_of(convert, interfaces, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [convert(interface, PW_ETHER_ID) for interface in interfaces]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    print(f"{'interfaces':>10} {'lines':>10} {'if/elif s':>10} {'dispatch s':>11} {'speedup':>8}")
+    for size in sizes:
+        interfaces = converter.parse_interface_config(generate_config_for_interfaces(size, max_extra_lines=12))
+        lines = sum(len(interface.lines) for interface in interfaces)
+        repeat = 3 if size <= 100_000 else 1
+        chain_time, chain_result = best_of(convert_with_if_chain, interfaces, repeat)
+        table_time, table_result = best_of(converter.convert_interface_config, interfaces, repeat)
+        if chain_result != table_result:
+            print(f"Output mismatch at {size} interfaces", file=sys.stderr)
+            return 1
+        print(f"{size:>10} {lines:>10} {chain_time:>10.3f} {table_time:>11.3f} {chain_time / table_time:>7.2f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
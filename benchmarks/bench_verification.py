@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark verification command generation as subnet prefixes grow.
+
+Usage: python -m benchmarks.bench_verification
+"""
+
+import sys
+import time
+import tracemalloc
+
+from converter import parse_interface_config
+from verification import generate_verification_commands
+
+def config_for_prefix(prefix, interfaces=50):
+    mask = (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+    mask_text = '.'.join(str((mask >> shift) & 255) for shift in (24, 16, 8, 0))
+    blocks = []
+    for index in range(interfaces):
+        blocks.append(f"interface GigabitEthernet0/0/0/1.{1000 + index}\n"
+                      f" vrf ENT_INTERNET\n"
+                      f" ipv4 address 10.{index}.0.1 {mask_text}\n"
+                      f" encapsulation dot1q 1 second-dot1q {index + 1}\n!")
+    return '\n'.join(blocks)
+
+def main(argv):
+    print(f"{'prefix':>6} {'seconds':>9} {'peak KiB':>9} {'output KiB':>11}")
+    for prefix in (30, 24, 22, 20, 16, 8):
+        interfaces = parse_interface_config(config_for_prefix(prefix))
+        tracemalloc.start()
+        start = time.perf_counter()
+        commands = generate_verification_commands(interfaces, '10239')
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"/{prefix:<5} {elapsed:>9.4f} {peak / 1024:>9.0f} {len(commands) / 1024:>11.0f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
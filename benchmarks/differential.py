@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Differential and throughput harness for the conversion engines.
+
+The same corpus, a seeded synthetic config plus a set of hand-written edge
+cases, is converted by every engine. Each engine's output is split back
+into interface blocks and compared block by block with the reference
+engine's output, so a mismatch is reported against the input interface
+that produced it. Mismatches are grouped by the first line that differs.
+Each engine is then timed on the corpus.
+
+Engines:
+    legacy     benchmarks/legacy_engine.py, the original app engine (reference)
+    app        converter.convert_configuration
+    streaming  converter.iter_converted_lines, joined
+    functions  functions/core.py, the Cloud Functions engine
+
+Any other engine can be added as NAME=MODULE:FUNCTION or NAME=path/to/file.py:FUNCTION,
+where FUNCTION takes (config_text, pw_ether_id) and returns the converted text.
+
+Usage:
+    python -m benchmarks.differential                         # all engines, 20k interfaces
+    python -m benchmarks.differential --interfaces 100000 --runs 5
+    python -m benchmarks.differential --engine fast=myengine:convert --check fast
+"""
+
+import argparse
+import importlib
+import importlib.util
+import os
+import re
+import statistics
+import sys
+import time
+
+import converter
+from benchmarks import legacy_engine
+from benchmarks.synthetic import generate_config_for_interfaces
+
+PW_ETHER_ID = '10239'
+REFERENCE = 'legacy'
+# Engines that must match the reference exactly under --check
+STRICT_ENGINES = ('app', 'streaming')
+NUMBER_RE = re.compile(r'(?<![A-Za-z\d])\d+')
+FUNCTIONS_CORE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'functions', 'core.py')
+
+# Blocks the synthetic generator never produces, each aimed at a known difference between engines
+EDGE_CASES = """interface GigabitEthernet0/0/0/14.513 l2transport
+ description three-digit subinterface
+ encapsulation dot1q 3513 second-dot1q 101
+ rewrite ingress tag pop 2 symmetric
+!
+interface GigabitEthernet0/0/0/14.502 l2transport
+ encapsulation dot1q 3513 second-dot1q 502
+ rewrite ingress tag pop 2 symmetric
+!
+interface GigabitEthernet0/0/0/14.1504 l2transport
+ encapsulation dot1q 3514 second-dot1q 504
+ rewrite ingress tag pop 2 symmetric
+!
+interface TenGigE0/1/0/3.720
+ description no-shutdown-here
+ vrf SDB_DATA
+ ipv4 address 10.1.2.1 255.255.255.252
+ encapsulation dot1q 3720 second-dot1q 720
+!
+interface GigabitEthernet0/0/0/15.3613
+ encapsulation dot1q 3613 second-dot1q 613
+ shutdown
+!
+interface GigabitEthernet0/0/0/16.200
+ encapsulation dot1q 200
+!
+interface Bundle-Ether10.100
+ encapsulation dot1q 100
+!
+interface Loopback0
+ ipv4 address 10.0.0.1 255.255.255.255
+!
+interface GigabitEthernet0/0/0/17.3621
+ encapsulation dot1q 3621 second-dot1q 621"""
+
+def load_engine(spec):
+    """Resolve MODULE:FUNCTION or path/to/file.py:FUNCTION to a callable"""
+    target, _, function = spec.rpartition(':')
+    if not target or not function:
+        raise ValueError(f'Engine {spec!r} should be MODULE:FUNCTION or FILE.py:FUNCTION')
+    if target.endswith('.py'):
+        name = os.path.splitext(os.path.basename(target))[0]
+        module_spec = importlib.util.spec_from_file_location(f'engine_{name}', target)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(target)
+    return getattr(module, function)
+
+def default_engines():
+    return {
+        'legacy': legacy_engine.convert_configuration,
+        'app': converter.convert_configuration,
+        'streaming': lambda config, pw_ether_id: '\n'.join(converter.iter_converted_lines(config, pw_ether_id)),
+        'functions': load_engine(f'{FUNCTIONS_CORE}:convert_configuration'),
+    }
+
+def build_corpus(interfaces, seed, max_extra_lines):
+    return generate_config_for_interfaces(interfaces, seed, max_extra_lines) + '\n' + EDGE_CASES
+
+def split_output(text):
+    """Split converted text into (interface blocks, migration section lines)
+
+    A block starts at each ``interface`` line and runs to the next blank
+    line or block; the migration section starts at its first ``###`` line.
+    """
+    blocks = []
+    current = None
+    lines = text.split('\n')
+    for index, line in enumerate(lines):
+        if line.startswith('### '):
+            return blocks, lines[index:]
+        if line.startswith('interface '):
+            current = [line]
+            blocks.append(current)
+        elif not line:
+            current = None
+        elif current is not None:
+            current.append(line)
+    return blocks, []
+
+def first_difference(expected, actual):
+    for index in range(max(len(expected), len(actual))):
+        left = expected[index] if index < len(expected) else '<end of block>'
+        right = actual[index] if index < len(actual) else '<end of block>'
+        if left != right:
+            return index, left, right
+    return None
+
+def difference_kind(expected_line, actual_line):
+    """Label used to group mismatches: both lines with their numbers masked"""
+    return f"{NUMBER_RE.sub('N', expected_line)} -> {NUMBER_RE.sub('N', actual_line)}"
+
+def compare(names, reference_text, candidate_text):
+    """Compare two outputs per interface; ``names`` are the input interface lines, in order"""
+    expected_blocks, expected_migration = split_output(reference_text)
+    actual_blocks, actual_migration = split_output(candidate_text)
+    mismatches = []
+    for index, (expected, actual) in enumerate(zip(expected_blocks, actual_blocks)):
+        difference = first_difference(expected, actual)
+        if difference is not None:
+            line, expected_line, actual_line = difference
+            mismatches.append({
+                'index': index,
+                'interface': names[index] if index < len(names) else None,
+                'line': line,
+                'expected': expected_line,
+                'actual': actual_line,
+                'kind': difference_kind(expected_line, actual_line),
+            })
+    return {
+        'blocks': (len(expected_blocks), len(actual_blocks)),
+        'mismatches': mismatches,
+        'migration_matches': expected_migration == actual_migration,
+    }
+
+def time_engine(engine, config_text, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine(config_text, PW_ETHER_ID)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def print_differences(name, result, examples):
+    expected_count, actual_count = result['blocks']
+    mismatches = result['mismatches']
+    status = 'identical' if not mismatches and expected_count == actual_count and result['migration_matches'] \
+        else f"{len(mismatches)} interface mismatches"
+    print(f"{name}: {status}")
+    if expected_count != actual_count:
+        print(f"  {actual_count} interface blocks, reference has {expected_count}")
+    if not result['migration_matches']:
+        print('  migration section differs')
+    groups = {}
+    for mismatch in mismatches:
+        groups.setdefault(mismatch['kind'], []).append(mismatch)
+    for kind, group in sorted(groups.items(), key=lambda item: -len(item[1])):
+        print(f"  {len(group):>7} x {kind}")
+        for mismatch in group[:examples]:
+            print(f"          {mismatch['interface']} (line {mismatch['line']})")
+            print(f"            - {mismatch['expected']}")
+            print(f"            + {mismatch['actual']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--interfaces', type=int, default=20_000, help='synthetic interfaces in the corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-extra-lines', type=int, default=12)
+    parser.add_argument('--runs', type=int, default=3, help='timed runs per engine; the median is reported')
+    parser.add_argument('--engine', action='append', default=[], metavar='NAME=MODULE:FUNCTION',
+                        help='add an engine to compare')
+    parser.add_argument('--only', nargs='+', help='compare just these engines with the reference')
+    parser.add_argument('--examples', type=int, default=2, help='example interfaces shown per mismatch kind')
+    parser.add_argument('--check', nargs='*', metavar='ENGINE',
+                        help=f'exit 1 if these engines (default: {", ".join(STRICT_ENGINES)}) differ from the reference')
+    args = parser.parse_args(argv)
+
+    engines = default_engines()
+    for spec in args.engine:
+        name, _, target = spec.partition('=')
+        engines[name] = load_engine(target)
+    if args.only:
+        engines = {name: engine for name, engine in engines.items() if name == REFERENCE or name in args.only}
+
+    corpus = build_corpus(args.interfaces, args.seed, args.max_extra_lines)
+    names = [interface.name for interface in converter.parse_interface_config(corpus)]
+    line_count = corpus.count('\n') + 1
+    print(f"Corpus: {len(names)} interfaces, {line_count} lines, {len(corpus) / 2**20:.1f} MiB; reference: {REFERENCE}")
+    print()
+
+    reference_text = engines[REFERENCE](corpus, PW_ETHER_ID)
+    results = {}
+    for name, engine in engines.items():
+        if name == REFERENCE:
+            continue
+        results[name] = compare(names, reference_text, engine(corpus, PW_ETHER_ID))
+        print_differences(name, results[name], args.examples)
+    print()
+
+    print(f"{'engine':>10} {'seconds':>9} {'lines/s':>11} {'MiB/s':>7} {'vs ' + REFERENCE:>10}")
+    reference_seconds = time_engine(engines[REFERENCE], corpus, args.runs)
+    for name, engine in engines.items():
+        seconds = reference_seconds if name == REFERENCE else time_engine(engine, corpus, args.runs)
+        print(f"{name:>10} {seconds:>9.4f} {line_count / seconds:>11.0f} {len(corpus) / 2**20 / seconds:>7.1f} "
+              f"{reference_seconds / seconds:>9.2f}x")
+
+    if args.check is not None:
+        strict = args.check or [name for name in STRICT_ENGINES if name in results]
+        drifted = [name for name in strict
+                   if results[name]['mismatches'] or not results[name]['migration_matches']
+                   or len(set(results[name]['blocks'])) > 1]
+        if drifted:
+            print(f"Output differs from {REFERENCE}: {', '.join(drifted)}", file=sys.stderr)
+            return 1
+        print(f"{', '.join(strict)} match {REFERENCE}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
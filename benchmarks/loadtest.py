@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Local HTTP load test for the gunicorn deployment.
+
+Starts ``gunicorn app:app`` on a free local port with the requested worker
+class and count, replays a mix of small and huge configs against /convert
+at a target request rate (open loop: requests are sent on schedule whether
+or not earlier ones have finished), and reports latency percentiles, error
+rate and the peak RSS of every gunicorn worker.
+
+Usage:
+    python -m benchmarks.loadtest --workers 4 --worker-class sync --rate 20 --duration 30
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000   # target a running server
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import generate_config_for_interfaces
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_gunicorn(workers, worker_class, port, timeout):
+    command = [sys.executable, '-m', 'gunicorn', 'app:app',
+               '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers),
+               '--worker-class', worker_class,
+               '--timeout', str(timeout),
+               '--log-level', 'warning']
+    return subprocess.Popen(command, cwd=ROOT)
+
+def wait_until_healthy(base_url, process, deadline=30):
+    end = time.monotonic() + deadline
+    while time.monotonic() < end:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            with urllib.request.urlopen(f'{base_url}/health', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not become healthy in time')
+
+def child_pids(pid):
+    """Direct children of a process, read from /proc"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+def rss_kib(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+class RssSampler(threading.Thread):
+    """Track the peak RSS of each gunicorn worker while the test runs"""
+
+    def __init__(self, master_pid, interval=0.25):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peaks = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            for pid in child_pids(self.master_pid):
+                rss = rss_kib(pid)
+                if rss is not None and rss > self.peaks.get(pid, 0):
+                    self.peaks[pid] = rss
+            self.stopped.wait(self.interval)
+
+def build_payloads(small_interfaces, huge_interfaces, variants, seed):
+    small = [generate_config_for_interfaces(small_interfaces, seed + i, 4) for i in range(variants)]
+    huge = [generate_config_for_interfaces(huge_interfaces, seed + 1000 + i, 12) for i in range(variants)]
+    return small, huge
+
+def send(url, body, timeout):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = None
+    return time.perf_counter() - start, status
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_load(base_url, small, huge, huge_ratio, rate, duration, concurrency, timeout, seed):
+    rng = random.Random(seed)
+    total = int(rate * duration)
+    results = [None] * total
+    url = f'{base_url}/convert'
+
+    def task(index, body, kind):
+        results[index] = (kind,) + send(url, body, timeout)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index in range(total):
+            kind = 'huge' if rng.random() < huge_ratio else 'small'
+            config = rng.choice(huge if kind == 'huge' else small)
+            # A fresh PW-Ether ID per request keeps the result cache out of the measurement
+            body = json.dumps({'old_config': config, 'pw_ether_id': str(10000 + index)}).encode()
+            delay = start + index / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(task, index, body, kind)
+    elapsed = time.monotonic() - start
+    return [result for result in results if result is not None], elapsed
+
+def summarise(results, elapsed):
+    summary = {'requests': len(results), 'elapsed_s': round(elapsed, 3),
+               'achieved_rate': round(len(results) / elapsed, 2) if elapsed else None}
+    for kind in ('all', 'small', 'huge'):
+        selected = [r for r in results if kind == 'all' or r[0] == kind]
+        latencies = sorted(r[1] for r in selected if r[2] == 200)
+        errors = sum(1 for r in selected if r[2] != 200)
+        summary[kind] = {
+            'requests': len(selected),
+            'error_rate': round(errors / len(selected), 4) if selected else None,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        }
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test /convert under gunicorn.')
+    parser.add_argument('--url', help='test an already running server instead of starting gunicorn')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class, e.g. sync, gthread, gevent')
+    parser.add_argument('--rate', type=float, default=10, help='target requests per second')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load')
+    parser.add_argument('--concurrency', type=int, default=64, help='client threads')
+    parser.add_argument('--small-interfaces', type=int, default=20)
+    parser.add_argument('--huge-interfaces', type=int, default=20000)
+    parser.add_argument('--huge-ratio', type=float, default=0.05, help='fraction of requests that are huge')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    small, huge = build_payloads(args.small_interfaces, args.huge_interfaces, 4, args.seed)
+
+    process = None
+    sampler = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        process = start_gunicorn(args.workers, args.worker_class, port, int(args.timeout))
+
+    try:
+        wait_until_healthy(base_url, process)
+        if process is not None:
+            sampler = RssSampler(process.pid)
+            sampler.start()
+        results, elapsed = run_load(base_url, small, huge, args.huge_ratio, args.rate, args.duration,
+                                    args.concurrency, args.timeout, args.seed)
+    finally:
+        if sampler is not None:
+            sampler.stopped.set()
+            sampler.join()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = summarise(results, elapsed)
+    report['config'] = {key: value for key, value in vars(args).items() if key != 'json'}
+    if sampler is not None:
+        report['worker_peak_rss_mib'] = {str(pid): round(kib / 1024, 1) for pid, kib in sorted(sampler.peaks.items())}
+
+    print(f"{report['requests']} requests in {report['elapsed_s']}s ({report['achieved_rate']} req/s), "
+          f"{args.workers} x {args.worker_class} workers")
+    print(f"{'mix':>6} {'requests':>9} {'errors':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind in ('all', 'small', 'huge'):
+        entry = report[kind]
+        error_rate = f"{entry['error_rate']:.1%}" if entry['error_rate'] is not None else '-'
+        print(f"{kind:>6} {entry['requests']:>9} {error_rate:>8} {entry['p50_ms'] or '-':>8} "
+              f"{entry['p95_ms'] or '-':>8} {entry['p99_ms'] or '-':>8}")
+    for pid, rss in report.get('worker_peak_rss_mib', {}).items():
+        print(f"worker {pid}: peak RSS {rss} MiB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Per-stage benchmark suite for the conversion engine.
+
+Generates seeded synthetic configs of 10 to 1M interfaces with varying block
+lengths and reports, for parse_interface_config, convert_interface_config and
+generate_migration_section, the throughput and the peak traced memory of
+each stage.
+
+Absolute timings depend on the machine, so regressions are judged on each
+stage's throughput relative to the reference engine in
+benchmarks/legacy_engine.py, measured in the same run on the same input.
+A single run of that ratio still swings by a third on a busy machine, so
+--check and --save-baseline take the median of several runs, and only
+sizes large enough to time reliably are gated.
+
+Usage:
+    python -m benchmarks.suite                     # 10 .. 100k interfaces
+    python -m benchmarks.suite --sizes 10 1000000  # pick sizes
+    python -m benchmarks.suite --save-baseline     # record benchmarks/baseline.json
+    python -m benchmarks.suite --check             # exit 1 on a regression
+    python -m benchmarks.suite --sizes 100000 --check --runs 7
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import converter
+from benchmarks import legacy_engine
+from benchmarks.synthetic import generate_config_for_interfaces
+
+PW_ETHER_ID = '10239'
+DEFAULT_SIZES = [10, 1_000, 10_000, 100_000]
+# The reference engine is only timed up to this size; above it, runs get long
+LEGACY_MAX_SIZE = 100_000
+# Sizes below this are too noisy to gate on
+CHECK_MIN_SIZE = 100_000
+# Runs whose median is compared by --check and recorded by --save-baseline
+CHECK_RUNS = 5
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+STAGES = ('parse', 'convert', 'migration')
+
+def run_stages(engine, config_text, trace_memory=False):
+    """Run each stage once; return {stage: (seconds, peak bytes or None)}"""
+    results = {}
+
+    def measure(stage, func):
+        gc.collect()
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[stage] = (elapsed, peak)
+        return value
+
+    interfaces = measure('parse', lambda: engine.parse_interface_config(config_text))
+    measure('convert', lambda: [engine.convert_interface_config(interface, PW_ETHER_ID) for interface in interfaces])
+    measure('migration', lambda: engine.generate_migration_section(interfaces, PW_ETHER_ID))
+    return results, len(interfaces)
+
+def best_times(engine, config_text, repeat):
+    best = {}
+    for _ in range(repeat):
+        results, _ = run_stages(engine, config_text)
+        for stage, (elapsed, _) in results.items():
+            best[stage] = min(best.get(stage, elapsed), elapsed)
+    return best
+
+def benchmark_size(size, seed, max_extra_lines, runs=1):
+    """Stage timings for one size; with several ``runs``, each figure is the median over the runs"""
+    config_text = generate_config_for_interfaces(size, seed, max_extra_lines)
+    line_count = config_text.count('\n') + 1
+    repeat = 5 if size <= 10_000 else 1
+    timed_legacy = size <= LEGACY_MAX_SIZE
+
+    # Each run times both engines back to back, so a slow patch on the machine hits both
+    run_times = []
+    run_relative = []
+    for _ in range(runs):
+        times = best_times(converter, config_text, repeat)
+        run_times.append(times)
+        if timed_legacy:
+            legacy = best_times(legacy_engine, config_text, repeat)
+            run_relative.append({stage: legacy[stage] / times[stage] for stage in STAGES if times[stage]})
+    memory, interface_count = run_stages(converter, config_text, trace_memory=True)
+
+    stages = {}
+    for stage in STAGES:
+        elapsed = statistics.median(times[stage] for times in run_times)
+        entry = {
+            'seconds': elapsed,
+            'interfaces_per_s': interface_count / elapsed if elapsed else None,
+            'lines_per_s': line_count / elapsed if elapsed else None,
+            'peak_bytes': memory[stage][1],
+        }
+        relative = [ratios[stage] for ratios in run_relative if stage in ratios]
+        if relative:
+            entry['relative_to_legacy'] = statistics.median(relative)
+        stages[stage] = entry
+
+    return {'interfaces': interface_count, 'lines': line_count, 'bytes': len(config_text), 'runs': runs,
+            'stages': stages}
+
+def print_report(report):
+    print(f"{'interfaces':>10} {'stage':>10} {'seconds':>9} {'intf/s':>11} {'lines/s':>11} {'peak MiB':>9} {'vs legacy':>9}")
+    for size, result in report.items():
+        for stage, entry in result['stages'].items():
+            relative = entry.get('relative_to_legacy')
+            relative_text = f"{relative:.2f}x" if relative is not None else '-'
+            print(f"{size:>10} {stage:>10} {entry['seconds']:>9.4f} {entry['interfaces_per_s'] or 0:>11.0f} "
+                  f"{entry['lines_per_s'] or 0:>11.0f} {entry['peak_bytes'] / 2**20:>9.2f} {relative_text:>9}")
+
+def find_regressions(report, baseline, threshold):
+    """List stages whose legacy-relative throughput dropped by more than ``threshold``"""
+    regressions = []
+    for size, result in report.items():
+        if int(size) < CHECK_MIN_SIZE:
+            continue
+        baseline_stages = baseline.get(str(size), {}).get('stages', {})
+        for stage, entry in result['stages'].items():
+            current = entry.get('relative_to_legacy')
+            expected = baseline_stages.get(stage, {}).get('relative_to_legacy')
+            if current is None or expected is None:
+                continue
+            if current < expected * (1 - threshold):
+                regressions.append(f"{size} interfaces, {stage}: {current:.2f}x vs baseline {expected:.2f}x")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='interface counts to benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-extra-lines', type=int, default=12, help='vary block length by up to this many lines')
+    parser.add_argument('--json', help='also write the report to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='record this run as the baseline')
+    parser.add_argument('--check', action='store_true', help='exit 1 if a stage regressed beyond --threshold')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative slowdown (default 0.25)')
+    parser.add_argument('--runs', type=int,
+                        help=f'runs to take the median of (default {CHECK_RUNS} with --check or --save-baseline, else 1)')
+    args = parser.parse_args(argv)
+    runs = args.runs or (CHECK_RUNS if args.check or args.save_baseline else 1)
+
+    report = {size: benchmark_size(size, args.seed, args.max_extra_lines, runs) for size in args.sizes}
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print('Performance regressions:', file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+        print(f"No stage regressed by more than {args.threshold:.0%}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
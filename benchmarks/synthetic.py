@@ -0,0 +1,88 @@
+"""Seeded generator for synthetic IOS-XR subinterface configurations"""
+
+import random
+
+POLICIES = ['512K', '2M', '10M', '20M', '100M']
+VRFS = ['SDB_DATA', 'ENT_INTERNET', 'DIALOG_FIXED_VOICE', 'BS_MANAGE', 'METRO_SWITCH_MGMT']
+
+# Optional lines that pad blocks out to realistic, varying lengths
+EXTRA_L3_LINES = [
+    ' ipv4 access-group TRC_VOIP_BLOCK ingress',
+    ' ipv4 access-group TRC_VOIP_BLOCK egress',
+    ' ipv4 verify unicast source reachable-via rx',
+    ' ipv6 address 2402:4000:{a:x}:{b:x}::1/64',
+    ' ipv6 enable',
+    ' bandwidth {bw}',
+    ' load-interval 30',
+    ' arp timeout 1500',
+]
+EXTRA_L2_LINES = [
+    ' l2protocol cpsv tunnel',
+    ' ethernet cfm',
+    '  mep domain CX_MD service CX_MA mep-id 1',
+    ' load-interval 30',
+]
+
+def generate_interface(rng, port, outer, ctag, l2transport, extra_lines=0):
+    """Return the lines of one subinterface block
+
+    ``extra_lines`` optional commands are appended before the closing ``!``.
+    """
+    name = f"interface GigabitEthernet0/0/0/{port}.{outer}{ctag:03d}"
+    if l2transport:
+        name += ' l2transport'
+    policy = rng.choice(POLICIES)
+    lines = [
+        name,
+        f" description {rng.randrange(994600000, 994700000)}:FIB:10.24.{rng.randrange(256)}.{rng.randrange(256)}:Gi0/2/6::CUSTOMER_{ctag}:COLOMBO_01",
+        ' mtu 1600',
+        f" service-policy input {policy}_POLICE_DATA_IN",
+        f" service-policy output {policy}_SHAPE_PARENT",
+    ]
+    if l2transport:
+        lines.append(f" encapsulation dot1q {outer} second-dot1q {ctag}")
+        lines.append(' rewrite ingress tag pop 2 symmetric')
+        pool = EXTRA_L2_LINES
+    else:
+        lines.append(f" vrf {rng.choice(VRFS)}")
+        lines.append(f" ipv4 address 10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(0, 256, 4) + 1} 255.255.255.252")
+        lines.append(f" encapsulation dot1q {outer} second-dot1q {ctag}")
+        pool = EXTRA_L3_LINES
+    for index in range(extra_lines):
+        lines.append(pool[index % len(pool)].format(a=rng.randrange(65536), b=rng.randrange(65536), bw=rng.randrange(1000, 100000)))
+    lines.append('!')
+    return lines
+
+def generate_interfaces(count=None, seed=0, max_extra_lines=0):
+    """Yield ``count`` interface blocks (forever if None) as lists of lines
+
+    Roughly 40% are l2transport, 5% carry the 502/504 special ctags, and each
+    block gets 0 to ``max_extra_lines`` optional commands.
+    """
+    rng = random.Random(seed)
+    index = 0
+    while count is None or index < count:
+        port = 10 + index // 4000
+        outer = 1000 + (index // 1000) % 3000
+        # Sprinkle in the 502/504 special ctags used by the bridge generator
+        ctag = rng.choice((502, 504)) if rng.random() < 0.05 else 1 + index % 999
+        extra = rng.randint(0, max_extra_lines) if max_extra_lines else 0
+        yield generate_interface(rng, port, outer, ctag, rng.random() < 0.4, extra)
+        index += 1
+
+def generate_config_lines(line_count, seed=0, max_extra_lines=0):
+    """Yield roughly ``line_count`` config lines made of mixed l2transport/L3 subinterfaces"""
+    produced = 0
+    for block in generate_interfaces(seed=seed, max_extra_lines=max_extra_lines):
+        if produced >= line_count:
+            break
+        produced += len(block)
+        yield from block
+
+def generate_config(line_count, seed=0, max_extra_lines=0):
+    """Return a synthetic configuration of roughly ``line_count`` lines"""
+    return '\n'.join(generate_config_lines(line_count, seed, max_extra_lines))
+
+def generate_config_for_interfaces(count, seed=0, max_extra_lines=0):
+    """Return a synthetic configuration with exactly ``count`` interfaces"""
+    return '\n'.join(line for block in generate_interfaces(count, seed, max_extra_lines) for line in block)
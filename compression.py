@@ -0,0 +1,147 @@
+"""Content-Encoding support for request and response bodies.
+
+Request bodies are decompressed as they are read, in small input chunks,
+so a compressed upload never has to be held in memory twice and a body
+that inflates past the configured limit is rejected as soon as it does.
+gzip and deflate come from zlib; br and zstd are available when brotlicffi
+(or brotli) and zstandard are installed.
+"""
+
+import gzip
+import io
+import zlib
+
+try:
+    import brotlicffi as brotli
+except ImportError:
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class BodyTooLarge(Exception):
+    """Raised when a request body inflates past the decompression limit"""
+
+class CorruptBody(ValueError):
+    """Raised when a request body cannot be decoded with its Content-Encoding"""
+
+class _Zlib:
+    def __init__(self, wbits):
+        self._decompressor = zlib.decompressobj(wbits)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return self._decompressor.flush()
+
+class _Brotli:
+    def __init__(self):
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self._decompressor.process(data)
+
+    def flush(self):
+        if not self._decompressor.is_finished():
+            raise CorruptBody('Truncated br body')
+        return b''
+
+class _Zstd:
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return b''
+
+# encoding -> (decoder factory, input chunk size). br and zstd can inflate a
+# single byte far further than zlib, so they are fed smaller chunks to keep
+# each step's output bounded.
+REQUEST_DECODERS = {
+    'gzip': (lambda: _Zlib(16 + zlib.MAX_WBITS), 16 * 1024),
+    'x-gzip': (lambda: _Zlib(16 + zlib.MAX_WBITS), 16 * 1024),
+    'deflate': (lambda: _Zlib(zlib.MAX_WBITS), 16 * 1024),
+}
+if brotli is not None:
+    REQUEST_DECODERS['br'] = (_Brotli, 1024)
+if zstandard is not None:
+    REQUEST_DECODERS['zstd'] = (_Zstd, 1024)
+
+# Response encodings in server preference order, for equal client quality
+RESPONSE_ENCODERS = {}
+if zstandard is not None:
+    RESPONSE_ENCODERS['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+if brotli is not None:
+    RESPONSE_ENCODERS['br'] = lambda data: brotli.compress(data, quality=5)
+RESPONSE_ENCODERS['gzip'] = lambda data: gzip.compress(data, compresslevel=6)
+
+# Static assets are compressed once at startup, so they get the slowest, smallest settings
+STATIC_ENCODERS = {}
+if zstandard is not None:
+    STATIC_ENCODERS['zstd'] = lambda data: zstandard.ZstdCompressor(level=19).compress(data)
+if brotli is not None:
+    STATIC_ENCODERS['br'] = lambda data: brotli.compress(data, quality=11)
+STATIC_ENCODERS['gzip'] = lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+
+class DecompressingReader(io.RawIOBase):
+    """Raw stream that inflates ``raw`` on the fly, failing once output exceeds ``limit`` bytes"""
+
+    def __init__(self, raw, encoding, limit):
+        factory, self.chunk_size = REQUEST_DECODERS[encoding]
+        self.raw = raw
+        self.decoder = factory()
+        self.limit = limit
+        self.produced = 0
+        self._pending = memoryview(b'')
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._eof:
+            chunk = self.raw.read(self.chunk_size)
+            try:
+                if chunk:
+                    output = self.decoder.decompress(chunk)
+                else:
+                    output = self.decoder.flush()
+                    self._eof = True
+            except CorruptBody:
+                raise
+            except Exception as e:
+                raise CorruptBody(f'Request body is not valid: {e}') from e
+            self.produced += len(output)
+            if self.produced > self.limit:
+                raise BodyTooLarge(f'Request body inflates to more than {self.limit} bytes')
+            self._pending = memoryview(output)
+
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+def open_decompressed(raw, encoding, limit):
+    """Buffered, line-iterable stream of the inflated body"""
+    return io.BufferedReader(DecompressingReader(raw, encoding, limit), buffer_size=64 * 1024)
+
+def negotiate_encoding(accept_encodings, available=RESPONSE_ENCODERS):
+    """Best of ``available`` encodings for a werkzeug Accept-Encoding header, or None"""
+    best = None
+    best_quality = 0
+    for encoding in available:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(data, encoding):
+    return RESPONSE_ENCODERS[encoding](data)
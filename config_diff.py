@@ -0,0 +1,142 @@
+"""Block-aligned diff between an old configuration and its conversion.
+
+A whole-text diff would search for matching runs across the entire
+config, which is quadratic on large inputs and pairs lines from unrelated
+interfaces. The conversion already knows which output block came from
+which input block, so the diff is built per block instead: each source
+``interface`` block is aligned with the block generated from it in one
+forward pass. Converted lines keep their order, and a changed line keeps
+its command keyword. Every output line is also mapped to the input line
+it came from, giving a source map. The total cost is linear in the size
+of the config.
+"""
+
+from converter import convert_interface_lines
+
+def section_line_numbers(section):
+    """Line numbers for running_config.InterfaceSection.to_block(); its closing '!' is added, so has none"""
+    numbers = [index + 1 for index in range(section.start, section.end) if section.lines[index].strip()]
+    return numbers + [None]
+
+def _keyword(line):
+    return line.split(' ', 1)[0]
+
+def align_lines(old_lines, new_lines):
+    """Pair old and new lines of one block in a single forward pass
+
+    Returns (old index or None, new index or None) pairs in order. Equal
+    lines pair up; otherwise one line of lookahead on either side finds a
+    dropped or inserted line, and two lines with the same keyword are a
+    change of that line.
+    """
+    pairs = []
+    i = j = 0
+    old_count, new_count = len(old_lines), len(new_lines)
+    while i < old_count and j < new_count:
+        old, new = old_lines[i], new_lines[j]
+        if old == new:
+            pairs.append((i, j))
+            i += 1
+            j += 1
+        elif j + 1 < new_count and new_lines[j + 1] == old:
+            pairs.append((None, j))
+            j += 1
+        elif i + 1 < old_count and old_lines[i + 1] == new:
+            pairs.append((i, None))
+            i += 1
+        elif _keyword(old) == _keyword(new):
+            pairs.append((i, j))
+            i += 1
+            j += 1
+        else:
+            pairs.append((i, None))
+            i += 1
+    pairs.extend((index, None) for index in range(i, old_count))
+    pairs.extend((None, index) for index in range(j, new_count))
+    return pairs
+
+class ConfigDiff:
+    """Diff and source map of one conversion, built as its blocks are converted
+
+    ``add`` converts a block exactly as convert_interface_config does and
+    returns its text; ``add_migration`` records the migration section.
+    Output line numbers assume the blocks are joined by join_converted.
+    ``source_map[n - 1]`` is the input line output line ``n`` came from,
+    or None for generated lines.
+    """
+
+    def __init__(self, pw_ether_id):
+        self.pw_ether_id = pw_ether_id
+        self.blocks = []
+        self.source_map = []
+        self.migration = None
+
+    def add(self, interface, line_numbers):
+        new_lines = convert_interface_lines(interface, self.pw_ether_id)
+        if self.blocks:
+            # The blank line join_converted puts between blocks
+            self.source_map.append(None)
+        new_start = len(self.source_map) + 1
+        old_lines = interface.lines
+        diff = []
+        for old_index, new_index in align_lines(old_lines, new_lines):
+            old_number = line_numbers[old_index] if old_index is not None else None
+            if new_index is None:
+                diff.append(['-', old_number, None, old_lines[old_index]])
+                continue
+            new_number = new_start + new_index
+            self.source_map.append(old_number)
+            if old_index is None:
+                diff.append(['+', None, new_number, new_lines[new_index]])
+            elif old_lines[old_index] == new_lines[new_index]:
+                diff.append([' ', old_number, new_number, new_lines[new_index]])
+            else:
+                diff.append(['-', old_number, None, old_lines[old_index]])
+                diff.append(['+', None, new_number, new_lines[new_index]])
+        self.blocks.append({
+            'old_name': interface.name,
+            'new_name': new_lines[0],
+            'old_start': line_numbers[0],
+            'new_start': new_start,
+            'changed': sum(1 for line in diff if line[0] != ' '),
+            'lines': diff,
+        })
+        return '\n'.join(new_lines)
+
+    def add_migration(self, interfaces, migration_section):
+        """Record the migration section; its lines map to the name line of the interface they act on"""
+        if not self.blocks:
+            # join_converted leaves an empty line when there were no blocks
+            self.source_map.append(None)
+        self.source_map.append(None)
+        start = len(self.source_map) + 1
+        name_lines = [block['old_start'] for block in self.blocks]
+        no_shutdown = [number for number, interface in zip(name_lines, interfaces) if interface.parent is not None]
+        shutdown = name_lines
+        self.source_map.append(None)
+        self.source_map.extend(number for number in no_shutdown for _ in range(2))
+        self.source_map.extend((None, None))
+        self.source_map.extend(number for number in shutdown for _ in range(2))
+        self.migration = {'new_start': start, 'lines': migration_section.split('\n')}
+
+    def to_dict(self):
+        return {
+            'blocks': self.blocks,
+            'migration': self.migration,
+            'source_map': self.source_map,
+        }
+
+    def unified(self, old_label='old configuration', new_label='new configuration'):
+        """The diff as unified diff text, one hunk per interface block plus one for the migration section"""
+        out = [f'--- {old_label}', f'+++ {new_label}']
+        for block in self.blocks:
+            old_count = sum(1 for line in block['lines'] if line[0] != '+')
+            new_count = sum(1 for line in block['lines'] if line[0] != '-')
+            out.append(f"@@ -{block['old_start']},{old_count} +{block['new_start']},{new_count} @@ "
+                       f"{block['old_name']}")
+            out.extend(op + text for op, _, _, text in block['lines'])
+        if self.migration is not None:
+            lines = self.migration['lines']
+            out.append(f"@@ -0,0 +{self.migration['new_start']},{len(lines)} @@ migration")
+            out.extend('+' + line for line in lines)
+        return '\n'.join(out) + '\n'
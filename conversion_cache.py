@@ -0,0 +1,131 @@
+"""Content-addressed LRU+TTL cache for conversion results"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+import config_diff
+import converter
+import running_config
+import validation
+
+# Every module that shapes a cached representation: the conversion, its
+# diagnostics, the selection and the diff
+ENGINE_MODULES = (converter, validation, running_config, config_diff)
+
+def _engine_fingerprint():
+    """Hash of the engine source, so cached results and ETags change with any engine module"""
+    digest = hashlib.sha256()
+    for module in ENGINE_MODULES:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+ENGINE_FINGERPRINT = _engine_fingerprint()
+
+def normalise_config(config_text):
+    """Drop blank lines and surrounding whitespace, which the converter ignores anyway"""
+    return '\n'.join(line for line in (line.strip() for line in config_text.split('\n')) if line)
+
+# Representations that carry input line numbers
+LINE_NUMBERED_FORMATS = ('json+diff', 'diff')
+
+def conversion_key(config_text, pw_ether_id, selection='', output_format=''):
+    """Content hash identifying a conversion result
+
+    A selection finds sections by their indentation, and a diff maps output
+    lines to input line numbers, so for either the raw text is hashed
+    rather than the normalised config.
+    """
+    digest = hashlib.sha256()
+    digest.update(ENGINE_FINGERPRINT.encode())
+    digest.update(b'\0')
+    digest.update(pw_ether_id.encode())
+    digest.update(b'\0')
+    if selection:
+        digest.update(selection.encode())
+        digest.update(b'\0')
+    if output_format:
+        # Tagged, so a format can never hash like a selection
+        digest.update(b'format=' + output_format.encode())
+        digest.update(b'\0')
+    exact = selection or output_format in LINE_NUMBERED_FORMATS
+    digest.update((config_text if exact else normalise_config(config_text)).encode())
+    return digest.hexdigest()
+
+class ConversionCache:
+    """Thread-safe LRU cache with a TTL and a bound on entry count and stored characters"""
+
+    def __init__(self, max_entries=256, max_chars=64 * 1024 * 1024, ttl=600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.not_modified = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires, _ = entry
+            if expires <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size=None):
+        """Store ``value``; ``size`` counts against max_chars and defaults to len(value)"""
+        if size is None:
+            size = len(value)
+        if size > self.max_chars:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, self.clock() + self.ttl, size)
+            self._chars += size
+            # Evict least recently used entries until both bounds hold
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record_not_modified(self):
+        """Count a request answered with 304 before the cache was consulted"""
+        with self._lock:
+            self.not_modified += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._chars -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'chars': self._chars,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'not_modified': self.not_modified,
+            }
@@ -0,0 +1,519 @@
+"""PW-Ether conversion engine.
+
+Kept free of Flask so the web app, the batch workers and the offline CLI
+can all share it.
+"""
+
+from collections import namedtuple
+import io
+import re
+import tempfile
+
+INTERFACE_RE = re.compile(r'interface\s+((?:GigabitEthernet|TenGigE|Tengig)\d+/\d+/\d+/\d+)\.(\d+)(\s+l2transport)?')
+CTAG_RE = re.compile(r'encapsulation dot1q \d+ second-dot1q (\d+)')
+
+class InterfaceBlock:
+    """Parsed interface block shared by the conversion, migration and bridge generators.
+
+    ``name`` is the stripped ``interface ...`` line and ``lines`` holds every
+    stripped line of the block, starting with the interface line itself.
+    ``parent``/``subinterface`` are None when the name is not a recognised
+    GigabitEthernet/TenGigE subinterface. ``l2transport`` keeps the matched
+    text (including its leading whitespace) so it can be re-emitted verbatim,
+    and is an empty string when absent. ``ctag`` is the first
+    ``second-dot1q`` value found in the block.
+    """
+    __slots__ = ('name', 'parent', 'subinterface', 'ctag', 'l2transport', 'lines')
+
+    def __init__(self, name):
+        self.name = name
+        self.lines = [name]
+        self.ctag = None
+        match = INTERFACE_RE.match(name)
+        if match:
+            self.parent, self.subinterface, l2transport = match.groups()
+            self.l2transport = l2transport or ''
+        else:
+            self.parent = self.subinterface = None
+            self.l2transport = ''
+
+    def append(self, line):
+        self.lines.append(line)
+        if self.ctag is None and 'second-dot1q' in line:
+            match = CTAG_RE.search(line)
+            if match:
+                self.ctag = match.group(1)
+
+    @property
+    def config(self):
+        return '\n'.join(self.lines)
+
+    @property
+    def suffix(self):
+        """Subinterface suffix for the PW-Ether name: the ctag, or the subinterface number"""
+        return self.ctag or self.subinterface
+
+    def pw_ether_name(self, pw_ether_id):
+        # Spelled out rather than through suffix: this runs once per converted block
+        return f"PW-Ether {pw_ether_id}.{self.ctag or self.subinterface}"
+
+    def __repr__(self):
+        return f"InterfaceBlock({self.name!r}, ctag={self.ctag!r}, lines={len(self.lines)})"
+
+def _record_line_numbers(lines, numbers):
+    """Pass ``lines`` through, appending the 1-based number of each non-blank one to ``numbers``"""
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            numbers.append(number)
+        yield line
+
+def iter_interface_blocks(lines, close_on_bang=False, line_numbers=False):
+    """Yield an InterfaceBlock for each interface found in an iterable of config lines
+
+    By default a block runs until the next ``interface`` line. With
+    ``close_on_bang`` each block is yielded as soon as its closing ``!`` is
+    seen, and any lines between that ``!`` and the next interface are
+    ignored, so a streaming caller never waits on the following block. Only
+    a ``!`` in column 0 closes a block; an indented one ends a nested
+    section such as a service-policy or ethernet cfm stanza.
+
+    With ``line_numbers`` each item is a (block, numbers) pair instead,
+    ``numbers`` holding the 1-based input line number of each line in
+    ``block.lines``. A block's lines are consecutive non-blank input lines,
+    so they are sliced from a record of those, and the default path pays
+    nothing per line.
+    """
+    if line_numbers:
+        numbers = []
+        lines = _record_line_numbers(lines, numbers)
+    current = None
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        # Check if this is a new interface definition
+        if line.startswith('interface '):
+            if current is not None:
+                yield (current, numbers[start:start + len(current.lines)]) if line_numbers else current
+            current = InterfaceBlock(line)
+            if line_numbers:
+                start = len(numbers) - 1
+        elif current is not None:
+            current.append(line)
+            if close_on_bang and line == '!' and raw_line[0] == '!':
+                yield (current, numbers[start:start + len(current.lines)]) if line_numbers else current
+                current = None
+
+    # Yield the last interface
+    if current is not None:
+        yield (current, numbers[start:start + len(current.lines)]) if line_numbers else current
+
+def parse_interface_config(config_text):
+    """Parse the old Cisco interface configuration and extract interface blocks"""
+    return list(iter_interface_blocks(config_text.strip().split('\n')))
+
+class LineState:
+    """Per-block state shared by the built-in conversions and the line rule actions
+
+    ``flags`` names the changes they made beyond a plain copy, for
+    structured output (see conversion_records).
+    """
+    __slots__ = ('ctag', 'has_shutdown', 'flags')
+
+    def __init__(self, ctag):
+        self.ctag = ctag
+        self.has_shutdown = False
+        self.flags = ()
+
+# The conversions every block gets are inlined in convert_interface_lines,
+# since they fire on nearly every block and a table lookup plus an action
+# call per hit costs more than the if/elif chain they are written as. A
+# LineRule adds a conversion on top: it fires for a line the built-in
+# conversions leave alone whose first token is ``keyword`` and, when
+# ``pattern`` is set, which the pattern matches from the start. ``action`` is
+# called as action(state, line, match) and returns the line to emit, or None
+# to drop it. Rules sharing a keyword are tried in order; a line no rule
+# fires for is copied unchanged.
+LineRule = namedtuple('LineRule', ['keyword', 'pattern', 'action'])
+
+# Line prefixes the built-in conversions look at
+BUILTIN_PREFIXES = ('encapsulation', 'rewrite ingress tag pop 2 symmetric', 'shutdown')
+
+class LineRuleTable(dict):
+    """Dispatch table compiled from LineRules: first token -> tuple of (pattern, action)
+
+    ``prefixes`` holds the built-in conversions' prefixes and every rule
+    keyword, so most lines, which neither touches, are copied after a single
+    startswith call.
+    """
+
+    def __init__(self, rules=()):
+        super().__init__()
+        for rule in rules:
+            self[rule.keyword] = self.get(rule.keyword, ()) + ((rule.pattern, rule.action),)
+        self.prefixes = BUILTIN_PREFIXES + tuple(self)
+
+LINE_RULE_TABLE = LineRuleTable()
+
+def convert_interface_config(interface, pw_ether_id, rule_table=LINE_RULE_TABLE):
+    """Convert a single interface block from old to new format"""
+    return '\n'.join(convert_interface_lines(interface, pw_ether_id, rule_table))
+
+def convert_interface_lines(interface, pw_ether_id, rule_table=LINE_RULE_TABLE, state=None):
+    """Converted lines of one interface block
+
+    ``state``, if given, is the LineState(interface.ctag) the conversions
+    work on, so the caller can read it afterwards.
+    """
+    # The ctag comes from the encapsulation command, not from the interface name
+    if state is None:
+        state = LineState(interface.ctag)
+
+    # Handle interface name conversion
+    if interface.parent is not None:
+        # Use the ctag from encapsulation command for the new interface name
+        # If no ctag found, fall back to subinterface number
+        new_lines = [f"interface {interface.pw_ether_name(pw_ether_id)}{interface.l2transport}"]
+    else:
+        # If pattern doesn't match, keep original
+        new_lines = [interface.name]
+
+    rules_for = rule_table.get
+    prefixes = rule_table.prefixes
+    append = new_lines.append
+    lines = iter(interface.lines)
+    next(lines)
+    for line in lines:
+        if not line.startswith(prefixes):
+            append(line)
+            continue
+        if line.startswith('encapsulation'):
+            match = CTAG_RE.match(line)
+            if match is not None:
+                ctag = state.ctag = match[1]
+                append(f"encapsulation dot1q {ctag}")
+                continue
+        elif line.startswith('rewrite ingress tag pop 2 symmetric'):
+            # If ctag is 502 or 504, remove the rewrite command entirely
+            if state.ctag in ('502', '504'):
+                state.flags += ('rewrite_removed',)
+                continue
+            # Change pop 2 to pop 1 for other ctags
+            state.flags += ('rewrite_pop_1',)
+            append(line.replace('pop 2', 'pop 1'))
+            continue
+        elif line == 'shutdown':
+            state.has_shutdown = True
+
+        rules = rules_for(line.partition(' ')[0])
+        if rules is not None:
+            for pattern, action in rules:
+                match = None
+                if pattern is not None:
+                    match = pattern.match(line)
+                    if match is None:
+                        continue
+                line = action(state, line, match)
+                break
+        if line is not None:
+            append(line)
+
+    # Add shutdown command if not already present (before the closing '!')
+    if not state.has_shutdown:
+        try:
+            new_lines.insert(new_lines.index('!'), 'shutdown')
+        except ValueError:
+            # If no '!' found, add shutdown at the end
+            new_lines.append('shutdown')
+
+    # Ensure there's a closing '!' at the end
+    if new_lines[-1] != '!':
+        new_lines.append('!')
+
+    return new_lines
+
+def convert_configuration(old_config, pw_ether_id, progress=None, validator=None):
+    """Convert the entire configuration from old to new format"""
+    return convert_interfaces(parse_interface_config(old_config), pw_ether_id, progress, validator)
+
+def convert_interfaces(interfaces, pw_ether_id, progress=None, validator=None):
+    """Convert already parsed interface blocks and append the migration section
+
+    ``progress``, if given, is called as progress(done, total, interface)
+    after each block is converted. ``validator``, if given, observes each
+    block in the same pass (see validation.ConfigValidator).
+    """
+    if progress is None and validator is None:
+        converted_interfaces = [convert_interface_config(interface, pw_ether_id) for interface in interfaces]
+    else:
+        converted_interfaces = []
+        total = len(interfaces)
+        for interface in interfaces:
+            converted_interfaces.append(convert_interface_config(interface, pw_ether_id))
+            if validator is not None:
+                validator.observe(interface)
+            if progress is not None:
+                progress(len(converted_interfaces), total, interface)
+
+    # Add migration section
+    migration_section = generate_migration_section(interfaces, pw_ether_id)
+
+    return join_converted(converted_interfaces, migration_section)
+
+def join_converted(converted_interfaces, migration_section):
+    """Combine converted interfaces with the migration section"""
+    result = '\n\n'.join(converted_interfaces)
+    if migration_section:
+        result += '\n\n' + migration_section
+
+    return result
+
+def iter_config_lines(source, encoding='utf-8'):
+    """Lines of a configuration from text, an iterable of str or bytes lines, or a file, socket file or mmap
+
+    Objects with ``readline`` are read a line at a time, since iterating an
+    mmap yields single bytes. Lines keep any trailing newline; the block
+    parser strips them.
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    readline = getattr(source, 'readline', None)
+    if readline is not None:
+        first = readline()
+        if not first:
+            return
+        sentinel = b'' if isinstance(first, bytes) else ''
+        lines = iter(readline, sentinel)
+        if sentinel == b'':
+            yield first.decode(encoding, errors='replace')
+            for line in lines:
+                yield line.decode(encoding, errors='replace')
+        else:
+            yield first
+            yield from lines
+        return
+    for line in source:
+        yield line.decode(encoding, errors='replace') if isinstance(line, bytes) else line
+
+class MigrationSpool:
+    """The migration section, written out block by block and read back at the end
+
+    Entries spill to a temporary file past ``max_size`` characters, so
+    streaming conversions do not hold every interface name in memory.
+    """
+
+    def __init__(self, pw_ether_id, max_size=256 * 1024):
+        self.pw_ether_id = pw_ether_id
+        self.no_shutdown = tempfile.SpooledTemporaryFile(max_size, mode='w+', encoding='utf-8')
+        self.shutdown = tempfile.SpooledTemporaryFile(max_size, mode='w+', encoding='utf-8')
+
+    def add(self, interface):
+        if interface.parent is not None:
+            self.no_shutdown.write(f"interface {interface.pw_ether_name(self.pw_ether_id)}{interface.l2transport}\n"
+                                   " no shutdown\n")
+        self.shutdown.write(f"{interface.name}\n shutdown\n")
+
+    def iter_lines(self):
+        """Lines of the section, as generate_migration_section would return them; closes the spool"""
+        try:
+            yield '### no shutdown (from config) ###'
+            self.no_shutdown.seek(0)
+            for line in self.no_shutdown:
+                yield line[:-1]
+            yield ''
+            yield '### shutdown (from list) ###'
+            self.shutdown.seek(0)
+            for line in self.shutdown:
+                yield line[:-1]
+        finally:
+            self.close()
+
+    def close(self):
+        self.no_shutdown.close()
+        self.shutdown.close()
+
+def iter_converted_lines(source, pw_ether_id, validator=None, spool_chars=256 * 1024):
+    """Yield the converted configuration one line at a time
+
+    ``source`` is anything iter_config_lines accepts, such as an open file.
+    The lines are those of convert_configuration(...).split('\\n'), but
+    only one interface block is held at a time and the migration section
+    is spooled, so memory stays bounded by the largest block.
+    ``validator``, if given, observes each block as it is converted, and
+    ``spool_chars`` bounds the migration entries kept in memory.
+    """
+    spool = MigrationSpool(pw_ether_id, spool_chars)
+    try:
+        converted = 0
+        for interface in iter_interface_blocks(iter_config_lines(source)):
+            if validator is not None:
+                validator.observe(interface)
+            if converted:
+                yield ''
+            converted += 1
+            yield from convert_interface_lines(interface, pw_ether_id)
+            spool.add(interface)
+        if not converted:
+            # An empty join still leaves its separator in front of the migration section
+            yield ''
+        yield ''
+        yield from spool.iter_lines()
+    finally:
+        spool.close()
+
+def iter_converted_configuration(lines, pw_ether_id, chunk_chars=64 * 1024):
+    """Yield the converted configuration in chunks, one interface at a time
+
+    The chunks concatenate to the same text as convert_configuration. Each
+    block is converted as soon as it closes and only its header fields are
+    spooled for the trailing migration section, so memory stays bounded by
+    the largest single interface block.
+    """
+    spool = MigrationSpool(pw_ether_id)
+    try:
+        separator = ''
+        for interface in iter_interface_blocks(lines, close_on_bang=True):
+            yield separator + convert_interface_config(interface, pw_ether_id)
+            separator = '\n\n'
+            spool.add(interface)
+
+        # The migration section goes out in chunks of about ``chunk_chars``
+        chunk = ['\n']
+        size = 0
+        for line in spool.iter_lines():
+            chunk.append(line)
+            size += len(line) + 1
+            if size >= chunk_chars:
+                yield '\n'.join(chunk)
+                chunk = ['']
+                size = 0
+        yield '\n'.join(chunk)
+    finally:
+        spool.close()
+
+def generate_migration_section(interfaces, pw_ether_id):
+    """Generate migration section with shutdown commands for old interfaces and no shutdown for new ones"""
+    migration_lines = []
+
+    # Section 1: New PW-Ether interfaces with no shutdown
+    migration_lines.append('### no shutdown (from config) ###')
+    for interface in interfaces:
+        if interface.parent is not None:
+            migration_lines.append(f"interface {interface.pw_ether_name(pw_ether_id)}{interface.l2transport}")
+            migration_lines.append(' no shutdown')
+
+    migration_lines.append('')
+
+    # Section 2: Old interfaces with shutdown
+    migration_lines.append('### shutdown (from list) ###')
+    for interface in interfaces:
+        # Use the complete original interface name for shutdown commands
+        migration_lines.append(interface.name)
+        migration_lines.append(' shutdown')
+
+    return '\n'.join(migration_lines)
+
+def bridge_domains(interfaces, pw_ether_id):
+    """The interfaces that need a D_NET bridge domain: those whose ctag ends in 502 or 504"""
+    special_ctags = []
+
+    # Check for interfaces whose ctag ends with 502 or 504 (for 4+ digit ctags)
+    for interface in interfaces:
+        if interface.parent is None:
+            continue
+        interface_suffix = interface.suffix
+        if interface_suffix.endswith('502') or interface_suffix.endswith('504'):
+            # Extract the last 3 digits for the bridge domain name
+            special_ctags.append({
+                'ctag': interface_suffix[-3:],
+                'original_interface': interface.name,
+                'new_interface': interface.pw_ether_name(pw_ether_id)
+            })
+    return special_ctags
+
+def generate_bridge_config(interfaces, pw_ether_id):
+    """Generate L2VPN bridge configuration for ctags 502/504"""
+    special_ctags = bridge_domains(interfaces, pw_ether_id)
+    if not special_ctags:
+        return None
+
+    # Generate bridge configuration
+    bridge_lines = []
+    bridge_lines.append('l2vpn')
+    bridge_lines.append(' bridge group D_NET')
+
+    for ctag_info in special_ctags:
+        bridge_lines.append(f'  bridge-domain ME_DNET_{ctag_info["ctag"]}')
+        bridge_lines.append(f'   interface {ctag_info["new_interface"]}')
+        bridge_lines.append('    storm-control multicast kbps 50000')
+        bridge_lines.append('    storm-control broadcast kbps 50000')
+        bridge_lines.append('    split-horizon group')
+        bridge_lines.append('   !')
+        bridge_lines.append('  !')
+
+    bridge_lines.append(' !')
+    bridge_lines.append('!')
+
+    return '\n'.join(bridge_lines)
+
+def interface_record(interface, pw_ether_id):
+    """Structured result for one interface block, as emitted by format=ndjson"""
+    state = LineState(interface.ctag)
+    lines = convert_interface_lines(interface, pw_ether_id, state=state)
+    flags = list(state.flags)
+    if not state.has_shutdown:
+        flags.append('shutdown_added')
+    if interface.parent is None:
+        flags.insert(0, 'not_converted')
+    elif interface.ctag is None:
+        flags.insert(0, 'ctag_from_subinterface')
+    return {
+        'type': 'interface',
+        'original_name': interface.name,
+        'new_name': interface.pw_ether_name(pw_ether_id) if interface.parent is not None else None,
+        'ctag': interface.suffix if interface.parent is not None else interface.ctag,
+        'l2transport': bool(interface.l2transport),
+        'lines': lines,
+        'flags': flags,
+    }
+
+def trailer_records(interfaces, pw_ether_id):
+    """Migration and bridge records that follow the interface records"""
+    records = [{
+        'type': 'migration',
+        'no_shutdown': [f"interface {interface.pw_ether_name(pw_ether_id)}{interface.l2transport}"
+                        for interface in interfaces if interface.parent is not None],
+        'shutdown': [interface.name for interface in interfaces],
+        'lines': generate_migration_section(interfaces, pw_ether_id).split('\n'),
+    }]
+    domains = bridge_domains(interfaces, pw_ether_id)
+    if domains:
+        records.append({
+            'type': 'bridge',
+            'group': 'D_NET',
+            'domains': [{'name': f"ME_DNET_{domain['ctag']}", 'interface': domain['new_interface'],
+                         'original_interface': domain['original_interface']} for domain in domains],
+            'lines': generate_bridge_config(interfaces, pw_ether_id).split('\n'),
+        })
+    return records
+
+def iter_conversion_records(interfaces, pw_ether_id, validator=None):
+    """Yield an interface record per block, then the migration and bridge records
+
+    ``interfaces`` may be any iterable of blocks, such as
+    iter_interface_blocks(..., close_on_bang=True). Each block's lines are
+    released once its record is built, but its header is kept for the
+    migration record, which lists every interface in one JSON object. So
+    unlike iter_converted_lines, memory grows with the number of
+    interfaces, by about a name per block. ``validator``, if given,
+    observes each block first.
+    """
+    seen = []
+    for interface in interfaces:
+        if validator is not None:
+            validator.observe(interface)
+        yield interface_record(interface, pw_ether_id)
+        interface.lines = None
+        seen.append(interface)
+    yield from trailer_records(seen, pw_ether_id)
@@ -0,0 +1,214 @@
+"""Server-side final configuration generator.
+
+Builds the combined Huawei CSR and PW-HE BE document that the browser used
+to assemble in generateFinalConfig(). The PW-HE BE pairs and Huawei CSR
+models are plain registries, and every template is compiled once at import
+into literal and field parts.
+"""
+
+from collections import namedtuple
+import re
+
+from converter import parse_interface_config, convert_interfaces, generate_bridge_config
+from verification import PING_HOST_LIMIT, generate_verification_commands
+
+PwheBackend = namedtuple('PwheBackend', 'name primary secondary')
+HuaweiModel = namedtuple('HuaweiModel', 'traffic_behavior separate_secondary_pw_id')
+
+FIELD_RE = re.compile(r'\$\{(\w+)\}')
+
+class CompiledTemplate:
+    """Template with ``${field}`` placeholders, split once into literal and field parts"""
+    __slots__ = ('literals', 'fields')
+
+    def __init__(self, text):
+        parts = FIELD_RE.split(text)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, context):
+        out = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            out.append(context[field])
+            out.append(literal)
+        return ''.join(out)
+
+# PW-HE BE pairs selectable in the UI
+PWHE_BACKENDS = {
+    'pili-mala': PwheBackend('PILI-1 and MALA_10K-2', '10.24.3.24', '10.24.3.27'),
+    'mala-kada': PwheBackend('MALA_10K-1 and KADA-2', '10.24.3.26', '10.24.3.29'),
+    'kada-pili': PwheBackend('KADA-1 and PILI-2', '10.24.3.28', '10.24.3.25'),
+}
+
+TRAFFIC_BEHAVIOR_STANDARD = (
+    'traffic behavior 250M_CX_POLICY_IN\n'
+    ' car cir 250000 pir 250000 cbs 4294967295 pbs 4294967295 green pass yellow pass red discard'
+)
+TRAFFIC_BEHAVIOR_LARGE_BURST = (
+    'traffic behavior 250M_CX_POLICY_IN\n'
+    ' car cir  250000  pir 250000  cbs  10000000 pbs 10000000 green pass yellow pass red discard'
+)
+
+# Huawei CSR models: ATN950B and ATN910I-TC-DC use a separate secondary PW ID
+HUAWEI_MODELS = {
+    'ATN910C-G': HuaweiModel(TRAFFIC_BEHAVIOR_STANDARD, False),
+    'ATN910C-D': HuaweiModel(TRAFFIC_BEHAVIOR_STANDARD, False),
+    'ATN910D-A': HuaweiModel(TRAFFIC_BEHAVIOR_STANDARD, False),
+    'ATN950C': HuaweiModel(TRAFFIC_BEHAVIOR_STANDARD, False),
+    'ATN950B': HuaweiModel(TRAFFIC_BEHAVIOR_LARGE_BURST, True),
+    'ATN910I-TC-DC': HuaweiModel(TRAFFIC_BEHAVIOR_LARGE_BURST, True),
+}
+
+FINAL_TEMPLATE = CompiledTemplate('''\
+#############################################################################################################
+
+CSR IP : ${csr_ip}
+
+PWHE BE : ${pwhe_name}
+
+PWHE Primary : ${primary}
+
+PWHE Secondary : ${secondary}
+
+PE : ${pw_ether_id}
+
+PW_ID : ${pw_id_display}
+
+############################################################################################################
+
+diffserv domain ENT_NQOS
+ 8021p-inbound 0 phb af1 green
+ 8021p-inbound 2 phb af1 green
+ 8021p-inbound 3 phb af1 green
+ 8021p-inbound 4 phb af1 green
+ 8021p-inbound 5 phb af1 green
+ 8021p-inbound 6 phb af1 green
+ 8021p-inbound 7 phb af1 green
+
+traffic classifier MATCH_ANY operator or 
+if-match  any
+
+${traffic_behavior}
+
+traffic policy 250M_CX_POLICY_IN 
+ undo share-mode
+ statistics enable
+ classifier MATCH_ANY behavior 250M_CX_POLICY_IN
+
+mpls ldp remote-peer ${primary}
+ remote-ip ${primary}
+
+mpls ldp remote-peer ${secondary}
+ remote-ip ${secondary}
+
+
+${existing_csr_config}
+
+
+description CX_PW:ACTIVE_${primary}:BACKUP_${secondary}
+statistic enable mode single
+mpls l2vpn pw traffic-statistics enable
+trust upstream ENT_NQOS
+trust 8021p
+traffic-policy 250M_CX_POLICY_IN inbound
+mpls l2vc ${primary} ${base_pw_id} raw
+mpls l2vc ${secondary} ${secondary_pw_id} raw secondary
+mpls l2vpn redundancy master
+
+
+
+
+######################################### [PW-HE BE Configuration ] ###################################################
+
+${pw_ether_interface}
+
+${bridge_config}
+
+${new_config}
+
+${verification_commands}''')
+
+PW_ETHER_INTERFACE_TEMPLATE = CompiledTemplate('''\
+interface PW-Ether ${pw_ether_id}
+description ${cx_name}:${cx_location}:NA
+mtu ${mtu}
+bandwidth 1000000
+attach generic-interface-list PWHE
+!
+
+l2vpn
+xconnect group PW_HE
+  p2p ${pw_ether_id}
+  interface PW-Ether ${pw_ether_id}
+  neighbor ipv4 ${csr_ip} pw-id ${pw_ether_id}0
+    pw-class  MPLS_ETH_E
+!
+''')
+
+MTU_RE = re.compile(r'[+-]?\d+')
+
+def process_existing_csr_config(csr_config):
+    """Prefix every 'mpls l2vc' command of the existing CSR interface with 'undo'"""
+    if not csr_config.strip():
+        return ''
+    lines = []
+    for line in csr_config.split('\n'):
+        stripped = line.strip()
+        lines.append('undo ' + stripped if 'mpls l2vc' in stripped else line)
+    return '\n'.join(lines)
+
+def pw_ether_mtu(csr_config):
+    """PW-Ether MTU: the existing CSR interface MTU plus 14, or 1514 by default"""
+    for line in csr_config.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('mtu '):
+            match = MTU_RE.match(stripped[4:].strip())
+            if match:
+                return int(match.group()) + 14
+            break
+    return 1514
+
+def generate_pw_ether_interface_config(pw_ether_id, csr_ip, cx_name, cx_location, csr_config):
+    if not pw_ether_id or not cx_name or not cx_location:
+        return ''
+    return PW_ETHER_INTERFACE_TEMPLATE.render({
+        'pw_ether_id': pw_ether_id,
+        'cx_name': cx_name,
+        'cx_location': cx_location,
+        'mtu': str(pw_ether_mtu(csr_config)),
+        'csr_ip': csr_ip,
+    })
+
+def generate_final_config(old_config, pw_ether_id, csr_ip, pwhe_option, huawei_model,
+                          existing_csr_config, cx_name='', cx_location='', ping_limit=PING_HOST_LIMIT):
+    """Render the full CSR plus PW-HE BE document from a single parse of the old config"""
+    backend = PWHE_BACKENDS[pwhe_option]
+    model = HUAWEI_MODELS[huawei_model]
+
+    base_pw_id = pw_ether_id + '0'
+    if model.separate_secondary_pw_id:
+        secondary_pw_id = pw_ether_id + '1'
+        pw_id_display = f"{base_pw_id} / {secondary_pw_id}"
+    else:
+        secondary_pw_id = base_pw_id
+        pw_id_display = base_pw_id
+
+    interfaces = parse_interface_config(old_config)
+
+    return FINAL_TEMPLATE.render({
+        'csr_ip': csr_ip,
+        'pwhe_name': backend.name,
+        'primary': backend.primary,
+        'secondary': backend.secondary,
+        'pw_ether_id': pw_ether_id,
+        'pw_id_display': pw_id_display,
+        'traffic_behavior': model.traffic_behavior,
+        'existing_csr_config': process_existing_csr_config(existing_csr_config),
+        'base_pw_id': base_pw_id,
+        'secondary_pw_id': secondary_pw_id,
+        'pw_ether_interface': generate_pw_ether_interface_config(pw_ether_id, csr_ip, cx_name, cx_location,
+                                                                 existing_csr_config),
+        'bridge_config': generate_bridge_config(interfaces, pw_ether_id) or '',
+        'new_config': convert_interfaces(interfaces, pw_ether_id).strip(),
+        'verification_commands': generate_verification_commands(interfaces, pw_ether_id, ping_limit),
+    })
@@ -0,0 +1,124 @@
+"""Conversion engine for the Cloud Functions deployment.
+
+Kept free of Flask so the function's cold start only pays for what a
+request needs. The ctag for the PW-Ether name is taken from the last three
+digits of the subinterface name.
+"""
+
+import re
+
+def parse_interface_config(config_text):
+    """Parse interface blocks from configuration text."""
+    interfaces = []
+    current_interface = None
+    
+    for line in config_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+            
+        # Check if this is an interface line
+        if line.startswith('interface '):
+            if current_interface:
+                interfaces.append(current_interface)
+            current_interface = {'config': line, 'lines': [line]}
+        elif current_interface:
+            current_interface['lines'].append(line)
+            if line == '!':
+                interfaces.append(current_interface)
+                current_interface = None
+    
+    # Add the last interface if exists
+    if current_interface:
+        interfaces.append(current_interface)
+    
+    return interfaces
+
+def convert_interface_config(interface_config, pw_ether_id):
+    """Convert a single interface configuration."""
+    lines = interface_config['lines']
+    converted_lines = []
+    
+    for line in lines:
+        # Convert interface line
+        if line.startswith('interface '):
+            # Extract interface name and check for l2transport
+            match = re.match(r'interface\s+(\S+)(?:\s+(l2transport))?', line)
+            if match:
+                interface_name = match.group(1)
+                l2transport = match.group(2)
+                
+                # Extract ctag (last 3 digits)
+                ctag_match = re.search(r'\.(\d{3})$', interface_name)
+                if ctag_match:
+                    ctag = ctag_match.group(1)
+                    new_interface = f"interface PW-Ether {pw_ether_id}.{ctag}"
+                    if l2transport:
+                        new_interface += f" {l2transport}"
+                    converted_lines.append(new_interface)
+                else:
+                    converted_lines.append(line)
+            else:
+                converted_lines.append(line)
+        
+        # Convert encapsulation line
+        elif 'encapsulation dot1q' in line and 'second-dot1q' in line:
+            # Extract ctag from second-dot1q
+            match = re.search(r'second-dot1q\s+(\d+)', line)
+            if match:
+                ctag = match.group(1)
+                # Check if ctag is 502 or 504
+                if ctag in ['502', '504']:
+                    # Remove rewrite ingress tag pop commands for these ctags
+                    pass
+                else:
+                    # Convert to simple dot1q
+                    new_line = re.sub(r'encapsulation dot1q \d+ second-dot1q \d+', f'encapsulation dot1q {ctag}', line)
+                    converted_lines.append(new_line)
+                    continue
+            converted_lines.append(line)
+        
+        # Handle rewrite ingress tag pop commands
+        elif 'rewrite ingress tag pop 2 symmetric' in line:
+            # Check if we should remove this command (ctag 502 or 504)
+            # We'll need to check the ctag from the interface name
+            interface_name = None
+            for prev_line in reversed(converted_lines):
+                if prev_line.startswith('interface PW-Ether'):
+                    ctag_match = re.search(r'\.(\d+)$', prev_line)
+                    if ctag_match and ctag_match.group(1) in ['502', '504']:
+                        # Skip this line for ctags 502/504
+                        break
+                    else:
+                        # Convert to pop 1 for other ctags
+                        converted_lines.append(line.replace('pop 2', 'pop 1'))
+                        break
+            else:
+                converted_lines.append(line.replace('pop 2', 'pop 1'))
+            continue
+        
+        # Add shutdown command before the closing '!'
+        elif line == '!':
+            # Check if shutdown already exists
+            has_shutdown = any('shutdown' in prev_line for prev_line in converted_lines)
+            if not has_shutdown:
+                # Add shutdown command before the '!'
+                converted_lines.append('shutdown')
+            converted_lines.append(line)
+        
+        # Keep other lines as-is
+        else:
+            converted_lines.append(line)
+    
+    return '\n'.join(converted_lines)
+
+def convert_configuration(old_config, pw_ether_id):
+    """Convert the entire configuration."""
+    interfaces = parse_interface_config(old_config)
+    converted_configs = []
+    
+    for interface in interfaces:
+        converted = convert_interface_config(interface, pw_ether_id)
+        converted_configs.append(converted)
+    
+    return '\n\n'.join(converted_configs)
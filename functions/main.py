@@ -1,124 +1,27 @@
-import functions_framework
-from flask import Flask, request, jsonify, render_template_string
-import re
+import gzip
+import hashlib
 import os
 
-# Import your existing conversion functions
-def parse_interface_config(config_text):
-    """Parse interface blocks from configuration text."""
-    interfaces = []
-    current_interface = None
-    
-    for line in config_text.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check if this is an interface line
-        if line.startswith('interface '):
-            if current_interface:
-                interfaces.append(current_interface)
-            current_interface = {'config': line, 'lines': [line]}
-        elif current_interface:
-            current_interface['lines'].append(line)
-            if line == '!':
-                interfaces.append(current_interface)
-                current_interface = None
-    
-    # Add the last interface if exists
-    if current_interface:
-        interfaces.append(current_interface)
-    
-    return interfaces
+import functions_framework
+from flask import jsonify
 
-def convert_interface_config(interface_config, pw_ether_id):
-    """Convert a single interface configuration."""
-    lines = interface_config['lines']
-    converted_lines = []
-    
-    for line in lines:
-        # Convert interface line
-        if line.startswith('interface '):
-            # Extract interface name and check for l2transport
-            match = re.match(r'interface\s+(\S+)(?:\s+(l2transport))?', line)
-            if match:
-                interface_name = match.group(1)
-                l2transport = match.group(2)
-                
-                # Extract ctag (last 3 digits)
-                ctag_match = re.search(r'\.(\d{3})$', interface_name)
-                if ctag_match:
-                    ctag = ctag_match.group(1)
-                    new_interface = f"interface PW-Ether {pw_ether_id}.{ctag}"
-                    if l2transport:
-                        new_interface += f" {l2transport}"
-                    converted_lines.append(new_interface)
-                else:
-                    converted_lines.append(line)
-            else:
-                converted_lines.append(line)
-        
-        # Convert encapsulation line
-        elif 'encapsulation dot1q' in line and 'second-dot1q' in line:
-            # Extract ctag from second-dot1q
-            match = re.search(r'second-dot1q\s+(\d+)', line)
-            if match:
-                ctag = match.group(1)
-                # Check if ctag is 502 or 504
-                if ctag in ['502', '504']:
-                    # Remove rewrite ingress tag pop commands for these ctags
-                    pass
-                else:
-                    # Convert to simple dot1q
-                    new_line = re.sub(r'encapsulation dot1q \d+ second-dot1q \d+', f'encapsulation dot1q {ctag}', line)
-                    converted_lines.append(new_line)
-                    continue
-            converted_lines.append(line)
-        
-        # Handle rewrite ingress tag pop commands
-        elif 'rewrite ingress tag pop 2 symmetric' in line:
-            # Check if we should remove this command (ctag 502 or 504)
-            # We'll need to check the ctag from the interface name
-            interface_name = None
-            for prev_line in reversed(converted_lines):
-                if prev_line.startswith('interface PW-Ether'):
-                    ctag_match = re.search(r'\.(\d+)$', prev_line)
-                    if ctag_match and ctag_match.group(1) in ['502', '504']:
-                        # Skip this line for ctags 502/504
-                        break
-                    else:
-                        # Convert to pop 1 for other ctags
-                        converted_lines.append(line.replace('pop 2', 'pop 1'))
-                        break
-            else:
-                converted_lines.append(line.replace('pop 2', 'pop 1'))
-            continue
-        
-        # Add shutdown command before the closing '!'
-        elif line == '!':
-            # Check if shutdown already exists
-            has_shutdown = any('shutdown' in prev_line for prev_line in converted_lines)
-            if not has_shutdown:
-                # Add shutdown command before the '!'
-                converted_lines.append('shutdown')
-            converted_lines.append(line)
-        
-        # Keep other lines as-is
-        else:
-            converted_lines.append(line)
-    
-    return '\n'.join(converted_lines)
+from core import convert_configuration
 
-def convert_configuration(old_config, pw_ether_id):
-    """Convert the entire configuration."""
-    interfaces = parse_interface_config(old_config)
-    converted_configs = []
-    
-    for interface in interfaces:
-        converted = convert_interface_config(interface, pw_ether_id)
-        converted_configs.append(converted)
-    
-    return '\n\n'.join(converted_configs)
+# The page is static per deployment, so browsers and CDNs may reuse it
+PAGE_MAX_AGE = int(os.environ.get('PAGE_MAX_AGE', 300))
+
+# (body, gzip body, ETag) of the rendered page, built once per instance
+_index_page = None
+
+def index_page():
+    """Render INDEX_HTML on first use and keep it with its gzip encoding and ETag"""
+    global _index_page
+    if _index_page is None:
+        # Flask's template engine is only set up once the page is actually requested
+        from flask import render_template_string
+        body = render_template_string(INDEX_HTML).encode('utf-8')
+        _index_page = (body, gzip.compress(body, 9), hashlib.sha256(body).hexdigest()[:32])
+    return _index_page
 
 # Firebase Functions entry point
 @functions_framework.http
@@ -159,7 +62,20 @@ def app(request):
     
     elif request.method == 'GET':
         # Serve the main page
-        return (render_template_string(INDEX_HTML), 200, headers)
+        body, compressed_body, etag = index_page()
+        headers.update({
+            'Content-Type': 'text/html; charset=utf-8',
+            'Cache-Control': f'public, max-age={PAGE_MAX_AGE}',
+            'Vary': 'Accept-Encoding'
+        })
+        # The gzip body is a different representation, so it gets its own strong ETag
+        if request.accept_encodings['gzip']:
+            body, etag = compressed_body, f'{etag}-gzip'
+            headers['Content-Encoding'] = 'gzip'
+        headers['ETag'] = f'"{etag}"'
+        if request.if_none_match.contains(etag):
+            return ('', 304, headers)
+        return (body, 200, headers)
     
     return (jsonify({'error': 'Method not allowed'}), 405, headers)
 
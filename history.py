@@ -0,0 +1,297 @@
+"""Conversion history in a local SQLite database.
+
+Every conversion is queued to a writer thread that parses it off the
+request path and stores it in batches: one row per conversion, holding
+both configs zlib-compressed, and one row per interface with its old and
+new names, ctag, PW-Ether ID and description. An FTS5 index over the
+interface rows answers lookups by circuit ID, customer, interface name or
+PW-Ether ID in milliseconds. Connections come from a small pool and the
+database runs in WAL mode, so searches never wait on the writer.
+"""
+
+from contextlib import contextmanager
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from converter import iter_interface_blocks
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    source TEXT NOT NULL,
+    access_level TEXT,
+    pw_ether_id TEXT NOT NULL,
+    interfaces INTEGER NOT NULL,
+    old_config BLOB NOT NULL,
+    new_config BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS interfaces (
+    id INTEGER PRIMARY KEY,
+    conversion_id INTEGER NOT NULL REFERENCES conversions(id),
+    old_name TEXT NOT NULL,
+    new_name TEXT,
+    ctag TEXT,
+    pw_ether_id TEXT NOT NULL,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS interfaces_conversion ON interfaces(conversion_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS interface_search USING fts5(
+    description, old_name, new_name, pw_ether_id,
+    content='interfaces', content_rowid='id', prefix='3'
+);
+"""
+
+# Words and numbers; everything else (':', '.', '/', '_') separates FTS tokens
+TOKEN_RE = re.compile(r'[A-Za-z0-9]+')
+# Matches the prefix index: shorter prefixes would expand to most of the vocabulary
+MIN_PREFIX_CHARS = 3
+
+def search_expression(text, prefix=True):
+    """FTS5 query for free text: its tokens as one phrase, the last matched as a prefix
+
+    "994614384:FIB" and "SANASA_DEVELOPMENT" match descriptions the way
+    they are pasted, and "SANASA_DEV" finds them too. A last token shorter
+    than MIN_PREFIX_CHARS must match exactly.
+    """
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    expression = '"' + ' '.join(tokens) + '"'
+    return expression + '*' if prefix and len(tokens[-1]) >= MIN_PREFIX_CHARS else expression
+
+def interface_rows(old_config, pw_ether_id):
+    """(old_name, new_name, ctag, description) for each interface block of a config"""
+    rows = []
+    for interface in iter_interface_blocks(old_config.split('\n')):
+        description = None
+        for line in interface.lines:
+            if line.startswith('description '):
+                description = line[len('description '):]
+                break
+        converted = interface.parent is not None
+        rows.append((
+            interface.name[len('interface '):],
+            interface.pw_ether_name(pw_ether_id) if converted else None,
+            interface.suffix if converted else interface.ctag,
+            description,
+        ))
+    return rows
+
+class ConnectionPool:
+    """A fixed number of SQLite connections shared between threads"""
+
+    def __init__(self, path, size=4, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                                     isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    @contextmanager
+    def connection(self):
+        connection = self._idle.get(timeout=self.timeout)
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+class ConversionHistory:
+    """Batched writer and search front end for the history database
+
+    ``record`` only queues; the writer thread commits up to ``batch_size``
+    conversions per transaction, waiting at most ``flush_interval`` seconds
+    to fill a batch. When ``max_pending`` conversions are already waiting,
+    new ones are dropped and counted rather than slowing requests down.
+    """
+
+    def __init__(self, path, pool_size=4, batch_size=64, flush_interval=0.5, max_pending=1024):
+        self.path = path
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._pool = None
+        self._writer = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def pool(self):
+        # Opened on first use, so gunicorn's forked workers each get their own connections
+        with self._lock:
+            if self._pool is None:
+                pool = ConnectionPool(self.path, self.pool_size)
+                with pool.connection() as connection:
+                    connection.executescript(SCHEMA)
+                self._pool = pool
+            return self._pool
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+                self._writer.start()
+
+    def record(self, old_config, new_config, pw_ether_id, source='convert', access_level=None):
+        """Queue a finished conversion for storage; returns False if it was dropped"""
+        self._ensure_writer()
+        try:
+            self._pending.put_nowait((time.time(), source, access_level, pw_ether_id, old_config, new_config))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=10):
+        """Wait until everything queued so far has been written"""
+        marker = threading.Event()
+        self._ensure_writer()
+        self._pending.put(marker, timeout=timeout)
+        return marker.wait(timeout)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not isinstance(batch[-1], threading.Event):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            records = [item for item in batch if not isinstance(item, threading.Event)]
+            try:
+                if records:
+                    self._write(records)
+            except Exception:
+                # History is best effort; a bad batch must not stop later ones
+                self.failed += len(records)
+                logger.exception('Failed to store %d conversions in %s', len(records), self.path)
+            finally:
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()
+
+    def _write(self, records):
+        prepared = []
+        for created, source, access_level, pw_ether_id, old_config, new_config in records:
+            rows = interface_rows(old_config, pw_ether_id)
+            prepared.append((created, source, access_level, pw_ether_id, rows,
+                             zlib.compress(old_config.encode()), zlib.compress(new_config.encode())))
+
+        with self.pool.connection() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                for created, source, access_level, pw_ether_id, rows, old_blob, new_blob in prepared:
+                    conversion_id = connection.execute(
+                        'INSERT INTO conversions (created, source, access_level, pw_ether_id, interfaces, '
+                        'old_config, new_config) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (created, source, access_level, pw_ether_id, len(rows), old_blob, new_blob)).lastrowid
+                    first_id = connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM interfaces').fetchone()[0]
+                    connection.executemany(
+                        'INSERT INTO interfaces (id, conversion_id, old_name, new_name, ctag, pw_ether_id, description) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        [(first_id + offset, conversion_id, old_name, new_name, ctag, pw_ether_id, description)
+                         for offset, (old_name, new_name, ctag, description) in enumerate(rows)])
+                    connection.executemany(
+                        'INSERT INTO interface_search (rowid, description, old_name, new_name, pw_ether_id) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        [(first_id + offset, description, old_name, new_name, pw_ether_id)
+                         for offset, (old_name, new_name, _, description) in enumerate(rows)])
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        self.written += len(records)
+        self.batches += 1
+
+    def search(self, text, limit=50):
+        """Most recent interface records matching free text, newest first
+
+        The exact phrase is tried first. A prefix query has to merge the
+        matches of every term it expands to, so it only runs when nothing
+        matches exactly, as when a name is still being typed.
+        """
+        exact = search_expression(text, prefix=False)
+        if exact is None:
+            return []
+        with self.pool.connection() as connection:
+            rows = self._search(connection, exact, limit)
+            expression = search_expression(text)
+            if not rows and expression != exact:
+                rows = self._search(connection, expression, limit)
+        return [{
+            'conversion_id': conversion_id,
+            'created': created,
+            'old_name': old_name,
+            'new_name': new_name,
+            'ctag': ctag,
+            'pw_ether_id': pw_ether_id,
+            'description': description,
+        } for conversion_id, created, old_name, new_name, ctag, pw_ether_id, description in rows]
+
+    def _search(self, connection, expression, limit):
+        # Newest first straight off the FTS index, so a common term never sorts every match
+        return connection.execute(
+            'SELECT i.conversion_id, c.created, i.old_name, i.new_name, i.ctag, i.pw_ether_id, i.description '
+            'FROM (SELECT rowid FROM interface_search WHERE interface_search MATCH ? '
+            'ORDER BY rowid DESC LIMIT ?) AS found '
+            'JOIN interfaces i ON i.id = found.rowid JOIN conversions c ON c.id = i.conversion_id '
+            'ORDER BY i.id DESC',
+            (expression, limit)).fetchall()
+
+    def get(self, conversion_id):
+        """A stored conversion with both configs, or None"""
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                'SELECT id, created, source, access_level, pw_ether_id, interfaces, old_config, new_config '
+                'FROM conversions WHERE id = ?', (conversion_id,)).fetchone()
+        if row is None:
+            return None
+        conversion_id, created, source, access_level, pw_ether_id, interfaces, old_blob, new_blob = row
+        return {
+            'conversion_id': conversion_id,
+            'created': created,
+            'source': source,
+            'access_level': access_level,
+            'pw_ether_id': pw_ether_id,
+            'interfaces': interfaces,
+            'old_config': zlib.decompress(old_blob).decode(),
+            'new_config': zlib.decompress(new_blob).decode(),
+        }
+
+    def stats(self):
+        return {
+            'written': self.written,
+            'pending': self._pending.qsize(),
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+        }
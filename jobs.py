@@ -0,0 +1,212 @@
+"""In-process asynchronous conversion jobs.
+
+A fixed pool of worker threads takes jobs from a bounded queue, so no
+external broker is needed. Each job is a list of conversion tasks run
+through convert_configuration with a progress callback, and every state
+change bumps a version number that SSE streams wait on. Jobs live in the
+process that accepted them; finished ones are kept for ``result_ttl``
+seconds. A job may carry an owner, whose outstanding jobs are capped, and
+a deadline after which its remaining tasks are abandoned.
+"""
+
+import json
+import queue
+import threading
+import time
+import uuid
+
+from admission import DeadlineExceeded
+from converter import convert_configuration
+
+class QueueFull(Exception):
+    """Raised when the job queue has no room for another job"""
+
+class OwnerLimitReached(QueueFull):
+    """Raised when a job's owner already has as many jobs outstanding as it may"""
+
+class Job:
+    __slots__ = ('id', 'tasks', 'batch', 'owner', 'deadline', 'status', 'created', 'started', 'finished',
+                 'done', 'total', 'current_interface', 'results', 'version', 'condition')
+
+    def __init__(self, tasks, batch, owner=None, deadline=None):
+        self.id = uuid.uuid4().hex
+        self.tasks = tasks
+        self.batch = batch
+        self.owner = owner
+        # Seconds the job may run for once a worker picks it up
+        self.deadline = deadline
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.done = 0
+        self.total = 0
+        self.current_interface = None
+        self.results = [None] * len(tasks)
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def update(self, **fields):
+        with self.condition:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        """Block until the job moves past ``version`` or ``timeout`` passes; return the current version"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    @property
+    def finished_running(self):
+        return self.status in ('done', 'failed')
+
+    def progress(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'interface': self.current_interface,
+        }
+
+    def to_dict(self, include_result=True):
+        data = self.progress()
+        data.update({
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        })
+        if include_result and self.finished_running:
+            if self.batch:
+                data['results'] = self.results
+            else:
+                data.update(self.results[0])
+        return data
+
+class JobQueue:
+    def __init__(self, workers=2, max_queue=100, result_ttl=900):
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        # Threads start lazily so gunicorn's forked workers each get their own
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f'job-worker-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, tasks, batch=False, owner=None, owner_limit=None, deadline=None):
+        """Queue a list of {old_config, pw_ether_id, label} tasks; return the Job
+
+        With ``owner_limit``, OwnerLimitReached is raised if ``owner``
+        already has that many jobs queued or running.
+        """
+        self._ensure_workers()
+        self._expire()
+        job = Job(tasks, batch, owner, deadline)
+        with self._lock:
+            if owner_limit is not None:
+                outstanding = sum(1 for other in self._jobs.values()
+                                  if other.owner == owner and not other.finished_running)
+                if outstanding >= owner_limit:
+                    raise OwnerLimitReached()
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFull()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            'queued': statuses.count('queued'),
+            'running': statuses.count('running'),
+            'retained': len(statuses),
+            'queue_capacity': self._queue.maxsize,
+        }
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        job.update(status='running', started=time.time())
+        failures = 0
+        deadline = time.monotonic() + job.deadline if job.deadline is not None else None
+
+        for index, task in enumerate(job.tasks):
+            start = time.perf_counter()
+            base = job.done
+
+            def progress(done, total, interface, base=base):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise DeadlineExceeded(f'Job exceeded its {job.deadline}s deadline')
+                # The block count of each task is only known once it has been parsed
+                job.update(done=base + done, total=max(job.total, base + total),
+                           current_interface=interface.name)
+
+            result = {'label': task.get('label')}
+            try:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise DeadlineExceeded(f'Job exceeded its {job.deadline}s deadline')
+                new_config = convert_configuration(task['old_config'], task['pw_ether_id'], progress)
+                result.update({'success': True, 'new_config': new_config})
+            except DeadlineExceeded as e:
+                failures += 1
+                result.update({'success': False, 'error': str(e)})
+            except Exception as e:
+                failures += 1
+                result.update({'success': False, 'error': f'Conversion failed: {str(e)}'})
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            job.results[index] = result
+
+        status = 'failed' if failures == len(job.tasks) else 'done'
+        job.update(status=status, finished=time.time(), current_interface=None,
+                   total=max(job.total, job.done))
+
+def iter_job_events(job, heartbeat=15):
+    """Yield Server-Sent Events with the job's progress until it finishes
+
+    Updates that land while a client is catching up are coalesced into one
+    event carrying the latest progress.
+    """
+    version = None
+    while True:
+        current = job.version
+        if current != version:
+            version = current
+            yield f"event: progress\ndata: {json.dumps(job.progress())}\n\n"
+            if job.finished_running:
+                yield f"event: {job.status}\ndata: {json.dumps(job.to_dict(include_result=False))}\n\n"
+                return
+        if job.wait_for_change(version, heartbeat) == version:
+            yield ': keep-alive\n\n'
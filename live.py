@@ -0,0 +1,157 @@
+"""Incremental, block-level conversion for live editing.
+
+A session keeps the interface blocks of one configuration and their
+converted text. Edits arrive as deltas that replace a run of blocks with
+whatever blocks some new text parses to, so only the edited text is parsed
+again. Each block's conversion is memoised under its content hash and the
+PW-Ether ID, and the migration section is rebuilt from the block headers,
+which costs far less than parsing. Sessions live in the process that
+created them.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+import uuid
+
+from conversion_cache import ENGINE_FINGERPRINT
+from converter import convert_interface_config, generate_migration_section, parse_interface_config
+
+class InvalidDelta(ValueError):
+    """Raised when a delta does not fit the session's current blocks"""
+
+class RevisionConflict(Exception):
+    """Raised when a delta was computed against an older revision of the session"""
+
+def block_key(interface, pw_ether_id):
+    """Content hash of one interface block's conversion"""
+    digest = hashlib.sha256()
+    digest.update(ENGINE_FINGERPRINT.encode())
+    digest.update(b'\0')
+    digest.update(pw_ether_id.encode())
+    digest.update(b'\0')
+    digest.update('\n'.join(interface.lines).encode())
+    return digest.hexdigest()
+
+def convert_blocks(text, pw_ether_id, block_cache):
+    """Parse ``text`` and return its blocks with their (memoised) conversions"""
+    interfaces = parse_interface_config(text)
+    converted = []
+    for interface in interfaces:
+        key = block_key(interface, pw_ether_id)
+        result = block_cache.get(key)
+        if result is None:
+            result = convert_interface_config(interface, pw_ether_id)
+            block_cache.put(key, result)
+        converted.append(result)
+        # Only the header fields are needed from here on, for the migration section
+        interface.lines = None
+    return interfaces, converted
+
+class LiveSession:
+    __slots__ = ('id', 'pw_ether_id', 'interfaces', 'converted', 'revision', 'touched', 'lock')
+
+    def __init__(self, pw_ether_id, interfaces, converted, now):
+        self.id = uuid.uuid4().hex
+        self.pw_ether_id = pw_ether_id
+        self.interfaces = interfaces
+        self.converted = converted
+        self.revision = 0
+        self.touched = now
+        self.lock = threading.Lock()
+
+    def migration_section(self):
+        return generate_migration_section(self.interfaces, self.pw_ether_id)
+
+    def snapshot(self):
+        """Every converted block plus the migration section"""
+        return {
+            'session_id': self.id,
+            'revision': self.revision,
+            'blocks': list(self.converted),
+            'migration_section': self.migration_section(),
+        }
+
+class LiveSessions:
+    """Per-process store of live sessions, evicted by idle time and count"""
+
+    def __init__(self, block_cache, max_sessions=256, ttl=1800, clock=time.monotonic):
+        self.block_cache = block_cache
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, old_config, pw_ether_id):
+        interfaces, converted = convert_blocks(old_config, pw_ether_id, self.block_cache)
+        session = LiveSession(pw_ether_id, interfaces, converted, self.clock())
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touched = self.clock()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def apply(self, session, changes, revision=None):
+        """Apply ``changes`` in order and return only what they produced
+
+        Each change is {start, end, text}: blocks[start:end] are replaced by
+        the blocks parsed from ``text``, with indexes relative to the blocks
+        as left by the previous change. If ``revision`` is given it must
+        match the session's, so a client that missed an update resyncs
+        instead of splicing into the wrong blocks.
+        """
+        with session.lock:
+            if revision is not None and revision != session.revision:
+                raise RevisionConflict(f'Session is at revision {session.revision}, not {revision}')
+
+            # Validate every change before touching the session
+            count = len(session.converted)
+            parsed = []
+            for change in changes:
+                start, end, text = change.get('start'), change.get('end'), change.get('text', '')
+                if not isinstance(start, int) or not isinstance(end, int) or not isinstance(text, str):
+                    raise InvalidDelta('Each change needs integer start and end and a text string')
+                if not 0 <= start <= end <= count:
+                    raise InvalidDelta(f'Change {start}:{end} is outside the {count} blocks')
+                interfaces, converted = convert_blocks(text, session.pw_ether_id, self.block_cache)
+                parsed.append((start, end, interfaces, converted))
+                count += len(converted) - (end - start)
+
+            results = []
+            for start, end, interfaces, converted in parsed:
+                session.interfaces[start:end] = interfaces
+                session.converted[start:end] = converted
+                results.append({'start': start, 'removed': end - start, 'blocks': converted})
+            session.revision += 1
+
+            return {
+                'session_id': session.id,
+                'revision': session.revision,
+                'block_count': len(session.converted),
+                'changes': results,
+                'migration_section': session.migration_section(),
+            }
+
+    def stats(self):
+        with self._lock:
+            return {'sessions': len(self._sessions), 'block_cache': self.block_cache.stats()}
+
+    def _expire(self):
+        cutoff = self.clock() - self.ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.touched > cutoff:
+                break
+            del self._sessions[session_id]
@@ -0,0 +1,215 @@
+"""On-demand profiling of single requests.
+
+A request carrying ``X-Profile`` runs under one of two profilers:
+``cprofile`` (also ``1``) traces every call with cProfile and is saved as a
+pstats file, and ``sample`` snapshots the request thread's stack every few
+milliseconds and is saved as collapsed stacks ("a;b;c 12" lines) for
+flamegraph.pl, speedscope or similar. Work handed to the batch process
+pool is profiled in the worker and merged into the request's profile.
+Profiles are written to a directory, keyed by request ID, so any worker
+can serve them back. Requests without the header are not touched.
+
+From Python 3.12 cProfile can run in only one thread of a process at a
+time and records every thread while it runs, so a cProfile of a request
+in a threaded worker also counts its concurrent requests; the sampler
+only ever looks at the request's own thread.
+"""
+
+from collections import Counter
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+
+PROFILE_HEADER = 'X-Profile'
+REQUEST_ID_HEADER = 'X-Request-ID'
+PROFILE_MODES = {'1': 'cprofile', 'true': 'cprofile', 'cprofile': 'cprofile', 'sample': 'sample'}
+PROFILE_SUFFIXES = {'cprofile': '.prof', 'sample': '.collapsed'}
+# Requests may name themselves; anything else gets a fresh ID
+REQUEST_ID_RE = re.compile(r'[A-Za-z0-9_-]{1,64}\Z')
+
+# The cProfile running in this process, if any. A batch worker forked while
+# it runs would otherwise inherit it and keep profiling every later job.
+_active_cprofile = None
+
+def _disable_inherited_profiler():
+    global _active_cprofile
+    if _active_cprofile is not None:
+        _active_cprofile.disable()
+        _active_cprofile = None
+
+os.register_at_fork(after_in_child=_disable_inherited_profiler)
+
+class ProfilerBusy(Exception):
+    """Raised when cProfile is already running for another request in this process"""
+
+def profile_mode(header_value):
+    """Profiler named by an X-Profile header value, None when profiling is off"""
+    value = (header_value or '').strip().lower()
+    if value in ('', '0', 'false'):
+        return None
+    try:
+        return PROFILE_MODES[value]
+    except KeyError:
+        raise ValueError(f'Unknown profile mode {header_value!r}, expected 1, cprofile or sample') from None
+
+def request_id(header_value):
+    header_value = (header_value or '').strip()
+    return header_value if REQUEST_ID_RE.match(header_value) else uuid.uuid4().hex
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Counts the stacks one thread is seen in, sampled from a background thread"""
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        current_frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                labels.reverse()
+                self.stacks[';'.join(labels)] += 1
+
+class _StatsData:
+    """Lets pstats.Stats load a stats dict returned from another process"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+class Profile:
+    """One request's profile; ``data()`` is picklable and ``merge`` adds another profile's data"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.started = None
+        self.elapsed = None
+        self._profiler = None
+        self._merged = []
+
+    def start(self):
+        global _active_cprofile
+        self.started = time.perf_counter()
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError as e:
+                raise ProfilerBusy(str(e)) from None
+            _active_cprofile = self._profiler
+        else:
+            self._profiler = StackSampler(threading.get_ident())
+            self._profiler.start()
+
+    def stop(self):
+        global _active_cprofile
+        if self.mode == 'cprofile':
+            self._profiler.disable()
+            _active_cprofile = None
+        else:
+            self._profiler.stop()
+        self.elapsed = time.perf_counter() - self.started
+
+    def data(self):
+        if self.mode == 'cprofile':
+            return pstats.Stats(self._profiler).stats
+        return dict(self._profiler.stacks)
+
+    def merge(self, data):
+        self._merged.append(data)
+
+    def save(self, path):
+        if self.mode == 'cprofile':
+            stats = pstats.Stats(self._profiler)
+            for data in self._merged:
+                stats.add(_StatsData(data))
+            stats.dump_stats(path)
+            return
+        stacks = Counter(self._profiler.stacks)
+        for data in self._merged:
+            stacks.update(data)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+def profiled_call(mode, function, *args):
+    """Run ``function(*args)`` under a fresh profile, returning (result, profile data); used in worker processes"""
+    profile = Profile(mode)
+    profile.start()
+    try:
+        result = function(*args)
+    finally:
+        profile.stop()
+    return result, profile.data()
+
+class ProfileStore:
+    """Saved profiles in a directory, keeping the newest ``max_profiles``"""
+
+    def __init__(self, directory, max_profiles=100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, profile_id, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, profile_id + PROFILE_SUFFIXES[profile.mode])
+        profile.save(path)
+        self._prune()
+        return path
+
+    def find(self, profile_id):
+        """(path, mode) of a saved profile, or None"""
+        if not REQUEST_ID_RE.match(profile_id):
+            return None
+        for mode, suffix in PROFILE_SUFFIXES.items():
+            path = os.path.join(self.directory, profile_id + suffix)
+            if os.path.exists(path):
+                return path, mode
+        return None
+
+    def _prune(self):
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+            except FileNotFoundError:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:max(0, len(entries) - self.max_profiles)]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+def stats_text(path, limit=60):
+    """Top functions of a saved cProfile by cumulative time, as text"""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
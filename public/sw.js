@@ -1,46 +1,60 @@
-const CACHE_NAME = 'pwhe-config-generator-v1';
-const urlsToCache = [
-  '/',
-  '/static/css/style.css',
-  '/static/js/app.js',
-  '/manifest.json'
-];
+// The Flask app replaces this line with the manifest of the assets it is serving
+const ASSET_MANIFEST = {"version": "static", "assets": ["/", "/manifest.json", "/icons/icon-32x32.png", "/icons/icon-192x192.png", "/icons/icon-512x512.png"]};
+const CACHE_NAME = 'pwhe-config-generator-' + ASSET_MANIFEST.version;
+const PRECACHED = new Set(ASSET_MANIFEST.assets);
 
-// Install event - cache resources
+// Install event - cache the current asset manifest
 self.addEventListener('install', event => {
   event.waitUntil(
     caches.open(CACHE_NAME)
-      .then(cache => {
-        console.log('Opened cache');
-        return cache.addAll(urlsToCache);
-      })
+      .then(cache => cache.addAll(ASSET_MANIFEST.assets))
+      .then(() => self.skipWaiting())
   );
 });
 
-// Fetch event - serve from cache when offline
+// Fetch event - hashed assets come from the cache; the page shell is
+// revalidated against the network and falls back to the cache offline
 self.addEventListener('fetch', event => {
-  event.respondWith(
-    caches.match(event.request)
-      .then(response => {
-        // Return cached version or fetch from network
-        return response || fetch(event.request);
-      })
-  );
+  const request = event.request;
+  if (request.method !== 'GET') {
+    return;
+  }
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+
+  if (request.mode === 'navigate') {
+    event.respondWith(
+      fetch(request)
+        .then(response => {
+          if (response.ok) {
+            const copy = response.clone();
+            caches.open(CACHE_NAME).then(cache => cache.put('/', copy));
+          }
+          return response;
+        })
+        .catch(() => caches.match('/'))
+    );
+    return;
+  }
+
+  if (PRECACHED.has(url.pathname)) {
+    event.respondWith(
+      caches.match(request).then(response => response || fetch(request))
+    );
+  }
 });
 
-// Activate event - clean up old caches
+// Activate event - drop caches from earlier asset manifests
 self.addEventListener('activate', event => {
   event.waitUntil(
-    caches.keys().then(cacheNames => {
-      return Promise.all(
-        cacheNames.map(cacheName => {
-          if (cacheName !== CACHE_NAME) {
-            console.log('Deleting old cache:', cacheName);
-            return caches.delete(cacheName);
-          }
-        })
-      );
-    })
+    caches.keys()
+      .then(cacheNames => Promise.all(
+        cacheNames
+          .filter(cacheName => cacheName.startsWith('pwhe-config-generator-') && cacheName !== CACHE_NAME)
+          .map(cacheName => caches.delete(cacheName))
+      ))
+      .then(() => self.clients.claim())
   );
 });
-
@@ -0,0 +1 @@
+"""Offline bulk conversion tools for the PW-HE Config Generator"""
@@ -0,0 +1,5 @@
+import sys
+
+from pwheconfig.cli import main
+
+sys.exit(main())
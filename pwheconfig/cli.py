@@ -0,0 +1,273 @@
+"""
+Offline bulk converter for directories or tarballs of saved running-configs.
+
+Usage:
+    python -m pwheconfig CONFIGS --mapping mapping.csv --output out/
+    python -m pwheconfig - --device csr-01 --mapping mapping.csv < csr-01.txt
+
+CONFIGS is a directory of ``<device>.txt`` (or .cfg/.conf/.log) files, a
+tar archive of them, a single config file, or ``-`` for one config on
+standard input. The mapping CSV has a ``pw_ether_id`` column and a
+``device`` and/or ``parent_port`` column; an interface takes the ID of the
+row matching its device and parent port, then its device alone, then its
+parent port alone. Each device is converted in a worker process that reads
+the file through mmap, and one ``<device>.txt`` is written per device plus a
+``summary.json`` with throughput numbers. The Flask app is never imported.
+
+Exit status is 0 when every device converted, 1 when some device had no
+mapped interfaces or failed, and 2 for an unusable mapping or source.
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# The engine modules sit at the top of the repository, next to this package. Appended, so a
+# converter installed elsewhere on the path still wins, and the CLI runs from any directory.
+_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from converter import iter_interface_blocks, convert_interface_config, generate_migration_section
+from running_config import normalise_port
+
+CONFIG_SUFFIXES = ('.txt', '.cfg', '.conf', '.log')
+# Device name for a config read from standard input, unless --device gives one
+STDIN_DEVICE = 'stdin'
+
+def load_mapping(path):
+    """Load the CSV mapping into a {(device, parent_port): pw_ether_id} dict"""
+    mapping = {}
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        fields = set(reader.fieldnames or ())
+        if 'pw_ether_id' not in fields or not fields & {'device', 'parent_port'}:
+            raise ValueError('Mapping CSV needs a pw_ether_id column and a device or parent_port column')
+        for row in reader:
+            pw_ether_id = (row.get('pw_ether_id') or '').strip()
+            if not pw_ether_id:
+                continue
+            device = (row.get('device') or '').strip()
+            parent_port = normalise_port(row.get('parent_port') or '')
+            mapping[(device, parent_port)] = pw_ether_id
+    return mapping
+
+def resolve_pw_ether_id(mapping, device, parent_port):
+    for key in ((device, parent_port or ''), (device, ''), ('', parent_port or '')):
+        if key[0] == '' and key[1] == '':
+            continue
+        if key in mapping:
+            return mapping[key]
+    return None
+
+def device_name(filename):
+    name = os.path.basename(filename)
+    for suffix in CONFIG_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def iter_mapped_lines(path, offset=0, size=None):
+    """Yield decoded lines from a byte range of a file through a read-only mmap"""
+    with open(path, 'rb') as f:
+        if size is None:
+            size = os.fstat(f.fileno()).st_size - offset
+        if size <= 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            mapped.seek(offset)
+            end = offset + size
+            while mapped.tell() < end:
+                line = mapped.readline()
+                overrun = mapped.tell() - end
+                if overrun > 0:
+                    line = line[:-overrun]
+                yield line.decode('utf-8', errors='replace')
+
+def is_plain_tar(path):
+    try:
+        with tarfile.open(path, 'r:'):
+            return True
+    except tarfile.ReadError:
+        return False
+
+def collect_sources(source, workdir, device=None):
+    """Return (device, path, offset, size) for every config in a directory, tarball or file
+
+    ``-`` reads one config from standard input into the work directory, so
+    it is mapped like any other file. ``device`` names a stdin or single
+    file config instead of its file name.
+    """
+    if source == '-':
+        path = os.path.join(workdir, 'stdin.txt')
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(sys.stdin.buffer, f)
+        return [(device or STDIN_DEVICE, path, 0, None)]
+
+    if os.path.isdir(source):
+        sources = []
+        for entry in sorted(os.scandir(source), key=lambda e: e.name):
+            if entry.is_file() and not entry.name.startswith('.'):
+                sources.append((device_name(entry.name), entry.path, 0, None))
+        return sources
+
+    if not tarfile.is_tarfile(source):
+        return [(device or device_name(source), source, 0, None)]
+
+    with tarfile.open(source) as tar:
+        members = [m for m in tar.getmembers()
+                   if m.isfile() and not os.path.basename(m.name).startswith('.')]
+        members.sort(key=lambda m: m.name)
+
+        # Uncompressed archives are mapped in place at each member's data offset
+        if is_plain_tar(source):
+            return [(device_name(m.name), source, m.offset_data, m.size) for m in members]
+
+        # Compressed archives are unpacked to the work directory first
+        sources = []
+        for member in members:
+            path = os.path.join(workdir, f"{len(sources):06d}_{os.path.basename(member.name)}")
+            with tar.extractfile(member) as src, open(path, 'wb') as dst:
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            sources.append((device_name(member.name), path, 0, None))
+        return sources
+
+_worker_mapping = None
+_worker_output_dir = None
+
+def _init_worker(mapping, output_dir):
+    global _worker_mapping, _worker_output_dir
+    _worker_mapping = mapping
+    _worker_output_dir = output_dir
+
+def convert_device(device, path, offset, size):
+    """Convert one device config and write its output file; return its summary entry"""
+    start = time.perf_counter()
+    counts = {'lines': 0, 'bytes': 0}
+
+    def counted(lines):
+        for line in lines:
+            counts['lines'] += 1
+            counts['bytes'] += len(line.encode())
+            yield line
+
+    # Group blocks by target PW-Ether ID, keeping first-seen order
+    groups = {}
+    unmapped = 0
+    for interface in iter_interface_blocks(counted(iter_mapped_lines(path, offset, size))):
+        # Mapping keys are normalised, so Te0/0/0/1 in the CSV matches a Tengig0/0/0/1 parent
+        pw_ether_id = resolve_pw_ether_id(_worker_mapping, device, normalise_port(interface.parent or ''))
+        if pw_ether_id is None:
+            unmapped += 1
+        else:
+            groups.setdefault(pw_ether_id, []).append(interface)
+
+    entry = {
+        'device': device,
+        'pw_ether_ids': list(groups),
+        'interfaces': sum(len(interfaces) for interfaces in groups.values()),
+        'unmapped_interfaces': unmapped,
+        'lines': counts['lines'],
+        'bytes': counts['bytes'],
+    }
+
+    if groups:
+        sections = []
+        for pw_ether_id, interfaces in groups.items():
+            converted = [convert_interface_config(interface, pw_ether_id) for interface in interfaces]
+            converted.append(generate_migration_section(interfaces, pw_ether_id))
+            sections.append('\n\n'.join(converted))
+        output_path = os.path.join(_worker_output_dir, f"{device}.txt")
+        with open(output_path, 'w') as f:
+            f.write('\n\n'.join(sections))
+            f.write('\n')
+        entry['output'] = output_path
+    else:
+        entry['error'] = 'No interfaces matched the PW-Ether mapping'
+
+    entry['elapsed_s'] = round(time.perf_counter() - start, 6)
+    return entry
+
+def summarise(entries, elapsed, workers):
+    lines = sum(entry['lines'] for entry in entries)
+    size = sum(entry['bytes'] for entry in entries)
+    interfaces = sum(entry['interfaces'] for entry in entries)
+    rate = (lambda count: round(count / elapsed, 1)) if elapsed > 0 else (lambda count: None)
+    return {
+        'devices': len(entries),
+        'failed_devices': sum(1 for entry in entries if 'error' in entry),
+        'interfaces': interfaces,
+        'lines': lines,
+        'bytes': size,
+        'workers': workers,
+        'elapsed_s': round(elapsed, 6),
+        'lines_per_s': rate(lines),
+        'interfaces_per_s': rate(interfaces),
+        'mb_per_s': rate(size / 1e6),
+        'device_results': entries,
+    }
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='pwheconfig', description='Bulk-convert saved running-configs to PW-Ether format.')
+    parser.add_argument('source', help="directory or tar archive of device running-configs, one config file, or - for stdin")
+    parser.add_argument('-m', '--mapping', required=True, help='CSV mapping device and/or parent_port to pw_ether_id')
+    parser.add_argument('-d', '--device', help='device name for a single config file or stdin (default: file name or stdin)')
+    parser.add_argument('-o', '--output', default='pwhe_output', help='output directory (default: pwhe_output)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help='worker processes (default: CPU count)')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    try:
+        mapping = load_mapping(args.mapping)
+    except (OSError, ValueError) as e:
+        print(f"pwheconfig: {e}", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output, exist_ok=True)
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            sources = collect_sources(args.source, workdir, args.device)
+        except (OSError, tarfile.TarError) as e:
+            print(f"pwheconfig: cannot read {args.source}: {e}", file=sys.stderr)
+            return 2
+
+        workers = max(1, min(args.workers, len(sources) or 1))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(mapping, args.output)) as executor:
+            futures = [executor.submit(convert_device, *source) for source in sources]
+            entries = []
+            for (device, *_), future in zip(sources, futures):
+                try:
+                    entries.append(future.result())
+                except Exception as e:
+                    entries.append({'device': device, 'pw_ether_ids': [], 'interfaces': 0, 'unmapped_interfaces': 0,
+                                    'lines': 0, 'bytes': 0, 'error': f'Conversion failed: {str(e)}'})
+
+    summary = summarise(entries, time.perf_counter() - start, workers)
+    with open(os.path.join(args.output, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    for entry in entries:
+        if 'error' in entry:
+            print(f"{entry['device']}: {entry['error']}", file=sys.stderr)
+    print(f"Converted {summary['interfaces']} interfaces from {summary['devices']} devices "
+          f"({summary['lines']} lines) in {summary['elapsed_s']:.3f}s with {workers} workers: "
+          f"{summary['lines_per_s']} lines/s, {summary['mb_per_s']} MB/s")
+
+    return 1 if summary['failed_devices'] else 0
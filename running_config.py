@@ -0,0 +1,248 @@
+"""Indentation-aware index over a full IOS-XR running configuration.
+
+One pass over the text records where each top-level section starts and
+ends and indexes subinterfaces by parent port, outer VLAN, ctag and VRF,
+and policy-maps by name. Section children are only split out when they are
+asked for, so pasting a whole device config costs a single scan, and a
+selection such as "Gi0/0/0/14 outer 3513" is answered from the indexes
+instead of by rescanning the text.
+"""
+
+import re
+from sys import intern
+
+from converter import InterfaceBlock
+
+SUBINTERFACE_RE = re.compile(r'interface\s+(\S+)\.(\d+)(?:\s+l2transport)?\s*$')
+ENCAPSULATION_RE = re.compile(r'encapsulation dot1q (\d+)(?: second-dot1q (\d+))?')
+PORT_RE = re.compile(r'([A-Za-z][A-Za-z-]*?)-?(\d+(?:/\d+)*)$')
+
+# Abbreviations accepted for parent ports, checked in order against the lower-cased prefix
+PORT_TYPES = (
+    ('hu', 'HundredGigE'),
+    ('fo', 'FortyGigE'),
+    ('tw', 'TwentyFiveGigE'),
+    ('te', 'TenGigE'),
+    ('gi', 'GigabitEthernet'),
+    ('bundle-ether', 'Bundle-Ether'),
+    ('be', 'Bundle-Ether'),
+)
+
+SELECTION_KEYWORDS = ('outer', 'ctag', 'vrf')
+
+def normalise_port(port):
+    """Canonical name for a parent port, e.g. Gi0/0/0/14 -> GigabitEthernet0/0/0/14"""
+    match = PORT_RE.match(port.strip())
+    if not match:
+        return port.strip()
+    prefix, number = match.groups()
+    prefix = prefix.lower()
+    for abbreviation, full_name in PORT_TYPES:
+        if prefix.startswith(abbreviation):
+            return full_name + number
+    return match.group(1) + number
+
+def parse_selection(text):
+    """Parse "Gi0/0/0/14 outer 3513 [ctag 101] [vrf NAME]" into select() keywords"""
+    tokens = text.split()
+    criteria = {}
+    if tokens and tokens[0].lower() not in SELECTION_KEYWORDS:
+        criteria['parent'] = tokens.pop(0)
+    if len(tokens) % 2:
+        raise ValueError(f'Selection keyword {tokens[-1]!r} needs a value')
+    for keyword, value in zip(tokens[::2], tokens[1::2]):
+        keyword = keyword.lower()
+        if keyword not in SELECTION_KEYWORDS:
+            raise ValueError(f'Unknown selection keyword {keyword!r}, expected one of {", ".join(SELECTION_KEYWORDS)}')
+        criteria[keyword] = value
+    return criteria
+
+def _indent(line):
+    return len(line) - len(line.lstrip())
+
+class ConfigNode:
+    """A section of the configuration: its header line and the lines indented beneath it"""
+    __slots__ = ('lines', 'start', 'end', '_children')
+
+    def __init__(self, lines, start, end):
+        self.lines = lines
+        self.start = start
+        self.end = end
+        self._children = None
+
+    @property
+    def text(self):
+        return self.lines[self.start].strip()
+
+    @property
+    def children(self):
+        """Child sections, split out on first access"""
+        if self._children is None:
+            self._children = self._split_children()
+        return self._children
+
+    def _split_children(self):
+        children = []
+        child_indent = None
+        child_start = None
+        for index in range(self.start + 1, self.end):
+            line = self.lines[index]
+            stripped = line.strip()
+            if not stripped:
+                continue
+            indent = _indent(line)
+            if child_indent is None:
+                if stripped == '!':
+                    continue
+                child_indent = indent
+            if indent <= child_indent:
+                if child_start is not None:
+                    children.append(ConfigNode(self.lines, child_start, index))
+                # A bare '!' at the child level only closes the previous child
+                child_start = None if stripped == '!' else index
+        if child_start is not None:
+            children.append(ConfigNode(self.lines, child_start, self.end))
+        return children
+
+    def child(self, text):
+        """First child whose header is ``text``, or None"""
+        for node in self.children:
+            if node.text == text:
+                return node
+        return None
+
+    def iter_lines(self):
+        """Stripped, non-blank lines of the section, header first"""
+        for index in range(self.start, self.end):
+            line = self.lines[index].strip()
+            if line:
+                yield line
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.text!r}, lines={self.end - self.start})"
+
+class InterfaceSection(ConfigNode):
+    """An ``interface X.Y`` section with the fields it is indexed by"""
+    __slots__ = ('parent', 'subinterface', 'outer', 'ctag', 'vrf')
+
+    def __init__(self, lines, start, end, parent, subinterface):
+        super().__init__(lines, start, end)
+        self.parent = parent
+        self.subinterface = subinterface
+        self.outer = None
+        self.ctag = None
+        self.vrf = None
+
+    def to_block(self):
+        """InterfaceBlock as parse_interface_config would build it from a hand-cut paste"""
+        lines = self.iter_lines()
+        block = InterfaceBlock(next(lines))
+        for line in lines:
+            block.append(line)
+        block.append('!')
+        return block
+
+class RunningConfig:
+    """Top-level sections of a running configuration plus lookup indexes"""
+
+    def __init__(self, config_text):
+        self.lines = config_text.split('\n')
+        self.sections = []
+        self.interfaces = {}
+        self.policy_maps = {}
+        self.by_parent = {}
+        self.by_outer = {}
+        self.by_ctag = {}
+        self.by_vrf = {}
+        self._bridge_groups = None
+        self._index()
+
+    def _index(self):
+        lines = self.lines
+        start = None
+        for index, line in enumerate(lines):
+            if not line or line[0].isspace():
+                continue
+            if start is not None:
+                self._add_section(start, index)
+            # Top-level sections start at column 0; '!' lines there only separate them
+            start = None if line[0] == '!' else index
+        if start is not None:
+            self._add_section(start, len(lines))
+
+    def _add_section(self, start, end):
+        header = self.lines[start].strip()
+        match = SUBINTERFACE_RE.match(header) if header.startswith('interface ') else None
+        if match is None:
+            node = ConfigNode(self.lines, start, end)
+            if header.startswith('interface '):
+                self.interfaces[header] = node
+            elif header.startswith('policy-map '):
+                self.policy_maps[header[len('policy-map '):].strip()] = node
+            self.sections.append(node)
+            return
+
+        # Ports, outer VLANs and VRFs repeat across thousands of sections, so the indexed values are interned
+        node = InterfaceSection(self.lines, start, end, intern(normalise_port(match.group(1))), match.group(2))
+        for index in range(start + 1, end):
+            line = self.lines[index].strip()
+            if node.outer is None and line.startswith('encapsulation dot1q '):
+                encapsulation = ENCAPSULATION_RE.match(line)
+                if encapsulation:
+                    outer, ctag = encapsulation.groups()
+                    node.outer = intern(outer)
+                    node.ctag = ctag if ctag is None else intern(ctag)
+            elif node.vrf is None and line.startswith('vrf '):
+                node.vrf = intern(line[4:].strip())
+        self.sections.append(node)
+        self.interfaces[header] = node
+        self.by_parent.setdefault(node.parent, []).append(node)
+        if node.outer is not None:
+            self.by_outer.setdefault(node.outer, []).append(node)
+        if node.ctag is not None:
+            self.by_ctag.setdefault(node.ctag, []).append(node)
+        if node.vrf is not None:
+            self.by_vrf.setdefault(node.vrf, []).append(node)
+
+    @property
+    def subinterfaces(self):
+        return [node for node in self.sections if isinstance(node, InterfaceSection)]
+
+    @property
+    def bridge_groups(self):
+        """{group name: {bridge-domain name: [attached interface names]}}, built on first access"""
+        if self._bridge_groups is None:
+            groups = {}
+            for section in self.sections:
+                if section.text != 'l2vpn':
+                    continue
+                for group in section.children:
+                    if not group.text.startswith('bridge group '):
+                        continue
+                    domains = groups.setdefault(group.text[len('bridge group '):], {})
+                    for domain in group.children:
+                        if domain.text.startswith('bridge-domain '):
+                            domains[domain.text[len('bridge-domain '):]] = [
+                                node.text[len('interface '):] for node in domain.children
+                                if node.text.startswith('interface ')]
+            self._bridge_groups = groups
+        return self._bridge_groups
+
+    def select(self, parent=None, outer=None, ctag=None, vrf=None):
+        """Subinterfaces matching every given criterion, in configuration order"""
+        criteria = []
+        if parent is not None:
+            criteria.append(('parent', normalise_port(parent), self.by_parent))
+        if outer is not None:
+            criteria.append(('outer', str(outer), self.by_outer))
+        if ctag is not None:
+            criteria.append(('ctag', str(ctag), self.by_ctag))
+        if vrf is not None:
+            criteria.append(('vrf', vrf, self.by_vrf))
+        if not criteria:
+            return self.subinterfaces
+
+        # Start from the smallest index bucket and filter it on the other fields
+        candidates = min((index.get(value, []) for _, value, index in criteria), key=len)
+        return [node for node in candidates
+                if all(getattr(node, field) == value for field, value, _ in criteria)]
@@ -0,0 +1,90 @@
+"""Page shell and static assets, built once per process.
+
+The index page is rendered a single time at startup and its inline
+stylesheet and script are split out into files named by their content
+hash, so the shell itself stays small and the assets can be cached by
+browsers forever. Every asset is held in memory together with its
+precompressed encodings and an ETag; the service worker script is
+generated from the same manifest so it always precaches what is actually
+being served.
+"""
+
+import hashlib
+import json
+import re
+
+from compression import STATIC_ENCODERS
+
+ASSET_PREFIX = '/assets/'
+STYLE_RE = re.compile(r'[ \t]*<style>\n?(.*?)[ \t]*</style>\n?', re.S)
+# Inline scripts only; <script src=...> tags are left where they are
+SCRIPT_RE = re.compile(r'[ \t]*<script>\n?(.*?)[ \t]*</script>\n?', re.S)
+# The line of public/sw.js that carries the manifest, swapped for the real one
+SW_MANIFEST_RE = re.compile(r'^const ASSET_MANIFEST = .*;$', re.M)
+# Files from public/ the shell links to, precached by the service worker
+PUBLIC_ASSETS = ('/manifest.json', '/icons/icon-32x32.png', '/icons/icon-192x192.png', '/icons/icon-512x512.png')
+
+class Asset:
+    """One response body with its precompressed encodings"""
+    __slots__ = ('body', 'content_type', 'etag', 'encoded')
+
+    def __init__(self, body, content_type):
+        if isinstance(body, str):
+            body = body.encode()
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.encoded = {}
+        for encoding, encoder in STATIC_ENCODERS.items():
+            data = encoder(body)
+            # Only keep encodings that actually save bytes
+            if len(data) < len(body):
+                self.encoded[encoding] = data
+
+    @property
+    def name_hash(self):
+        return self.etag[:12]
+
+class AssetBundle:
+    """The rendered shell, its hashed assets and the service worker that caches them"""
+
+    def __init__(self, html, service_worker_source):
+        self.assets = {}
+        style = STYLE_RE.search(html)
+        if style:
+            path = self._add('app', 'css', style.group(1), 'text/css; charset=utf-8')
+            html = html[:style.start()] + f'    <link href="{path}" rel="stylesheet">\n' + html[style.end():]
+        scripts = list(SCRIPT_RE.finditer(html))
+        if scripts:
+            # Concatenated in page order, loaded where the last one was so the DOM above it exists
+            source = ';\n'.join(match.group(1) for match in scripts)
+            path = self._add('app', 'js', source, 'text/javascript; charset=utf-8')
+            last = scripts[-1]
+            html = html[:last.start()] + f'    <script src="{path}"></script>\n' + html[last.end():]
+            for match in reversed(scripts[:-1]):
+                html = html[:match.start()] + html[match.end():]
+        self.shell = Asset(html, 'text/html; charset=utf-8')
+
+        self.version = hashlib.sha256(''.join(
+            [self.shell.etag] + sorted(asset.etag for asset in self.assets.values())).encode()).hexdigest()[:12]
+        self.manifest = {
+            'version': self.version,
+            'assets': ['/'] + sorted(ASSET_PREFIX + name for name in self.assets) + list(PUBLIC_ASSETS),
+        }
+        service_worker = SW_MANIFEST_RE.sub(
+            lambda _: f'const ASSET_MANIFEST = {json.dumps(self.manifest)};', service_worker_source, count=1)
+        self.service_worker = Asset(service_worker, 'text/javascript; charset=utf-8')
+
+    def _add(self, stem, extension, source, content_type):
+        asset = Asset(source, content_type)
+        name = f'{stem}.{asset.name_hash}.{extension}'
+        self.assets[name] = asset
+        return ASSET_PREFIX + name
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'assets': {name: {'bytes': len(asset.body),
+                              **{encoding: len(data) for encoding, data in asset.encoded.items()}}
+                       for name, asset in [('/', self.shell)] + sorted(self.assets.items())},
+        }
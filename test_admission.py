@@ -0,0 +1,205 @@
+"""Tests for per-access-level admission control"""
+
+import gzip
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from admission import (ANONYMOUS, AccessClass, AdmissionController, DeadlineExceeded, Overloaded, TooExpensive,
+                       UnknownAccessCode, estimate_cost)
+from app import app
+from benchmarks.synthetic import generate_config
+
+CONFIG = generate_config(200, seed=23)
+
+def controller(max_concurrent=1, max_queue=2, max_cost=1000, deadline=5, seconds_per_line=1e-6):
+    classes = (AccessClass(ANONYMOUS, max_concurrent, max_queue, max_cost, deadline),
+               AccessClass('guest', max_concurrent, max_queue, max_cost, deadline))
+    return AdmissionController(classes, seconds_per_line=seconds_per_line)
+
+def test_access_codes_map_to_levels():
+    admission = AdmissionController()
+    assert admission.level_for('PWHE2024') == 'admin'
+    assert admission.level_for(' TEAM002 ') == 'team'
+    assert admission.level_for(None) == ANONYMOUS
+    with pytest.raises(UnknownAccessCode):
+        admission.level_for('NOPE')
+
+def test_cost_prefers_line_count():
+    assert estimate_cost(4000) == 100
+    assert estimate_cost(4000, line_count=300) == 300
+    assert estimate_cost(0) == 1
+
+def test_waiters_are_admitted_in_order():
+    admission = controller(max_queue=4)
+    first = admission.admit('guest', 10)
+    order = []
+
+    def wait(name):
+        ticket = admission.admit('guest', 10)
+        order.append(name)
+        admission.release(ticket)
+
+    threads = []
+    for name in ('a', 'b', 'c'):
+        thread = threading.Thread(target=wait, args=(name,))
+        thread.start()
+        threads.append(thread)
+        # Let each waiter join the queue before the next one arrives
+        while admission.stats()['levels']['guest']['queued'] < len(threads):
+            time.sleep(0.001)
+    admission.release(first)
+    for thread in threads:
+        thread.join(5)
+    assert order == ['a', 'b', 'c']
+    assert admission.stats()['levels']['guest']['admitted'] == 4
+
+def test_full_queue_is_shed_with_retry_after():
+    admission = controller(max_queue=0, seconds_per_line=0.01)
+    admission.admit('guest', 500)
+    with pytest.raises(Overloaded) as shed:
+        admission.admit('guest', 10)
+    assert shed.value.retry_after == 5
+    # Other levels keep their own slots
+    admission.release(admission.admit(ANONYMOUS, 10))
+
+def test_wait_past_deadline_is_shed_without_waiting():
+    admission = controller(seconds_per_line=1.0, deadline=5)
+    admission.admit('guest', 10)
+    start = time.monotonic()
+    with pytest.raises(Overloaded):
+        admission.admit('guest', 10)
+    assert time.monotonic() - start < 0.5
+
+def test_queued_request_times_out():
+    admission = controller(deadline=0.05)
+    admission.admit('guest', 1)
+    with pytest.raises(Overloaded):
+        admission.admit('guest', 1)
+    assert admission.stats()['levels']['guest']['queued'] == 0
+
+def test_oversized_request_is_refused():
+    with pytest.raises(TooExpensive):
+        controller(max_cost=100).admit('guest', 101)
+
+def test_guard_cancels_after_deadline():
+    now = [0.0]
+    admission = AdmissionController((AccessClass('guest', 1, 1, 100, 10),), clock=lambda: now[0])
+    ticket = admission.admit('guest', 1)
+    seen = []
+    with pytest.raises(DeadlineExceeded):
+        for item in ticket.guard(range(5)):
+            seen.append(item)
+            now[0] += 4
+    assert seen == [0, 1, 2]
+
+def test_meter_enforces_max_cost():
+    ticket = controller(max_cost=3).admit('guest', 1)
+    assert list(ticket.meter(['a', 'b', 'c'])) == ['a', 'b', 'c']
+    seen = []
+    with pytest.raises(TooExpensive):
+        for line in ticket.meter(['a', 'b', 'c', 'd']):
+            seen.append(line)
+    assert seen == ['a', 'b', 'c']
+
+def test_rate_is_learned_from_conversions_only():
+    admission = controller(seconds_per_line=1.0)
+    admission.release(admission.admit('guest', 10))
+    assert admission.stats()['seconds_per_line'] == 1.0
+    ticket = admission.admit('guest', 10)
+    ticket.converted = True
+    admission.release(ticket)
+    assert admission.stats()['seconds_per_line'] < 1.0
+
+def test_cache_hits_do_not_teach_the_rate(monkeypatch):
+    admission = controller(max_cost=10**6, seconds_per_line=1.0)
+    monkeypatch.setattr(app_module, 'admission', admission)
+    app_module.conversion_cache.clear()
+    client = app.test_client()
+    payload = {'old_config': CONFIG, 'pw_ether_id': '4242'}
+    first = client.post('/convert', json=payload)
+    learned = admission.stats()['seconds_per_line']
+    assert learned < 1.0
+    client.post('/convert', json=payload)
+    client.post('/convert', json=payload, headers={'If-None-Match': first.headers['ETag']})
+    client.post('/convert', json={'old_config': CONFIG})
+    assert admission.stats()['seconds_per_line'] == learned
+
+def test_cache_hits_and_revalidations_skip_admission(monkeypatch):
+    monkeypatch.setattr(app_module, 'admission', controller(max_cost=10**6))
+    app_module.conversion_cache.clear()
+    client = app.test_client()
+    payload = {'old_config': CONFIG, 'pw_ether_id': '4243'}
+    etag = client.post('/convert', json=payload).headers['ETag']
+    # With no slots left, only a miss is shed
+    monkeypatch.setattr(app_module, 'admission', controller(max_concurrent=0, max_queue=0, max_cost=10**6))
+    assert client.post('/convert', json=payload).status_code == 200
+    assert client.post('/convert', json=payload, headers={'If-None-Match': etag}).status_code == 304
+    assert client.post('/convert', json={**payload, 'pw_ether_id': '4244'}).status_code == 429
+    assert app_module.admission.stats()['levels'][ANONYMOUS]['shed'] == 1
+
+def test_live_updates_are_admitted(monkeypatch):
+    client = app.test_client()
+    session_id = client.post('/convert/live', json={'old_config': CONFIG, 'pw_ether_id': '1'}).get_json()['session_id']
+    monkeypatch.setattr(app_module, 'admission', controller(max_concurrent=0, max_queue=0))
+    response = client.post(f'/convert/live/{session_id}', json={'changes': [{'start': 0, 'end': 0, 'text': ''}]})
+    assert response.status_code == 429
+
+def test_unknown_access_code_is_forbidden():
+    response = app.test_client().post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '1'},
+                                      headers={'X-Access-Code': 'NOPE'})
+    assert response.status_code == 403
+
+def test_convert_is_shed_with_429(monkeypatch):
+    monkeypatch.setattr(app_module, 'admission', controller(max_concurrent=0, max_queue=0))
+    response = app.test_client().post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '1'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+def test_convert_over_level_budget_is_413(monkeypatch):
+    monkeypatch.setattr(app_module, 'admission', controller(max_cost=100))
+    response = app.test_client().post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '1'},
+                                      headers={'X-Access-Code': 'GUEST01'})
+    assert response.status_code == 413
+
+def test_convert_past_deadline_is_cancelled(monkeypatch):
+    admission = controller(max_cost=10**6, deadline=0)
+    monkeypatch.setattr(app_module, 'admission', admission)
+    response = app.test_client().post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '98765'})
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+    assert admission.stats()['levels'][ANONYMOUS] == {'running': 0, 'queued': 0, 'admitted': 1, 'shed': 0,
+                                                      'expired': 1}
+
+def test_stream_past_deadline_ends_with_cancellation(monkeypatch):
+    monkeypatch.setattr(app_module, 'admission', controller(max_cost=10**6, deadline=0))
+    response = app.test_client().post('/convert/stream?pw_ether_id=1&format=ndjson', data=CONFIG.encode(),
+                                      content_type='text/plain')
+    assert response.get_data(as_text=True).strip().split('\n')[-1].startswith('{"type":"error"')
+
+def test_compressed_stream_is_metered(monkeypatch):
+    monkeypatch.setattr(app_module, 'admission', controller(max_cost=100))
+    # Charged on its compressed length at admission, but cut off once its lines pass the limit
+    body = gzip.compress(CONFIG.encode())
+    assert estimate_cost(len(body)) < 100 < CONFIG.count('\n')
+    response = app.test_client().post('/convert/stream?pw_ether_id=1', data=body, content_type='text/plain',
+                                      headers={'Content-Encoding': 'gzip', 'X-Access-Code': 'GUEST01'})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).endswith('! Conversion cancelled: Request exceeds the 100 line limit '
+                                                    'for guest access\n')
+
+def test_jobs_are_limited_per_level(monkeypatch):
+    monkeypatch.setattr(app_module, 'admission', controller(max_concurrent=1, max_queue=0, max_cost=10**6))
+    # A job that cannot start keeps its owner's allowance used up
+    monkeypatch.setattr(app_module.job_queue, '_ensure_workers', lambda: None)
+    monkeypatch.setattr(app_module.job_queue, '_queue', __import__('queue').Queue())
+    client = app.test_client()
+    payload = {'old_config': CONFIG, 'pw_ether_id': '1'}
+    assert client.post('/jobs', json=payload).status_code == 202
+    response = client.post('/jobs', json=payload)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '5'
+    # A different level is unaffected
+    assert client.post('/jobs', json=payload, headers={'X-Access-Code': 'GUEST01'}).status_code == 202
@@ -0,0 +1,37 @@
+"""Tests for the /convert/batch endpoint"""
+
+from app import app, convert_configuration
+from benchmarks.synthetic import generate_config
+
+def test_convert_batch_preserves_order_and_errors():
+    configs = [generate_config(300, seed=seed) for seed in range(3)]
+    jobs = [
+        {'old_config': configs[0], 'pw_ether_id': '100', 'label': 'csr-a'},
+        {'old_config': '', 'pw_ether_id': '101', 'label': 'csr-empty'},
+        {'old_config': configs[1], 'pw_ether_id': '102', 'label': 'csr-b'},
+        {'old_config': configs[2], 'pw_ether_id': '', 'label': 'csr-no-id'},
+    ]
+    response = app.test_client().post('/convert/batch', json={'jobs': jobs})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] is False
+    assert [result['label'] for result in data['results']] == ['csr-a', 'csr-empty', 'csr-b', 'csr-no-id']
+    assert data['results'][0]['new_config'] == convert_configuration(configs[0], '100')
+    assert data['results'][2]['new_config'] == convert_configuration(configs[1], '102')
+    assert data['results'][0]['elapsed_ms'] >= 0
+    assert not data['results'][1]['success']
+    assert not data['results'][3]['success']
+
+def test_convert_batch_rejects_missing_jobs():
+    response = app.test_client().post('/convert/batch', json={})
+    assert response.status_code == 400
+
+def test_convert_batch_reports_cross_device_collisions():
+    block = """interface GigabitEthernet0/0/0/1.3513101 l2transport
+ encapsulation dot1q 3513 second-dot1q 101
+!"""
+    jobs = [{'old_config': block, 'pw_ether_id': '100', 'label': label} for label in ('csr-a', 'csr-b')]
+    jobs.append({'old_config': block, 'pw_ether_id': '200', 'label': 'csr-c'})
+    data = app.test_client().post('/convert/batch', json={'jobs': jobs}).get_json()
+    assert [result['diagnostics'] for result in data['results']] == [[], [], []]
+    assert [(d['code'], d['devices']) for d in data['diagnostics']] == [('ctag_collision', ['csr-a', 'csr-b'])]
@@ -0,0 +1,92 @@
+"""Tests for the offline bulk conversion CLI"""
+
+import io
+import json
+import subprocess
+import sys
+import tarfile
+
+from converter import convert_configuration
+from pwheconfig.cli import collect_sources, main
+
+CONFIG = """hostname CSR-01
+interface GigabitEthernet0/0/0/14.3513101 l2transport
+ description café uplink
+ encapsulation dot1q 3513 second-dot1q 101
+ rewrite ingress tag pop 2 symmetric
+!
+interface GigabitEthernet0/0/0/15.3514102 l2transport
+ encapsulation dot1q 3514 second-dot1q 102
+!
+"""
+
+def write_mapping(tmp_path, rows='device,parent_port,pw_ether_id\n,Gi0/0/0/14,10239\n,Gi0/0/0/15,10239\n'):
+    path = tmp_path / 'mapping.csv'
+    path.write_text(rows)
+    return str(path)
+
+def read_summary(output):
+    with open(output / 'summary.json') as f:
+        return json.load(f)
+
+def test_single_file_is_mapped(tmp_path):
+    source = tmp_path / 'csr-01.cfg'
+    source.write_text(CONFIG, encoding='utf-8')
+    output = tmp_path / 'out'
+    assert main([str(source), '-m', write_mapping(tmp_path), '-o', str(output), '-j', '1']) == 0
+    assert (output / 'csr-01.txt').read_text() == convert_configuration(CONFIG, '10239') + '\n'
+    summary = read_summary(output)
+    assert summary['interfaces'] == 2
+    # Bytes, not characters: the accented description takes one more
+    assert summary['bytes'] == len(CONFIG.encode()) == len(CONFIG) + 1
+
+def test_stdin(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(CONFIG.encode())))
+    output = tmp_path / 'out'
+    assert main(['-', '--device', 'csr-02', '-m', write_mapping(tmp_path), '-o', str(output), '-j', '1']) == 0
+    assert (output / 'csr-02.txt').read_text() == convert_configuration(CONFIG, '10239') + '\n'
+
+def test_tar_members_are_mapped_in_place(tmp_path):
+    archive = tmp_path / 'configs.tar'
+    with tarfile.open(archive, 'w') as tar:
+        for name in ('a.txt', 'b.txt'):
+            path = tmp_path / name
+            path.write_text(CONFIG)
+            tar.add(path, arcname=name)
+    sources = collect_sources(str(archive), str(tmp_path))
+    assert [(device, path, size) for device, path, _, size in sources] == [
+        ('a', str(archive), len(CONFIG.encode())), ('b', str(archive), len(CONFIG.encode()))]
+    output = tmp_path / 'out'
+    assert main([str(archive), '-m', write_mapping(tmp_path), '-o', str(output), '-j', '2']) == 0
+    assert (output / 'b.txt').read_text() == convert_configuration(CONFIG, '10239') + '\n'
+
+def test_exit_codes(tmp_path):
+    source = tmp_path / 'csr-01.txt'
+    source.write_text(CONFIG)
+    output = str(tmp_path / 'out')
+    # No interface matches the mapping
+    assert main([str(source), '-m', write_mapping(tmp_path, 'device,pw_ether_id\nother,1\n'), '-o', output]) == 1
+    assert main([str(source), '-m', write_mapping(tmp_path, 'pw_ether_id\n1\n'), '-o', output]) == 2
+    assert main([str(tmp_path / 'missing'), '-m', write_mapping(tmp_path), '-o', output]) == 2
+
+def test_runs_outside_the_repository(tmp_path):
+    source = tmp_path / 'csr-01.txt'
+    source.write_text(CONFIG)
+    import pwheconfig
+    package_parent = str(tmp_path / 'site')
+    (tmp_path / 'site').mkdir()
+    (tmp_path / 'site' / 'pwheconfig').symlink_to(pwheconfig.__path__[0])
+    result = subprocess.run([sys.executable, '-m', 'pwheconfig', str(source), '-m', write_mapping(tmp_path),
+                             '-o', str(tmp_path / 'out'), '-j', '1'],
+                            cwd=tmp_path, env={'PYTHONPATH': package_parent}, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+def test_mapping_ports_are_matched_in_any_spelling(tmp_path):
+    source = tmp_path / 'csr-01.txt'
+    # The converter accepts the Tengig spelling, which only matches the CSV once normalised
+    source.write_text('interface Tengig0/0/0/1.100 l2transport\n encapsulation dot1q 100\n!\n')
+    output = tmp_path / 'out'
+    mapping = write_mapping(tmp_path, 'device,parent_port,pw_ether_id\n,Te0/0/0/1,20280\n')
+    assert main([str(source), '-m', mapping, '-o', str(output), '-j', '1']) == 0
+    assert read_summary(output)['interfaces'] == 1
+    assert 'interface PW-Ether 20280.100' in (output / 'csr-01.txt').read_text()
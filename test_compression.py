@@ -0,0 +1,66 @@
+"""Tests for compressed /convert request and response bodies"""
+
+import gzip
+import io
+import json
+import zlib
+
+import pytest
+
+from admission import AccessClass, AdmissionController
+from app import app, convert_configuration
+from benchmarks.synthetic import generate_config
+from compression import REQUEST_DECODERS, RESPONSE_ENCODERS, compress, open_decompressed
+
+CONFIG = generate_config(2000, seed=17)
+PAYLOAD = json.dumps({'old_config': CONFIG, 'pw_ether_id': '10239'}).encode()
+
+def encode(data, encoding):
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.compress(data)
+    if encoding == 'deflate':
+        return zlib.compress(data)
+    return compress(data, encoding)
+
+@pytest.mark.parametrize('encoding', sorted(REQUEST_DECODERS))
+def test_compressed_request_bodies(encoding):
+    response = app.test_client().post('/convert', data=encode(PAYLOAD, encoding), headers={
+        'Content-Type': 'application/json', 'Content-Encoding': encoding})
+    assert response.status_code == 200
+    assert response.get_json()['new_config'] == convert_configuration(CONFIG, '10239')
+
+@pytest.mark.parametrize('encoding', sorted(RESPONSE_ENCODERS))
+def test_negotiated_response_encoding(encoding):
+    client = app.test_client()
+    response = client.post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '10239'},
+                           headers={'Accept-Encoding': f'{encoding}, identity;q=0.1'})
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = response.get_data()
+    stream = open_decompressed(io.BytesIO(body), encoding, 10**9)
+    assert json.loads(stream.read())['new_config'] == convert_configuration(CONFIG, '10239')
+
+    # The weak ETag of a compressed response still revalidates
+    revalidated = client.post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '10239'},
+                              headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+def test_rejected_request_bodies(monkeypatch):
+    client = app.test_client()
+    headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+    assert client.post('/convert', data=b'not gzip', headers=headers).status_code == 400
+    monkeypatch.setattr('app.MAX_BODY_BYTES', 1000)
+    assert client.post('/convert', data=gzip.compress(PAYLOAD), headers=headers).status_code == 413
+    assert client.post('/convert', data=PAYLOAD, headers={'Content-Encoding': 'compress'}).status_code == 415
+
+def test_inflation_stops_at_the_level_budget(monkeypatch):
+    monkeypatch.setattr('app.admission', AdmissionController((AccessClass('guest', 1, 1, 10, 5),)))
+    response = app.test_client().post('/convert', data=gzip.compress(PAYLOAD), headers={
+        'Content-Type': 'application/json', 'Content-Encoding': 'gzip', 'X-Access-Code': 'GUEST01'})
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Request body inflates to more than 1760 bytes'
+
+def test_compressed_streaming_upload():
+    response = app.test_client().post('/convert/stream?pw_ether_id=10239', data=gzip.compress(CONFIG.encode()),
+                                      headers={'Content-Type': 'text/plain', 'Content-Encoding': 'gzip'})
+    assert response.get_data(as_text=True) == convert_configuration(CONFIG, '10239')
@@ -0,0 +1,104 @@
+"""Tests for the block-aligned conversion diff"""
+
+import pytest
+
+from app import app
+from benchmarks.differential import EDGE_CASES
+from benchmarks.synthetic import generate_config_for_interfaces
+from config_diff import ConfigDiff, align_lines
+from converter import convert_configuration, generate_migration_section, iter_interface_blocks, join_converted
+
+def build_diff(config, pw_ether_id='10239'):
+    config_diff = ConfigDiff(pw_ether_id)
+    interfaces = []
+    converted = []
+    for interface, numbers in iter_interface_blocks(config.split('\n'), line_numbers=True):
+        interfaces.append(interface)
+        converted.append(config_diff.add(interface, numbers))
+    migration_section = generate_migration_section(interfaces, pw_ether_id)
+    config_diff.add_migration(interfaces, migration_section)
+    return config_diff, join_converted(converted, migration_section)
+
+def test_align_lines():
+    old = ['interface Gi0/0/0/1.5', 'encapsulation dot1q 10 second-dot1q 5', 'rewrite ingress tag pop 2 symmetric', '!']
+    new = ['interface PW-Ether 1.5', 'encapsulation dot1q 5', 'shutdown', '!']
+    # The dropped rewrite and the added shutdown are not paired up as a change
+    assert align_lines(old, new) == [(0, 0), (1, 1), (2, None), (None, 2), (3, 3)]
+    assert align_lines(['a', 'b'], ['a', 'b', 'shutdown', '!']) == [(0, 0), (1, 1), (None, 2), (None, 3)]
+
+@pytest.mark.parametrize('config', ['', '\n\n' + generate_config_for_interfaces(200, seed=5, max_extra_lines=6)
+                                    + '\n\n' + EDGE_CASES])
+def test_output_and_source_map(config):
+    config_diff, new_config = build_diff(config)
+    assert new_config == convert_configuration(config, '10239')
+    old_lines = config.split('\n')
+    new_lines = new_config.split('\n')
+    assert len(config_diff.source_map) == len(new_lines)
+    migration_start = config_diff.migration['new_start']
+    for number, source in enumerate(config_diff.source_map[:migration_start - 1], 1):
+        if source is not None:
+            old, new = old_lines[source - 1].strip(), new_lines[number - 1]
+            assert old.split()[0] == new.split()[0], (number, old, new)
+    # Migration lines point at the interface they act on
+    for number, source in enumerate(config_diff.source_map[migration_start - 1:], migration_start):
+        if source is not None:
+            assert old_lines[source - 1].startswith('interface ')
+
+def test_block_lines():
+    config_diff, _ = build_diff(EDGE_CASES)
+    block = config_diff.blocks[1]
+    assert (block['old_name'], block['new_name']) == ('interface GigabitEthernet0/0/0/14.502 l2transport',
+                                                      'interface PW-Ether 10239.502 l2transport')
+    assert block['lines'] == [
+        ['-', 6, None, 'interface GigabitEthernet0/0/0/14.502 l2transport'],
+        ['+', None, 8, 'interface PW-Ether 10239.502 l2transport'],
+        ['-', 7, None, 'encapsulation dot1q 3513 second-dot1q 502'],
+        ['+', None, 9, 'encapsulation dot1q 502'],
+        ['-', 8, None, 'rewrite ingress tag pop 2 symmetric'],
+        ['+', None, 10, 'shutdown'],
+        [' ', 9, 11, '!'],
+    ]
+    assert config_diff.source_map[7:11] == [6, 7, None, 9]
+
+def test_unified_text():
+    config_diff, _ = build_diff(EDGE_CASES)
+    text = config_diff.unified()
+    assert text.startswith('--- old configuration\n+++ new configuration\n'
+                           '@@ -1,5 +1,6 @@ interface GigabitEthernet0/0/0/14.513 l2transport\n')
+    assert '\n@@ -30,3 +41,4 @@ interface Loopback0\n interface Loopback0\n' in text
+    assert text.count('\n@@ ') == len(config_diff.blocks) + 1
+
+def test_convert_diff_field_and_download():
+    client = app.test_client()
+    payload = {'old_config': EDGE_CASES, 'pw_ether_id': '4411'}
+    plain = client.post('/convert', json=payload)
+    with_diff = client.post('/convert', json={**payload, 'diff': True})
+    assert 'diff' not in plain.get_json()
+    data = with_diff.get_json()
+    assert data['new_config'] == plain.get_json()['new_config']
+    assert len(data['diff']['source_map']) == len(data['new_config'].split('\n'))
+    assert with_diff.headers['ETag'] != plain.headers['ETag']
+
+    download = client.post('/convert', json={**payload, 'format': 'diff'})
+    assert download.status_code == 200
+    assert download.mimetype == 'text/x-diff'
+    assert download.headers['Content-Disposition'] == 'attachment; filename="pw-ether-4411.diff"'
+    assert download.get_data(as_text=True).startswith('--- old configuration\n+++ new configuration (PW-Ether 4411)\n')
+
+def test_convert_diff_source_map_follows_layout():
+    client = app.test_client()
+    payload = {'old_config': EDGE_CASES, 'pw_ether_id': '4412', 'diff': True}
+    plain = client.post('/convert', json=payload).get_json()['diff']
+    # Same config after a leading blank line: a cached map would be off by one
+    shifted = client.post('/convert', json={**payload, 'old_config': '\n' + EDGE_CASES}).get_json()['diff']
+    assert shifted['source_map'] == [None if number is None else number + 1 for number in plain['source_map']]
+    assert shifted['blocks'][0]['old_start'] == plain['blocks'][0]['old_start'] + 1
+
+def test_convert_diff_with_selection():
+    config = 'hostname PE1\n' + EDGE_CASES
+    response = app.test_client().post('/convert', json={'old_config': config, 'pw_ether_id': '1',
+                                                        'select': 'Gi0/0/0/14', 'diff': True})
+    diff = response.get_json()['diff']
+    assert [block['old_start'] for block in diff['blocks']] == [2, 7, 11]
+    # The selection's closing '!' is added, so it has no source line
+    assert diff['blocks'][0]['lines'][-1] == [' ', None, 6, '!']
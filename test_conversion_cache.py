@@ -0,0 +1,74 @@
+"""Tests for the conversion result cache and /convert ETags"""
+
+from types import SimpleNamespace
+
+import conversion_cache as conversion_cache_module
+from app import app, conversion_cache, convert_configuration
+from conversion_cache import ConversionCache, conversion_key
+
+def test_key_ignores_whitespace_only_changes():
+    config = 'interface GigabitEthernet0/0/0/1.100\n encapsulation dot1q 1 second-dot1q 100\n!'
+    reformatted = '\n\n  interface GigabitEthernet0/0/0/1.100  \nencapsulation dot1q 1 second-dot1q 100\n!\n'
+    assert conversion_key(config, '10') == conversion_key(reformatted, '10')
+    assert conversion_key(config, '10') != conversion_key(config, '11')
+    # A selection reads the indentation, so there the layout counts
+    assert conversion_key(config, '10', 'Gi0/0/0/1') != conversion_key(reformatted, '10', 'Gi0/0/0/1')
+
+def test_fingerprint_covers_every_engine_module(tmp_path, monkeypatch):
+    assert {module.__name__ for module in conversion_cache_module.ENGINE_MODULES} == {
+        'converter', 'validation', 'running_config', 'config_diff'}
+    paths = [tmp_path / f'{name}.py' for name in ('converter', 'validation')]
+    for path in paths:
+        path.write_text('# engine\n')
+    monkeypatch.setattr(conversion_cache_module, 'ENGINE_MODULES',
+                        tuple(SimpleNamespace(__file__=str(path)) for path in paths))
+    before = conversion_cache_module._engine_fingerprint()
+    paths[1].write_text('# engine, with a new diagnostic\n')
+    assert conversion_cache_module._engine_fingerprint() != before
+
+def test_lru_eviction_and_ttl():
+    now = [0.0]
+    cache = ConversionCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.put('a', 'A')
+    cache.put('b', 'B')
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C')
+    assert cache.get('b') is None
+    assert cache.stats()['evictions'] == 1
+    now[0] = 11
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_convert_etag_round_trip():
+    conversion_cache.clear()
+    client = app.test_client()
+    payload = {'old_config': 'interface GigabitEthernet0/0/0/1.100\n encapsulation dot1q 1 second-dot1q 100\n!',
+               'pw_ether_id': '10239'}
+    first = client.post('/convert', json=payload)
+    assert first.status_code == 200
+    assert first.get_json()['new_config'] == convert_configuration(payload['old_config'], '10239')
+    etag = first.headers['ETag']
+
+    second = client.post('/convert', json=payload)
+    assert second.get_json() == first.get_json()
+    assert conversion_cache.stats()['hits'] >= 1
+
+    revalidated = client.post('/convert', json=payload, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+def test_selection_not_served_for_another_layout():
+    conversion_cache.clear()
+    client = app.test_client()
+    config = ('interface GigabitEthernet0/0/0/1\n description uplink\n!\n'
+              'interface GigabitEthernet0/0/0/1.100\n encapsulation dot1q 1 second-dot1q 100\n!')
+    flattened = '\n'.join(line.strip() for line in config.split('\n'))
+    payload = {'old_config': config, 'pw_ether_id': '10239', 'select': 'Gi0/0/0/1'}
+    indented = client.post('/convert', json=payload).get_json()['new_config']
+    flattened_payload = {**payload, 'old_config': flattened}
+    cached = client.post('/convert', json=flattened_payload).get_json()['new_config']
+    conversion_cache.clear()
+    # Without indentation the selected section loses its body
+    fresh = client.post('/convert', json=flattened_payload).get_json()['new_config']
+    assert cached == fresh
+    assert 'encapsulation dot1q 100' in indented and 'encapsulation dot1q 100' not in fresh
@@ -0,0 +1,37 @@
+"""Tests for the engine differential harness"""
+
+from benchmarks import differential
+
+def run(engines, interfaces=300):
+    corpus = differential.build_corpus(interfaces, seed=37, max_extra_lines=8)
+    names = [line.strip() for line in corpus.split('\n') if line.startswith('interface ')]
+    reference = engines[differential.REFERENCE](corpus, differential.PW_ETHER_ID)
+    return {name: differential.compare(names, reference, engine(corpus, differential.PW_ETHER_ID))
+            for name, engine in engines.items() if name != differential.REFERENCE}
+
+def test_app_engines_match_the_reference():
+    results = run(differential.default_engines())
+    for name in differential.STRICT_ENGINES:
+        assert results[name]['mismatches'] == []
+        assert results[name]['migration_matches']
+        assert len(set(results[name]['blocks'])) == 1
+
+def test_functions_engine_drift_is_reported_per_interface():
+    result = run(differential.default_engines())['functions']
+    by_interface = {mismatch['interface']: mismatch for mismatch in result['mismatches']}
+    # ctag from the name's last three digits, not from second-dot1q
+    assert by_interface['interface GigabitEthernet0/0/0/14.513 l2transport']['actual'] == \
+        'interface PW-Ether 10239.513 l2transport'
+    # a description mentioning shutdown suppresses the added shutdown
+    assert by_interface['interface TenGigE0/1/0/3.720']['expected'] == 'shutdown'
+    assert not result['migration_matches']
+
+def test_split_output_pairs_blocks_with_migration():
+    blocks, migration = differential.split_output('interface A\nx\n!\n\ninterface B\n!\n\n### no shutdown ###\ninterface A')
+    assert blocks == [['interface A', 'x', '!'], ['interface B', '!']]
+    assert migration == ['### no shutdown ###', 'interface A']
+
+def test_extra_engines_load_from_a_file(tmp_path):
+    path = tmp_path / 'engine.py'
+    path.write_text('def convert(config, pw_ether_id):\n    return config.upper()\n')
+    assert differential.load_engine(f'{path}:convert')('abc', '1') == 'ABC'
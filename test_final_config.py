@@ -0,0 +1,83 @@
+"""Tests for the server-side final configuration generator"""
+
+from app import app
+from final_config import CompiledTemplate, generate_final_config
+from verification import PING_HOST_LIMIT, PING_PAGE_LIMIT, SubnetTarget, ip_to_int, is_netmask, iter_ping_commands
+
+OLD_CONFIG = """interface GigabitEthernet0/0/0/14.1176049
+ description 994614384:FIB:10.24.128.255:Gi0/2/6::SANASA_DEVELOPMENT_BANK_LIMITED:COLOMBO_01
+ vrf SDB_DATA
+ ipv4 address 10.229.225.1 255.255.255.252
+ encapsulation dot1q 3513 second-dot1q 49
+!
+interface GigabitEthernet0/0/0/13.1001502 l2transport
+ encapsulation dot1q 1001 second-dot1q 502
+ rewrite ingress tag pop 2 symmetric
+!"""
+
+EXISTING_CSR_CONFIG = """interface GigabitEthernet0/2/6
+ mtu 1600
+ mpls l2vc 10.24.3.24 102390 raw"""
+
+def test_compiled_template():
+    template = CompiledTemplate('a ${x} b ${y}${x}')
+    assert template.render({'x': '1', 'y': '2'}) == 'a 1 b 21'
+
+def test_ping_commands_skip_interface_address():
+    def pings(ip, mask):
+        target = SubnetTarget('', 'V', ip, ip_to_int(ip), ip_to_int(mask))
+        return [command.split()[-1] for command in iter_ping_commands(target)]
+    assert pings('10.0.0.1', '255.255.255.252') == ['10.0.0.2']
+    assert pings('10.0.0.0', '255.255.255.254') == ['10.0.0.1']
+    assert pings('10.0.0.1', '255.255.255.255') == []
+
+def test_generate_final_config():
+    final = generate_final_config(OLD_CONFIG, '10239', '10.24.5.6', 'mala-kada', 'ATN950B',
+                                  EXISTING_CSR_CONFIG, 'SANASA', 'COLOMBO')
+    assert 'PW_ID : 102390 / 102391' in final
+    assert 'mpls l2vc 10.24.3.29 102391 raw secondary' in final
+    assert 'undo mpls l2vc 10.24.3.24 102390 raw' in final
+    assert 'mtu 1614' in final
+    assert '  bridge-domain ME_DNET_502' in final
+    assert 'interface PW-Ether 10239.49' in final
+    assert 'ping vrf SDB_DATA 10.229.225.2' in final
+
+def test_final_endpoint_validates_model():
+    response = app.test_client().post('/final', json={
+        'old_config': OLD_CONFIG, 'pw_ether_id': '10239', 'csr_ip': '10.24.5.6',
+        'pwhe_option': 'pili-mala', 'huawei_model': 'UNKNOWN', 'existing_csr_config': EXISTING_CSR_CONFIG,
+    })
+    assert response.status_code == 400
+
+def test_verify_caps_large_subnets():
+    config = """interface GigabitEthernet0/0/0/1.100
+ vrf ENT_INTERNET
+ ipv4 address 10.0.0.1 255.255.252.0
+!"""
+    response = app.test_client().post('/verify', json={'old_config': config, 'pw_ether_id': '10239', 'ping_limit': 10})
+    commands = response.get_json()['verification_commands']
+    assert commands.count('ping vrf ENT_INTERNET') == 10
+    assert '! 1011 more usable hosts in 10.0.0.0/22 not listed' in commands
+
+def test_verify_ping_pages():
+    response = app.test_client().get('/verify/ping?ip=10.0.0.1&mask=255.255.252.0&vrf=X&offset=1019&limit=5')
+    assert response.headers['X-Total-Hosts'] == '1021'
+    assert response.get_data(as_text=True) == 'ping vrf X 10.0.3.253\nping vrf X 10.0.3.254\n'
+
+def test_verify_ping_bounds_the_page():
+    client = app.test_client()
+    response = client.get('/verify/ping?ip=10.0.0.1&mask=0.0.0.0&vrf=X')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count('\n') == PING_HOST_LIMIT
+    assert client.get(f'/verify/ping?ip=10.0.0.1&mask=0.0.0.0&vrf=X&limit={PING_PAGE_LIMIT + 1}').status_code == 400
+
+def test_verify_ping_rejects_non_contiguous_masks():
+    assert not is_netmask(ip_to_int('255.0.255.0'))
+    assert is_netmask(ip_to_int('255.255.252.0')) and is_netmask(0)
+    response = app.test_client().get('/verify/ping?ip=10.0.0.1&mask=255.0.255.0&vrf=X')
+    assert response.status_code == 400
+
+def test_verify_accepts_numeric_pw_ether_id():
+    response = app.test_client().post('/verify', json={'old_config': OLD_CONFIG, 'pw_ether_id': 20280})
+    assert response.status_code == 200
+    assert 'show arp vrf SDB_DATA | i 20280.' in response.get_json()['verification_commands']
@@ -0,0 +1,22 @@
+"""Tests for the Cloud Functions conversion core in functions/core.py"""
+
+import importlib.util
+import os
+
+spec = importlib.util.spec_from_file_location(
+    'functions_core', os.path.join(os.path.dirname(__file__), 'functions', 'core.py'))
+functions_core = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(functions_core)
+
+def test_converts_three_digit_subinterfaces():
+    config = """interface GigabitEthernet0/0/0/14.513 l2transport
+ encapsulation dot1q 3513 second-dot1q 101
+ rewrite ingress tag pop 2 symmetric
+!"""
+    assert functions_core.convert_configuration(config, '10239').split('\n') == [
+        'interface PW-Ether 10239.513 l2transport',
+        'encapsulation dot1q 101',
+        'rewrite ingress tag pop 1 symmetric',
+        'shutdown',
+        '!',
+    ]
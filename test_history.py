@@ -0,0 +1,133 @@
+"""Tests for the SQLite conversion history"""
+
+import threading
+
+import pytest
+
+import app as app_module
+from app import app
+from benchmarks.synthetic import generate_config
+from converter import convert_configuration
+from history import ConnectionPool, ConversionHistory, interface_rows, search_expression
+
+ADMIN = {'X-Access-Code': 'PWHE2024'}
+
+CONFIG = """interface GigabitEthernet0/0/0/14.513 l2transport
+ description 994614384:FIB:SDB_CCTV:SANASA_DEVELOPMENT_BANK_LIMITED
+ encapsulation dot1q 3513 second-dot1q 513
+ rewrite ingress tag pop 2 symmetric
+!
+interface Loopback0
+ ipv4 address 10.0.0.1 255.255.255.255
+!"""
+
+@pytest.fixture
+def history(tmp_path):
+    history = ConversionHistory(str(tmp_path / 'history.sqlite3'), pool_size=2, batch_size=8, flush_interval=0.05)
+    yield history
+    history.pool.close()
+
+def test_search_expression_is_a_prefix_phrase():
+    assert search_expression('994614384:FIB') == '"994614384 FIB"*'
+    assert search_expression('PW-Ether 10239.5') == '"PW Ether 10239 5"'
+    assert search_expression('PW-Ether 10239.51') == '"PW Ether 10239 51"'
+    assert search_expression('Gigabit') == '"Gigabit"*'
+    # FTS operators in user input are just text
+    assert search_expression('"NEAR(a b)" OR') == '"NEAR a b OR"'
+    assert search_expression('994614384:FIB', prefix=False) == '"994614384 FIB"'
+    assert search_expression(' :: ') is None
+
+def test_interface_rows():
+    assert interface_rows(CONFIG, '10239') == [
+        ('GigabitEthernet0/0/0/14.513 l2transport', 'PW-Ether 10239.513', '513',
+         '994614384:FIB:SDB_CCTV:SANASA_DEVELOPMENT_BANK_LIMITED'),
+        ('Loopback0', None, None, None),
+    ]
+
+def test_record_and_search(history):
+    assert history.record(CONFIG, convert_configuration(CONFIG, '10239'), '10239', access_level='team')
+    assert history.flush()
+
+    for query in ('994614384', 'sanasa_development', 'SANASA DEVELOPMENT BANK', 'PW-Ether 10239.513',
+                  'GigabitEthernet0/0/0/14.513', 'Gigabit', 'SANASA_DEV'):
+        matches = history.search(query)
+        assert [match['old_name'] for match in matches] == ['GigabitEthernet0/0/0/14.513 l2transport'], query
+    assert history.search('10239')[0]['pw_ether_id'] == '10239'
+    assert history.search('994614385') == []
+
+    entry = history.get(history.search('SANASA')[0]['conversion_id'])
+    assert entry['old_config'] == CONFIG
+    assert entry['new_config'] == convert_configuration(CONFIG, '10239')
+    assert (entry['interfaces'], entry['access_level'], entry['source']) == (2, 'team', 'convert')
+    assert history.get(12345) is None
+
+def test_writes_are_batched_and_newest_first(history):
+    config = generate_config(20, seed=3)
+    for index in range(20):
+        history.record(config, '', str(1000 + index))
+    assert history.flush()
+    stats = history.stats()
+    assert stats['written'] == 20 and stats['batches'] < 20
+    matches = history.search('PW Ether', limit=5)
+    assert len(matches) == 5
+    assert matches[0]['pw_ether_id'] == '1019'
+    assert [match['conversion_id'] for match in matches] == sorted((match['conversion_id'] for match in matches),
+                                                                  reverse=True)
+
+def test_full_queue_drops(tmp_path):
+    history = ConversionHistory(str(tmp_path / 'h.sqlite3'), max_pending=1)
+    blocked = threading.Event()
+    history._write = lambda records: blocked.wait(5)
+    history.record(CONFIG, '', '1')
+    # The writer may or may not have taken the first record yet
+    results = [history.record(CONFIG, '', '1') for _ in range(3)]
+    blocked.set()
+    assert not all(results) and history.stats()['dropped'] >= 1
+
+def test_pool_shares_connections_between_threads(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'p.sqlite3'), size=2)
+    errors = []
+
+    def query():
+        try:
+            with pool.connection() as connection:
+                connection.execute('SELECT 1').fetchone()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert errors == []
+    pool.close()
+
+def test_history_routes(history, monkeypatch):
+    monkeypatch.setattr(app_module, 'conversion_history', history)
+    client = app.test_client()
+    response = client.post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '77123'},
+                           headers={'X-Access-Code': 'TEAM001'})
+    assert response.status_code == 200
+    assert history.flush()
+
+    matches = client.get('/history?q=994614384', headers=ADMIN).get_json()['matches']
+    assert [(match['new_name'], match['pw_ether_id']) for match in matches] == [('PW-Ether 77123.513', '77123')]
+    entry = client.get(f"/history/{matches[0]['conversion_id']}", headers=ADMIN).get_json()
+    assert entry['new_config'] == response.get_json()['new_config']
+    assert entry['access_level'] == 'team'
+
+    assert client.get('/history', headers=ADMIN).status_code == 400
+    assert client.get('/history/999999', headers=ADMIN).status_code == 404
+    monkeypatch.setattr(app_module, 'conversion_history', None)
+    assert client.get('/history?q=x', headers=ADMIN).status_code == 404
+
+def test_history_routes_need_admin(history, monkeypatch):
+    monkeypatch.setattr(app_module, 'conversion_history', history)
+    client = app.test_client()
+    client.post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '77124'})
+    assert history.flush()
+    conversion_id = client.get('/history?q=77124', headers=ADMIN).get_json()['matches'][0]['conversion_id']
+    for url in ('/history?q=77124', f'/history/{conversion_id}'):
+        assert client.get(url).status_code == 403
+        assert client.get(url, headers={'X-Access-Code': 'TEAM001'}).status_code == 403
@@ -0,0 +1,33 @@
+"""Tests for the single-pass InterfaceBlock parser"""
+
+from converter import parse_interface_config, convert_interface_config, generate_migration_section, generate_bridge_config
+from benchmarks import legacy_engine
+from benchmarks.synthetic import generate_config
+
+def test_interface_block_fields():
+    config = """interface GigabitEthernet0/0/0/13.1001504 l2transport
+ encapsulation dot1q 1001 second-dot1q 504
+ rewrite ingress tag pop 2 symmetric
+!
+interface Loopback0
+ ipv4 address 10.0.0.1 255.255.255.255
+!"""
+    first, second = parse_interface_config(config)
+    assert first.parent == 'GigabitEthernet0/0/0/13'
+    assert first.subinterface == '1001504'
+    assert first.ctag == '504'
+    assert first.l2transport == ' l2transport'
+    assert first.lines[0] == first.name
+    assert first.lines[-1] == '!'
+    assert second.parent is None
+    assert second.ctag is None
+
+def test_matches_legacy_engine():
+    config = generate_config(5000, seed=7)
+    pw_ether_id = '10239'
+    blocks = parse_interface_config(config)
+    legacy_blocks = legacy_engine.parse_interface_config(config)
+    assert [convert_interface_config(b, pw_ether_id) for b in blocks] == \
+        [legacy_engine.convert_interface_config(b, pw_ether_id) for b in legacy_blocks]
+    assert generate_migration_section(blocks, pw_ether_id) == legacy_engine.generate_migration_section(legacy_blocks, pw_ether_id)
+    assert generate_bridge_config(blocks, pw_ether_id) == legacy_engine.generate_bridge_config(legacy_blocks, pw_ether_id)
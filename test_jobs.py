@@ -0,0 +1,33 @@
+"""Tests for the asynchronous /jobs API"""
+
+from app import app, convert_configuration
+from benchmarks.synthetic import generate_config
+
+def test_job_lifecycle_with_events():
+    config = generate_config(400, seed=11)
+    client = app.test_client()
+    submitted = client.post('/jobs', json={'old_config': config, 'pw_ether_id': '10239'})
+    assert submitted.status_code == 202
+    job_id = submitted.get_json()['job_id']
+
+    events = client.get(f'/jobs/{job_id}/events').get_data(as_text=True)
+    assert 'event: progress' in events
+    assert events.rstrip().split('\n')[-2] == 'event: done'
+
+    status = client.get(f'/jobs/{job_id}').get_json()
+    assert status['status'] == 'done'
+    assert status['done'] == status['total'] > 0
+    assert status['new_config'] == convert_configuration(config, '10239')
+
+def test_batch_job_results_in_order():
+    client = app.test_client()
+    jobs = [{'old_config': generate_config(100, seed=seed), 'pw_ether_id': str(seed), 'label': f'csr-{seed}'}
+            for seed in range(3)]
+    job_id = client.post('/jobs', json={'jobs': jobs}).get_json()['job_id']
+    client.get(f'/jobs/{job_id}/events').get_data()
+    results = client.get(f'/jobs/{job_id}').get_json()['results']
+    assert [result['label'] for result in results] == ['csr-0', 'csr-1', 'csr-2']
+    assert all(result['success'] for result in results)
+
+def test_unknown_job():
+    assert app.test_client().get('/jobs/missing').status_code == 404
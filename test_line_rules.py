@@ -0,0 +1,50 @@
+"""Tests for the built-in line conversions and the line-rule table in convert_interface_config"""
+
+import re
+
+from converter import LineRule, LineRuleTable, convert_interface_config, parse_interface_config
+
+BLOCK = """interface GigabitEthernet0/0/0/14.3513 l2transport
+ description rewrite ingress tag pop 2 symmetric on the old port
+ encapsulation dot1q 3513 second-dot1q 502
+ rewrite ingress tag pop 2 symmetric
+ mtu 1600
+!"""
+
+def test_rules_only_fire_on_the_leading_keyword():
+    interface = parse_interface_config(BLOCK)[0]
+    assert convert_interface_config(interface, '10239').split('\n') == [
+        'interface PW-Ether 10239.502 l2transport',
+        'description rewrite ingress tag pop 2 symmetric on the old port',
+        'encapsulation dot1q 502',
+        'mtu 1600',
+        'shutdown',
+        '!',
+    ]
+
+def test_custom_rule_table():
+    def set_mtu(state, line, match):
+        return 'mtu 9000'
+
+    def drop_comment(state, line, match):
+        return None
+
+    table = LineRuleTable((
+        LineRule('mtu', re.compile(r'mtu 1600\Z'), set_mtu),
+        LineRule('!', re.compile(r'! '), drop_comment),
+    ))
+    interface = parse_interface_config(BLOCK.replace(' mtu 1600', ' mtu 1600\n! legacy note'))[0]
+    converted = convert_interface_config(interface, '10239', rule_table=table).split('\n')
+    assert converted[-3:] == ['mtu 9000', 'shutdown', '!']
+
+def test_rules_see_lines_the_built_ins_leave_alone():
+    def tag_rewrite(state, line, match):
+        return line + ' ! kept'
+
+    table = LineRuleTable((LineRule('rewrite', None, tag_rewrite),))
+    interface = parse_interface_config(BLOCK.replace('pop 2 symmetric\n mtu', 'pop 1 symmetric\n mtu'))[0]
+    converted = convert_interface_config(interface, '10239', rule_table=table).split('\n')
+    assert 'rewrite ingress tag pop 1 symmetric ! kept' in converted
+    # The built-in conversion still owns the line it converts
+    interface = parse_interface_config(BLOCK)[0]
+    assert convert_interface_config(interface, '10239', rule_table=table) == convert_interface_config(interface, '10239')
@@ -0,0 +1,49 @@
+"""Tests for incremental live conversion sessions"""
+
+from app import app, convert_configuration, live_sessions
+from benchmarks.synthetic import generate_interfaces
+
+def assemble(blocks, migration_section):
+    return '\n\n'.join(blocks) + '\n\n' + migration_section
+
+def test_deltas_match_full_conversion():
+    client = app.test_client()
+    source = ['\n'.join(block) for block in generate_interfaces(30, seed=3)]
+    created = client.post('/convert/live', json={'old_config': '\n'.join(source), 'pw_ether_id': '10239'})
+    assert created.status_code == 201
+    session = created.get_json()
+    blocks = session['blocks']
+    assert assemble(blocks, session['migration_section']) == convert_configuration('\n'.join(source), '10239')
+
+    # Edit one block, drop two and insert one new block
+    source[4] = source[4].replace('mtu 1600', 'mtu 9000')
+    edited_block = source[4]
+    inserted = '\n'.join(next(generate_interfaces(1, seed=99)))
+    changes = [
+        {'start': 4, 'end': 5, 'text': edited_block},
+        {'start': 10, 'end': 12, 'text': inserted},
+    ]
+    source[10:12] = [inserted]
+
+    update = client.post(f"/convert/live/{session['session_id']}", json={'revision': 0, 'changes': changes}).get_json()
+    assert update['revision'] == 1
+    assert [len(change['blocks']) for change in update['changes']] == [1, 1]
+    for change in update['changes']:
+        blocks[change['start']:change['start'] + change['removed']] = change['blocks']
+    assert update['block_count'] == len(blocks) == 29
+    assert assemble(blocks, update['migration_section']) == convert_configuration('\n'.join(source), '10239')
+
+def test_block_conversions_are_memoised():
+    config = '\n'.join('\n'.join(block) for block in generate_interfaces(20, seed=4))
+    live_sessions.create(config, '777')
+    hits = live_sessions.block_cache.hits
+    live_sessions.create(config, '777')
+    assert live_sessions.block_cache.hits == hits + 20
+
+def test_rejected_deltas():
+    client = app.test_client()
+    session_id = client.post('/convert/live', json={'old_config': '', 'pw_ether_id': '1'}).get_json()['session_id']
+    url = f'/convert/live/{session_id}'
+    assert client.post(url, json={'changes': [{'start': 0, 'end': 1, 'text': ''}]}).status_code == 400
+    assert client.post(url, json={'revision': 5, 'changes': []}).status_code == 409
+    assert client.post('/convert/live/missing', json={'changes': []}).status_code == 404
@@ -0,0 +1,21 @@
+"""Tests for /metrics and the worker stats in /health"""
+
+from app import app
+
+CONFIG = 'interface GigabitEthernet0/0/0/1.100\n encapsulation dot1q 1 second-dot1q 100\n!'
+
+def test_metrics_exposes_convert_stages():
+    client = app.test_client()
+    assert client.post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '77'}).status_code == 200
+    body = client.get('/metrics').get_data(as_text=True)
+    assert '# TYPE pwhe_convert_stage_seconds histogram' in body
+    assert 'pwhe_convert_stage_seconds_count{pid="' in body
+    assert 'stage="parse"' in body
+    assert 'pwhe_http_requests_total{pid="' in body
+    assert 'pwhe_cache_hits_total' in body
+
+def test_health_reports_readiness_and_worker():
+    data = app.test_client().get('/health').get_json()
+    assert data['ready'] is True
+    assert data['worker']['requests_served'] >= 0
+    assert data['worker']['in_flight'] >= 1
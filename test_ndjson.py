@@ -0,0 +1,77 @@
+"""Tests for format=ndjson on /convert and /convert/stream"""
+
+import json
+
+from app import app, convert_configuration
+from benchmarks.synthetic import generate_config
+
+CONFIG = """interface GigabitEthernet0/0/0/14.513 l2transport
+ description CUSTOMER-A
+ encapsulation dot1q 3513 second-dot1q 513
+ rewrite ingress tag pop 2 symmetric
+!
+interface GigabitEthernet0/0/0/14.502 l2transport
+ encapsulation dot1q 3513 second-dot1q 502
+ rewrite ingress tag pop 2 symmetric
+ shutdown
+!
+interface Loopback0
+ ipv4 address 10.0.0.1 255.255.255.255
+!"""
+
+def parse(body):
+    return [json.loads(line) for line in body.splitlines()]
+
+def rebuild(records):
+    """The text output, put back together from the records"""
+    interfaces = ['\n'.join(record['lines']) for record in records if record['type'] == 'interface']
+    migration = next(record for record in records if record['type'] == 'migration')
+    return '\n\n'.join(interfaces + ['\n'.join(migration['lines'])])
+
+def test_convert_ndjson_records():
+    response = app.test_client().post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '10239',
+                                                        'format': 'ndjson'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    records = parse(response.get_data(as_text=True))
+    assert [record['type'] for record in records] == ['interface'] * 3 + ['migration', 'bridge', 'diagnostic']
+
+    first, second, loopback = records[:3]
+    assert first['original_name'] == 'interface GigabitEthernet0/0/0/14.513 l2transport'
+    assert first['new_name'] == 'PW-Ether 10239.513'
+    assert first['ctag'] == '513' and first['l2transport'] is True
+    assert first['flags'] == ['rewrite_pop_1', 'shutdown_added']
+    assert second['flags'] == ['rewrite_removed']
+    assert loopback['new_name'] is None and loopback['flags'][0] == 'not_converted'
+
+    migration, bridge = records[3:5]
+    assert migration['shutdown'] == [record['original_name'] for record in records[:3]]
+    assert bridge['domains'] == [{'name': 'ME_DNET_502', 'interface': 'PW-Ether 10239.502',
+                                  'original_interface': 'interface GigabitEthernet0/0/0/14.502 l2transport'}]
+    assert records[5]['code'] == 'missing_vrf'
+    assert rebuild(records) == convert_configuration(CONFIG, '10239')
+
+def test_convert_ndjson_has_its_own_etag():
+    client = app.test_client()
+    payload = {'old_config': CONFIG, 'pw_ether_id': '10239'}
+    plain = client.post('/convert', json=payload)
+    ndjson = client.post('/convert?format=ndjson', json=payload)
+    assert plain.headers['ETag'] != ndjson.headers['ETag']
+    repeat = client.post('/convert?format=ndjson', json=payload, headers={'If-None-Match': ndjson.headers['ETag']})
+    assert repeat.status_code == 304
+
+def test_stream_ndjson_matches_text():
+    config = generate_config(500, seed=19)
+    response = app.test_client().post('/convert/stream?pw_ether_id=10239&format=ndjson', data=config.encode(),
+                                      content_type='text/plain')
+    assert response.status_code == 200
+    records = parse(response.get_data(as_text=True))
+    assert rebuild(records) == convert_configuration(config, '10239')
+
+def test_unknown_format_is_rejected():
+    client = app.test_client()
+    response = client.post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '10239', 'format': 'xml'})
+    assert response.status_code == 400
+    response = client.post('/convert/stream?pw_ether_id=10239&format=json', data=b'interface Gi0\n!',
+                           content_type='text/plain')
+    assert response.status_code == 400
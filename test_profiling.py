@@ -0,0 +1,107 @@
+"""Tests for the admin request profiling hook"""
+
+import pstats
+import time
+
+import pytest
+
+import app as app_module
+from app import app
+from benchmarks.synthetic import generate_config
+from profiling import Profile, ProfileStore, StackSampler, profile_mode, request_id
+
+CONFIG = generate_config(400, seed=41)
+ADMIN = {'X-Access-Code': 'PWHE2024'}
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ProfileStore(str(tmp_path / 'profiles'), max_profiles=3)
+    monkeypatch.setattr(app_module, 'profile_store', store)
+    return store
+
+def test_profile_mode():
+    assert profile_mode(None) is None
+    assert profile_mode('0') is None
+    assert profile_mode('1') == 'cprofile'
+    assert profile_mode(' Sample ') == 'sample'
+    with pytest.raises(ValueError):
+        profile_mode('perf')
+
+def test_request_id():
+    assert request_id('job-42_a') == 'job-42_a'
+    assert len(request_id('../etc/passwd')) == 32
+    assert len(request_id(None)) == 32
+
+def test_sampler_counts_stacks_of_one_thread():
+    import threading
+    sampler = StackSampler(threading.get_ident(), interval=0.001)
+    sampler.start()
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    sampler.stop()
+    assert sampler.stacks
+    assert all('test_sampler_counts_stacks_of_one_thread' in stack for stack in sampler.stacks)
+
+def test_store_keeps_newest(store):
+    for index in range(5):
+        profile = Profile('sample')
+        profile.start()
+        profile.stop()
+        store.save(f'p{index}', profile)
+        time.sleep(0.01)
+    assert [store.find(f'p{index}') is not None for index in range(5)] == [False, False, True, True, True]
+    assert store.find('../p4') is None
+
+def test_profiling_needs_admin(store):
+    client = app.test_client()
+    payload = {'old_config': CONFIG, 'pw_ether_id': '1'}
+    response = client.post('/convert', json=payload, headers={'X-Profile': '1', 'X-Access-Code': 'TEAM001'})
+    assert response.status_code == 403
+    response = client.post('/convert', json=payload, headers={'X-Profile': 'perf', **ADMIN})
+    assert response.status_code == 400
+    # Without the header nothing is profiled, whatever the access level
+    response = client.post('/convert', json=payload, headers=ADMIN)
+    assert response.status_code == 200 and 'X-Profile-Id' not in response.headers
+    assert client.get('/profiles/anything').status_code == 403
+
+def test_convert_cprofile(store, tmp_path):
+    client = app.test_client()
+    response = client.post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '31337'},
+                           headers={'X-Profile': '1', 'X-Request-ID': 'slow-customer', **ADMIN})
+    assert response.status_code == 200 and response.get_json()['success']
+    assert response.headers['X-Profile-Id'] == 'slow-customer'
+
+    text = client.get('/profiles/slow-customer?format=text', headers=ADMIN).get_data(as_text=True)
+    assert 'convert_interface_config' in text
+    download = client.get(response.headers['X-Profile-Url'], headers=ADMIN)
+    path = tmp_path / 'download.prof'
+    path.write_bytes(download.get_data())
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert 'convert_interface_lines' in functions
+    assert client.get('/profiles/missing', headers=ADMIN).status_code == 404
+
+def test_batch_profile_includes_workers(store, tmp_path):
+    jobs = [{'old_config': CONFIG, 'pw_ether_id': str(index)} for index in range(2)]
+    response = app.test_client().post('/convert/batch', json={'jobs': jobs}, headers={'X-Profile': 'cprofile', **ADMIN})
+    assert response.get_json()['success']
+    path, mode = store.find(response.headers['X-Profile-Id'])
+    assert mode == 'cprofile'
+    calls = {name: stat[1] for (_, _, name), stat in pstats.Stats(path).stats.items()}
+    # Converted in the worker processes, not in the request thread
+    assert calls['run_batch_job'] == 2
+
+def test_final_sampled(store):
+    payload = {
+        'old_config': CONFIG, 'pw_ether_id': '20280', 'csr_ip': '10.1.1.1',
+        'pwhe_option': next(iter(app_module.PWHE_BACKENDS)), 'huawei_model': next(iter(app_module.HUAWEI_MODELS)),
+        'existing_csr_config': 'interface GigabitEthernet0/2/6\n description uplink', 'cx_name': 'A', 'cx_location': 'B',
+    }
+    response = app.test_client().post('/final', json=payload, headers={'X-Profile': 'sample', **ADMIN})
+    assert response.status_code == 200
+    path, mode = store.find(response.headers['X-Profile-Id'])
+    assert mode == 'sample'
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) >= 1 and 'final (app.py:' in stack
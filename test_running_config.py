@@ -0,0 +1,78 @@
+"""Tests for the running-config indexer and subinterface selection"""
+
+import pytest
+
+from app import app, convert_configuration
+from running_config import RunningConfig, normalise_port, parse_selection
+
+RUNNING_CONFIG = """Building configuration...
+!! IOS XR Configuration 7.5.2
+hostname CSR-01
+!
+interface GigabitEthernet0/0/0/14
+ description uplink
+!
+interface GigabitEthernet0/0/0/14.3513101 l2transport
+ description cust a
+ encapsulation dot1q 3513 second-dot1q 101
+ rewrite ingress tag pop 2 symmetric
+!
+interface GigabitEthernet0/0/0/14.3514102
+ vrf SDB_DATA
+ ipv4 address 10.0.0.1 255.255.255.252
+ encapsulation dot1q 3514 second-dot1q 102
+!
+interface TenGigE0/0/0/1.3513103
+ encapsulation dot1q 3513 second-dot1q 103
+!
+policy-map 2M_SHAPE_PARENT
+ class class-default
+  shape average 2 mbps
+ !
+ end-policy-map
+!
+l2vpn
+ bridge group D_NET
+  bridge-domain ME_DNET_502
+   interface PW-Ether 10.502
+    split-horizon group
+   !
+   interface GigabitEthernet0/0/0/1.5
+   !
+  !
+ !
+!
+end
+"""
+
+def test_indexes_and_selection():
+    config = RunningConfig(RUNNING_CONFIG)
+    assert [node.text for node in config.select(parent='Gi0/0/0/14', outer=3513)] == [
+        'interface GigabitEthernet0/0/0/14.3513101 l2transport']
+    assert [node.subinterface for node in config.select(outer='3513')] == ['3513101', '3513103']
+    assert [node.ctag for node in config.select(vrf='SDB_DATA')] == ['102']
+    assert config.select(parent='te0/0/0/1', ctag=101) == []
+    assert len(config.subinterfaces) == 3
+
+def test_lazy_tree_sections():
+    config = RunningConfig(RUNNING_CONFIG)
+    assert [node.text for node in config.policy_maps['2M_SHAPE_PARENT'].children] == [
+        'class class-default', 'end-policy-map']
+    assert config.bridge_groups == {'D_NET': {'ME_DNET_502': ['PW-Ether 10.502', 'GigabitEthernet0/0/0/1.5']}}
+
+def test_selected_blocks_match_hand_cut_paste():
+    block = RUNNING_CONFIG.split('!\n')[2]
+    assert block.startswith('interface GigabitEthernet0/0/0/14.3513101')
+    response = app.test_client().post('/convert', json={
+        'old_config': RUNNING_CONFIG, 'pw_ether_id': '10239', 'select': 'Gi0/0/0/14 outer 3513'})
+    assert response.get_json()['new_config'] == convert_configuration(block + '!', '10239')
+
+def test_selection_parsing():
+    assert normalise_port('Gi0/0/0/14') == 'GigabitEthernet0/0/0/14'
+    assert normalise_port('BE10') == 'Bundle-Ether10'
+    assert parse_selection('Gi0/0/0/14 outer 3513 vrf X') == {'parent': 'Gi0/0/0/14', 'outer': '3513', 'vrf': 'X'}
+    with pytest.raises(ValueError):
+        parse_selection('Gi0/0/0/14 outer')
+    response = app.test_client().post('/convert', json={
+        'old_config': RUNNING_CONFIG, 'pw_ether_id': '1', 'select': 'Gi0/0/0/9'})
+    assert response.status_code == 400
@@ -0,0 +1,95 @@
+"""Tests for the prebuilt page shell, hashed assets and service worker"""
+
+import io
+import json
+import re
+
+import pytest
+
+from app import app, asset_bundle
+from compression import STATIC_ENCODERS, open_decompressed
+from static_assets import AssetBundle
+
+HTML = """<html>
+<head>
+    <style>
+        body { color: red; }
+    </style>
+</head>
+<body>
+    <script src="https://cdn.example/lib.js"></script>
+    <script>
+        const a = 1;
+    </script>
+    <p>between</p>
+    <script>
+        const b = a + 1;
+    </script>
+</body>
+</html>
+"""
+
+def names_by_extension(bundle):
+    return {name.rsplit('.', 1)[1]: name for name in bundle.assets}
+
+SW = "// header\nconst ASSET_MANIFEST = {};\nconst CACHE_NAME = 'x' + ASSET_MANIFEST.version;\n"
+
+def test_bundle_splits_inline_style_and_scripts():
+    bundle = AssetBundle(HTML, SW)
+    shell = bundle.shell.body.decode()
+    assert '<style>' not in shell and '<script>' not in shell
+    assert '<script src="https://cdn.example/lib.js"></script>' in shell
+
+    names = names_by_extension(bundle)
+    css_name, js_name = names['css'], names['js']
+    assert re.fullmatch(r'app\.[0-9a-f]{12}\.css', css_name)
+    assert re.fullmatch(r'app\.[0-9a-f]{12}\.js', js_name)
+    assert b'color: red' in bundle.assets[css_name].body
+    script = bundle.assets[js_name].body.decode()
+    assert script.index('const a') < script.index('const b')
+    # The combined script loads after all the markup the inline ones followed
+    assert shell.index('<p>between</p>') < shell.index(f'/assets/{js_name}')
+
+    manifest = json.loads(re.search(r'const ASSET_MANIFEST = (.*);', bundle.service_worker.body.decode()).group(1))
+    assert manifest == bundle.manifest
+    assert {f'/assets/{css_name}', f'/assets/{js_name}', '/'} <= set(manifest['assets'])
+
+def test_asset_names_follow_content():
+    first = AssetBundle(HTML, SW)
+    second = AssetBundle(HTML.replace('color: red', 'color: blue'), SW)
+    assert names_by_extension(first)['js'] == names_by_extension(second)['js']
+    assert names_by_extension(first)['css'] != names_by_extension(second)['css']
+    assert first.version != second.version
+
+def test_shell_is_revalidated_with_etag():
+    client = app.test_client()
+    response = client.get('/')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.get_data() == asset_bundle.shell.body
+
+    repeat = client.get('/', headers={'If-None-Match': response.headers['ETag']})
+    assert repeat.status_code == 304
+    assert repeat.get_data() == b''
+
+def test_every_manifest_entry_is_served():
+    client = app.test_client()
+    for path in asset_bundle.manifest['assets']:
+        assert client.get(path).status_code == 200, path
+
+@pytest.mark.parametrize('encoding', sorted(STATIC_ENCODERS))
+def test_assets_are_precompressed_and_immutable(encoding):
+    client = app.test_client()
+    for name, asset in asset_bundle.assets.items():
+        response = client.get(f'/assets/{name}', headers={'Accept-Encoding': encoding})
+        assert response.headers['Content-Encoding'] == encoding
+        assert 'immutable' in response.headers['Cache-Control']
+        assert response.get_data() == asset.encoded[encoding]
+        assert open_decompressed(io.BytesIO(response.get_data()), encoding, 10**8).read() == asset.body
+
+        # The weak ETag of a compressed copy still revalidates
+        repeat = client.get(f'/assets/{name}', headers={'If-None-Match': response.headers['ETag']})
+        assert repeat.status_code == 304
+
+def test_unknown_asset_is_404():
+    assert app.test_client().get('/assets/app.000000000000.js').status_code == 404
@@ -0,0 +1,38 @@
+"""Tests for the streaming /convert/stream endpoint"""
+
+from app import app, convert_configuration, iter_converted_configuration
+from benchmarks.synthetic import generate_config
+
+def test_stream_matches_convert_configuration():
+    config = generate_config(2000, seed=3)
+    assert ''.join(iter_converted_configuration(config.split('\n'), '10239')) == convert_configuration(config, '10239')
+
+def test_nested_bang_does_not_close_the_block():
+    config = ('interface GigabitEthernet0/0/0/14.3513101 l2transport\n'
+              ' ethernet cfm\n'
+              '  mep domain CUST service 101 mep-id 1\n'
+              ' !\n'
+              ' encapsulation dot1q 3513 second-dot1q 101\n'
+              ' rewrite ingress tag pop 2 symmetric\n'
+              '!\n'
+              'interface GigabitEthernet0/0/0/14.3513102 l2transport\n'
+              ' encapsulation dot1q 3513 second-dot1q 102\n'
+              '!\n')
+    expected = convert_configuration(config, '10239')
+    assert 'PW-Ether 10239.101' in expected
+    assert ''.join(iter_converted_configuration(config.split('\n'), '10239')) == expected
+    response = app.test_client().post('/convert/stream?pw_ether_id=10239', data=config.encode(),
+                                      content_type='text/plain')
+    assert response.get_data(as_text=True) == expected
+
+def test_convert_stream_endpoint():
+    config = generate_config(500, seed=5)
+    client = app.test_client()
+    response = client.post('/convert/stream?pw_ether_id=10239', data=config.encode(),
+                           content_type='text/plain')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == convert_configuration(config, '10239')
+
+def test_convert_stream_requires_pw_ether_id():
+    response = app.test_client().post('/convert/stream', data=b'interface Gi0\n!', content_type='text/plain')
+    assert response.status_code == 400
@@ -0,0 +1,76 @@
+"""Tests for the line-streaming conversion core"""
+
+import io
+import mmap
+import os
+import tracemalloc
+
+import pytest
+
+from benchmarks.synthetic import generate_config, generate_interfaces
+from converter import convert_configuration, iter_config_lines, iter_converted_lines
+
+SPOOL_CHARS = 16 * 1024
+# The 1 GB run takes several minutes under tracemalloc, so it is opt-in
+LARGE_TESTS = os.environ.get('PWHE_LARGE_TESTS') == '1'
+
+def synthetic_source(target_bytes, stats, big_block_lines=0):
+    """Yield config lines until ``target_bytes``, recording the largest block in ``stats``
+
+    With ``big_block_lines`` one block halfway through gets that many extra
+    description lines, so the bound can be checked against a block much
+    larger than the rest.
+    """
+    big_block_at = target_bytes // 2
+    for block in generate_interfaces(seed=29, max_extra_lines=8):
+        if big_block_lines and stats['bytes'] >= big_block_at:
+            block[1:1] = [f' description padding {index:08d} ' + 'x' * 40 for index in range(big_block_lines)]
+            big_block_lines = 0
+        size = 0
+        for line in block:
+            line += '\n'
+            size += len(line)
+            yield line
+        stats['largest'] = max(stats['largest'], size)
+        stats['bytes'] += size
+        if stats['bytes'] >= target_bytes:
+            return
+
+@pytest.mark.parametrize('count', [0, 1, 2000])
+def test_lines_match_convert_configuration(count):
+    config = generate_config(count, seed=count) if count else ''
+    expected = convert_configuration(config, '10239').split('\n')
+    assert list(iter_converted_lines(config, '10239')) == expected
+    assert list(iter_converted_lines(config.splitlines(keepends=True), '10239')) == expected
+    assert list(iter_converted_lines(io.BytesIO(config.encode()), '10239', spool_chars=64)) == expected
+
+def test_reads_mmap_and_bytes_lines(tmp_path):
+    config = generate_config(500, seed=31)
+    path = tmp_path / 'device.txt'
+    path.write_bytes(config.encode())
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        assert list(iter_config_lines(mapped)) == config.splitlines(keepends=True)
+        mapped.seek(0)
+        assert '\n'.join(iter_converted_lines(mapped, '10239')) == convert_configuration(config, '10239')
+    assert list(iter_config_lines([b'interface A\n', b' mtu 1600\n'])) == ['interface A\n', ' mtu 1600\n']
+
+@pytest.mark.parametrize('target_bytes', [
+    4 * 1024 * 1024,
+    pytest.param(1024 ** 3, marks=pytest.mark.skipif(not LARGE_TESTS, reason='set PWHE_LARGE_TESTS=1')),
+])
+def test_peak_memory_is_bounded_by_largest_block(target_bytes):
+    stats = {'largest': 0, 'bytes': 0}
+    lines = 0
+    tracemalloc.start()
+    try:
+        for _ in iter_converted_lines(synthetic_source(target_bytes, stats, big_block_lines=4000), '10239',
+                                      spool_chars=SPOOL_CHARS):
+            lines += 1
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert stats['bytes'] >= target_bytes and lines > target_bytes // 100
+    # A handful of copies of the largest block plus the spool buffers, independent of input size
+    assert stats['largest'] > 200_000
+    assert peak < 4 * stats['largest'] + 16 * SPOOL_CHARS + 256 * 1024, (peak, stats)
@@ -0,0 +1,74 @@
+"""Tests for the conversion-time consistency validator"""
+
+from app import app
+from converter import convert_configuration, parse_interface_config
+from validation import ConfigValidator
+
+CONFIG = """interface GigabitEthernet0/0/0/1.3513101 l2transport
+ mtu 1600
+ encapsulation dot1q 3513 second-dot1q 101
+ rewrite ingress tag pop 2 symmetric
+!
+interface GigabitEthernet0/0/0/2.3514101 l2transport
+ mtu 1600
+ vrf SDB_DATA
+ encapsulation dot1q 3514 second-dot1q 101
+!
+interface GigabitEthernet0/0/0/3.3515102
+ mtu 9000
+ vrf SDB_DATA
+ ipv4 address 10.0.0.1 255.255.255.252
+ service-policy input 2M_POLICE_DATA_IN
+ service-policy output 10M_SHAPE_PARENT
+ encapsulation dot1q 3515 second-dot1q 102
+!
+interface GigabitEthernet0/0/0/4.3516103
+ mtu 1600
+ vrf SDB_DATA
+ ipv4 address 10.0.0.1 255.255.255.252
+ encapsulation dot1q 3516 second-dot1q 103
+!
+interface GigabitEthernet0/0/0/5.3517104
+ mtu 1600
+ vrf ENT_INTERNET
+ ipv4 address 10.0.0.1 255.255.255.252
+ encapsulation dot1q 3517 second-dot1q 104
+!"""
+
+def test_diagnostics_in_the_conversion_pass():
+    validator = ConfigValidator('10239')
+    assert convert_configuration(CONFIG, '10239', validator=validator) == convert_configuration(CONFIG, '10239')
+    diagnostics = {diagnostic['code']: diagnostic for diagnostic in validator.diagnostics()}
+
+    assert diagnostics['ctag_collision']['interfaces'] == [
+        'interface GigabitEthernet0/0/0/1.3513101 l2transport', 'interface GigabitEthernet0/0/0/2.3514101 l2transport']
+    # The same address in another VRF is not a duplicate
+    assert len(diagnostics['duplicate_ip']['interfaces']) == 2
+    assert 'vrf SDB_DATA' in diagnostics['duplicate_ip']['message']
+    assert diagnostics['mtu_mismatch']['interfaces'] == ['interface GigabitEthernet0/0/0/3.3515102']
+    assert diagnostics['l2transport_mismatch']['interfaces'] == ['interface GigabitEthernet0/0/0/2.3514101 l2transport']
+    assert diagnostics['policy_mismatch']['severity'] == 'warning'
+
+def test_merged_validators_only_report_cross_device_collisions():
+    shared = ConfigValidator('10239')
+    for device, config in (('csr-1', CONFIG), ('csr-2', CONFIG.split('!\n')[2] + '!')):
+        validator = ConfigValidator('10239')
+        for interface in parse_interface_config(config):
+            validator.observe(interface)
+        shared.merge(validator, device=device)
+    collisions = [d for d in shared.diagnostics(across_devices=True) if d['code'] == 'ctag_collision']
+    assert [d['devices'] for d in collisions] == [['csr-1', 'csr-2']]
+
+def test_convert_returns_diagnostics():
+    data = app.test_client().post('/convert', json={'old_config': CONFIG, 'pw_ether_id': '10239'}).get_json()
+    assert data['success'] and {d['code'] for d in data['diagnostics']} >= {'ctag_collision', 'duplicate_ip'}
+
+def test_one_word_lines():
+    config = ('interface GigabitEthernet0/0/0/6.3518105\n vrfs\n vrf\n mtu\n shutdown\n'
+              ' encapsulation dot1q 3518 second-dot1q 105\n!')
+    validator = ConfigValidator('10239')
+    for interface in parse_interface_config(config):
+        validator.observe(interface)
+    assert validator.diagnostics() == []
+    response = app.test_client().post('/convert', json={'old_config': config, 'pw_ether_id': '10239'})
+    assert response.status_code == 200
@@ -0,0 +1,159 @@
+"""Consistency checks run alongside conversion.
+
+A ConfigValidator is fed each InterfaceBlock as it is converted and keeps
+hash indexes of what the converted config will create: PW-Ether
+subinterface names, IPv4 addresses per VRF and MTUs. Collisions fall out
+of the indexes at the end, so validation stays linear in the number of
+interfaces. Validators from several devices that target the same PW-Ether
+can be merged to find collisions between devices.
+"""
+
+from itertools import islice
+from sys import intern
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# First tokens of the lines observe() reads; every other line is skipped after one set lookup
+WATCHED_KEYWORDS = frozenset(('ipv4', 'vrf', 'mtu', 'service-policy', 'rewrite'))
+
+def _diagnostic(severity, code, message, refs):
+    diagnostic = {
+        'severity': severity,
+        'code': code,
+        'message': message,
+        'interfaces': [name for _, name in refs],
+    }
+    if any(device is not None for device, _ in refs):
+        diagnostic['devices'] = [device for device, _ in refs]
+    return diagnostic
+
+def _policy_rate(policy):
+    """Rate prefix of a policy name, e.g. 2M_POLICE_DATA_IN -> 2M"""
+    return policy.split('_', 1)[0]
+
+class ConfigValidator:
+    def __init__(self, pw_ether_id):
+        self.pw_ether_id = pw_ether_id
+        # Each index maps a key to the (device, interface name) pairs that produce it
+        self.pw_names = {}
+        self.addresses = {}
+        self.mtus = {}
+        self.names = {}
+        self.issues = []
+
+    def observe(self, interface):
+        """Index one InterfaceBlock; call before its lines are released"""
+        ref = (None, interface.name)
+        self.names.setdefault(interface.name, []).append(ref)
+        converted = interface.parent is not None
+        if converted:
+            self.pw_names.setdefault(interface.suffix, []).append(ref)
+
+        vrf = None
+        addresses = []
+        mtu = None
+        input_policy = output_policy = None
+        has_rewrite = False
+        for line in islice(interface.lines, 1, None):
+            keyword = line.split(None, 1)[0]
+            if keyword not in WATCHED_KEYWORDS:
+                continue
+            fields = line.split()
+            if len(fields) < 2:
+                # A bare keyword such as "vrf" names nothing to index
+                continue
+            if keyword == 'ipv4':
+                if len(fields) >= 3 and fields[1] == 'address':
+                    addresses.append(fields[2])
+            elif keyword == 'vrf':
+                # A few VRF and MTU values key indexes over every interface, so each is kept once
+                vrf = intern(fields[1])
+            elif keyword == 'mtu':
+                mtu = intern(fields[1])
+            elif keyword == 'service-policy':
+                if len(fields) >= 3 and fields[1] == 'input':
+                    input_policy = fields[2]
+                elif len(fields) >= 3 and fields[1] == 'output':
+                    output_policy = fields[2]
+            elif fields[1:3] == ['ingress', 'tag']:
+                has_rewrite = True
+
+        # Addresses may repeat across VRFs, so they are keyed by both
+        for address in addresses:
+            self.addresses.setdefault((vrf, address), []).append(ref)
+        if converted and mtu is not None:
+            self.mtus.setdefault(mtu, []).append(ref)
+
+        name = interface.name
+        if interface.l2transport and (addresses or vrf is not None):
+            self.issues.append(_diagnostic(
+                ERROR, 'l2transport_mismatch',
+                f'{name} is l2transport but carries L3 configuration (vrf or ipv4 address)', [ref]))
+        elif not interface.l2transport and has_rewrite:
+            self.issues.append(_diagnostic(
+                ERROR, 'l2transport_mismatch',
+                f'{name} is not l2transport but has a rewrite ingress tag command', [ref]))
+        if addresses and vrf is None:
+            self.issues.append(_diagnostic(
+                WARNING, 'missing_vrf', f'{name} has an IPv4 address but no vrf, so it lands in the global table', [ref]))
+        if input_policy and output_policy and _policy_rate(input_policy) != _policy_rate(output_policy):
+            self.issues.append(_diagnostic(
+                WARNING, 'policy_mismatch',
+                f'{name} polices input with {input_policy} but shapes output with {output_policy}', [ref]))
+
+    def merge(self, other, device=None):
+        """Fold another validator's collision indexes into this one, attributing them to ``device`` if given"""
+        for mine, theirs in ((self.pw_names, other.pw_names), (self.addresses, other.addresses),
+                             (self.mtus, other.mtus)):
+            for key, refs in theirs.items():
+                if device is not None:
+                    refs = [(device, name) for _, name in refs]
+                mine.setdefault(key, []).extend(refs)
+
+    def diagnostics(self, across_devices=False):
+        """Structured findings, errors first
+
+        With ``across_devices`` only collisions between different devices
+        are reported, for merged validators whose per-device findings have
+        already been returned.
+        """
+        def spans_devices(refs):
+            return len({device for device, _ in refs}) > 1
+
+        wanted = spans_devices if across_devices else (lambda refs: len(refs) > 1)
+        found = []
+
+        if not across_devices:
+            for refs in self.names.values():
+                if len(refs) > 1:
+                    found.append(_diagnostic(ERROR, 'duplicate_interface',
+                                             f'{refs[0][1]} is defined {len(refs)} times', refs))
+
+        for suffix, refs in self.pw_names.items():
+            if wanted(refs):
+                found.append(_diagnostic(
+                    ERROR, 'ctag_collision',
+                    f'PW-Ether {self.pw_ether_id}.{suffix} would be created by {len(refs)} interfaces', refs))
+
+        for (vrf, address), refs in self.addresses.items():
+            if wanted(refs):
+                found.append(_diagnostic(
+                    ERROR, 'duplicate_ip',
+                    f'{address} is configured on {len(refs)} interfaces in vrf {vrf or "default"}', refs))
+
+        if len(self.mtus) > 1:
+            # Every subinterface shares the PW-Ether's MTU; flag those off the most common value
+            common = max(self.mtus, key=lambda mtu: len(self.mtus[mtu]))
+            odd = [ref for mtu, refs in self.mtus.items() if mtu != common for ref in refs]
+            if not across_devices or spans_devices(odd + self.mtus[common]):
+                others = ', '.join(sorted(mtu for mtu in self.mtus if mtu != common))
+                found.append(_diagnostic(
+                    WARNING, 'mtu_mismatch',
+                    f'Most subinterfaces use MTU {common} but {len(odd)} use {others}; '
+                    f'PW-Ether {self.pw_ether_id} has a single MTU', odd))
+
+        if not across_devices:
+            found.extend(self.issues)
+        found.sort(key=lambda diagnostic: diagnostic['severity'] != ERROR)
+        return found
@@ -0,0 +1,174 @@
+"""Verification and ping command generation for converted interfaces.
+
+Subnets are extracted from the parsed interface blocks in one pass and host
+ranges are kept as uint32 integer bounds, so working out a /8 costs the same
+as a /30. Ping commands are formatted lazily from those bounds, with a
+per-subnet cap for the final document and offset/limit paging for anything
+larger.
+"""
+
+from collections import namedtuple
+import os
+import re
+
+SubnetTarget = namedtuple('SubnetTarget', 'interface vrf ip address netmask')
+
+VRF_RE = re.compile(r'vrf\s+(\S+)')
+IPV4_ADDRESS_RE = re.compile(r'ipv4 address\s+(\S+)\s+(\S+)')
+DOTTED_QUAD_RE = re.compile(r'(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$')
+
+# Ping commands listed per subnet in the final document; the rest is paged
+PING_HOST_LIMIT = int(os.environ.get('VERIFY_PING_LIMIT', 256))
+# Largest page of ping commands /verify/ping streams in one response
+PING_PAGE_LIMIT = int(os.environ.get('VERIFY_PING_PAGE_LIMIT', 65536))
+
+def ip_to_int(text):
+    """Parse a dotted-quad IPv4 address to an integer, or return None"""
+    match = DOTTED_QUAD_RE.match(text)
+    if not match:
+        return None
+    a, b, c, d = (int(octet) for octet in match.groups())
+    if a > 255 or b > 255 or c > 255 or d > 255:
+        return None
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+def int_to_ip(value):
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+def network_portion(ip):
+    """First three octets of an address, as used in the route and BGP filters"""
+    return '.'.join(ip.split('.')[:3]) + '.'
+
+def is_netmask(value):
+    """True when the set bits of ``value`` are contiguous from the top, as in 255.255.252.0"""
+    host_bits = ~value & 0xFFFFFFFF
+    return host_bits & (host_bits + 1) == 0
+
+def prefix_length(netmask):
+    return bin(netmask).count('1')
+
+def host_bounds(address, netmask):
+    """Return the [start, end) integer range of usable hosts in the subnet"""
+    prefix = prefix_length(netmask)
+    network = address & netmask
+    total = 1 << (32 - prefix)
+    # Both addresses of a /31 are usable; otherwise skip network and broadcast
+    if prefix == 31:
+        return network, network + total
+    return network + 1, network + total - 1
+
+def host_count(address, netmask):
+    """Number of usable hosts, excluding the interface's own address"""
+    start, end = host_bounds(address, netmask)
+    if end <= start:
+        return 0
+    return end - start - (1 if start <= address < end else 0)
+
+def iter_hosts(address, netmask, offset=0, limit=None):
+    """Yield usable host addresses as integers, skipping the interface address
+
+    ``offset`` and ``limit`` index into that sequence, so any page of a large
+    subnet is produced without walking the hosts before it.
+    """
+    start, end = host_bounds(address, netmask)
+    first = start + offset
+    # Hosts from the interface address onwards are shifted by one
+    if start <= address <= first:
+        first += 1
+    stop = end if limit is None else min(end, first + limit)
+    if first <= address < stop and limit is not None:
+        stop = min(end, stop + 1)
+    for host in range(first, stop):
+        if host != address:
+            yield host
+
+def iter_ping_commands(target, offset=0, limit=None):
+    for host in iter_hosts(target.address, target.netmask, offset, limit):
+        yield f"ping vrf {target.vrf} {int_to_ip(host)}\n"
+
+def subnet_target(interface):
+    """Return the interface's SubnetTarget, or None without both a VRF and an IPv4 address"""
+    block_text = interface.config
+    vrf_match = VRF_RE.search(block_text)
+    if not vrf_match:
+        return None
+    ip_match = IPV4_ADDRESS_RE.search(block_text)
+    if not ip_match:
+        return None
+    # Unparseable addresses and masks still get show commands, just no pings
+    address = ip_to_int(ip_match.group(1))
+    netmask = ip_to_int(ip_match.group(2))
+    if netmask is None or not is_netmask(netmask):
+        address = None
+    return SubnetTarget(interface.name.split()[1], vrf_match.group(1), ip_match.group(1), address, netmask)
+
+def generate_verification_commands(interfaces, pw_ether_id, ping_limit=PING_HOST_LIMIT):
+    """Generate show/ping verification commands for the parsed interface blocks
+
+    At most ``ping_limit`` ping commands are listed per subnet (None for no
+    cap); a trailing comment gives the number left out.
+    """
+    targets = []
+    special_ctags = []
+
+    for interface in interfaces:
+        target = subnet_target(interface)
+        if target is not None:
+            targets.append(target)
+
+        # Check for interfaces with ctags 502 or 504
+        interface_name = interface.name.split()[1]
+        if '.' in interface_name:
+            interface_suffix = interface.ctag or interface_name.rsplit('.', 1)[1]
+            if interface_suffix.endswith('502') or interface_suffix.endswith('504'):
+                special_ctags.append((interface_suffix[-3:], interface_name))
+
+    commands = []
+
+    if targets:
+        commands.append('\n### show arp ###\n')
+        for target in targets:
+            commands.append(f"show arp vrf {target.vrf} | i {target.interface.removeprefix('GigabitEthernet')}\n")
+
+        if pw_ether_id:
+            commands.append('\n### show arp (PW-ID) ###\n')
+            for target in targets:
+                commands.append(f"show arp vrf {target.vrf} | i {pw_ether_id}.\n")
+
+        commands.append('\n### show ip route ###\n')
+        for target in targets:
+            commands.append(f"show ip route vrf {target.vrf} | i {network_portion(target.ip)}\n")
+
+        commands.append('\n### show run static ###\n')
+        for target in targets:
+            commands.append(f"show run router static vrf {target.vrf} | i {target.interface}\n")
+
+        commands.append('\n### show run bgp ###\n')
+        for target in targets:
+            commands.append(f"show run router bgp 17627 vrf {target.vrf} | i {network_portion(target.ip)}\n")
+
+        commands.append('\n### ping (all other usable IPs) ###\n')
+        for target in targets:
+            if target.address is None:
+                continue
+            commands.extend(iter_ping_commands(target, limit=ping_limit))
+            if ping_limit is not None:
+                remaining = host_count(target.address, target.netmask) - ping_limit
+                if remaining > 0:
+                    commands.append(f"! {remaining} more usable hosts in {int_to_ip(target.address & target.netmask)}/"
+                                    f"{prefix_length(target.netmask)} not listed for {target.interface}\n")
+
+    # L2VPN verification commands for ctags 502/504
+    if special_ctags:
+        commands.append('\n#### D_NET VERIFICATIONS ####\n\n')
+        for ctag, original_interface in special_ctags:
+            commands.append(
+                f"sh l2vpn forwarding bridge-domain D_NET:ME_DNET_BNG_{ctag} mac-address location 0/0/CPU0 | i {original_interface}\n"
+                f"sh l2vpn bridge group D_NET bd-name ME_DNET_BNG_{ctag} interface {original_interface}\n"
+                f"sh run l2vpn bridge group D_NET bridge-domain ME_DNET_BNG_{ctag} interface {original_interface}\n\n"
+                f"sh l2vpn forwarding bridge-domain D_NET:ME_DNET_{ctag} mac-address location 0/0/CPU0 | i  {pw_ether_id}.{ctag}\n"
+                f"sh l2vpn bridge group D_NET bd-name ME_DNET_{ctag} interface PW-Ether {pw_ether_id}.{ctag}\n"
+                f"sh run l2vpn bridge group D_NET bridge-domain ME_DNET_{ctag} interface PW-Ether {pw_ether_id}.{ctag}\n\n"
+            )
+
+    return ''.join(commands)